@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 from pathlib import Path
 from typing import List
@@ -57,6 +58,11 @@ class Settings:
     def is_admin(cls) -> bool:
         return cls._user_type == UserType.ADMIN
 
+    @classmethod
+    def in_process_caches(cls) -> bool:
+        """True, wenn prozesslokale Caches gültig sind (genau ein Worker schreibt und liest)."""
+        return cls.WORKERS <= 1
+
     _kategorien = None  # Private class variable for caching
     _checkbox_categories = None  # Private class variable for checkbox categories cache
 
@@ -84,8 +90,33 @@ class Settings:
 
     PAIR_CACHE_PATH = DATA_DIR / 'pair_cache_local.json'
     RENDERED_HTML_DIR = DATA_DIR / "rendered_html"
+    RENDERED_HTML_STORE = "fragments.db"  # SQLite-Datei innerhalb von RENDERED_HTML_DIR
+    RENDERED_HTML_MAX_BYTES = 2 * 1024 ** 3
+    GALLERY_STREAMING = True  # Galerie als StreamingResponse, ?stream=0 liefert die Seite am Stück
+    GALLERY_RENDER_WORKERS = 4
+    # Score-Matrix, Ergebniscaches, Seiten-ETags und ihre Versionszähler leben im Prozess:
+    # die Galerie läuft mit einem uvicorn-Worker. Bei WEB_CONCURRENCY > 1 sind die Ergebniscaches
+    # und 304-Antworten für Seiten aus (siehe in_process_caches), damit kein Worker Veraltetes liefert;
+    # Score-Matrix und BitmapIndex gleichen sich über services/shared_versions.py ab.
+    WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    PAGE_CACHE_SIZE = 16  # fertige Galerie-Seiten im Speicher (LRU nach ETag), 0 = aus
+    SCORE_FILTER_CACHE_SIZE = 64  # Trefferlisten von Score-Ausdrücken (LRU)
+    NAME_FUZZY_THRESHOLD = 0.6  # Anteil gemeinsamer Trigramme für die unscharfe Namenssuche
     THUMBNAIL_CACHE_DIR_300 = DATA_DIR / 'thumbnailfiles300'
+    THUMBNAIL_SIZE = 300
+    THUMBNAIL_WORKERS = 4  # Prozesse der ThumbnailEngine
+    RENDITION_DIR = DATA_DIR / 'renditions'
+    RENDITION_SIZES = (150, 300, 600, 1600)  # Kantenlängen für srcset
+    RENDITION_MAX_BYTES = 4 * 1024 ** 3  # Plattenplatz der Renditions (LRU)
+    # Schlüssel für signierte Medien-URLs; ohne Umgebungsvariable einmal erzeugt und in
+    # MEDIA_URL_SECRET_FILE abgelegt, damit alle Worker und media_main denselben Wert haben
+    MEDIA_URL_SECRET = os.environ.get("MEDIA_URL_SECRET")
+    MEDIA_URL_SECRET_FILE = DATA_DIR / "media_url_secret"
+    MEDIA_URL_TTL = 12 * 3600
     GESICHTER_FILE_CACHE_DIR = '/data/facefiles'
+    THUMBNAIL_PACK_DIR = DATA_DIR / 'thumbnailpacks'  # Pack-Dateien statt einer Datei pro Thumbnail
+    FACE_PACK_DIR = DATA_DIR / 'facepacks'
+    PACK_SEGMENT_BYTES = 256 * 1024 ** 2
     CACHE_DATEI_NAME = DATA_DIR / "geo_cache.json"
 
     IMAGE_EXTENSIONS: Tuple[str, ...] = (".bmp", ".gif", ".jpg", ".jpeg", ".png")
@@ -126,10 +157,8 @@ class Settings:
     # Caches (Dictionary-Struktur beibehalten, aber zentralisiert)
     CACHE = {
         "image_cache": {},  # file_id -> { 'thumbnail': url }
-        "text_cache": {},  # lowercase text filename -> content
         "pair_cache": {},  # lowercase image filename -> { image_id, text_id, web_link }
-        "geo_cache": {},
-        "score_filter_result": {}
+        "geo_cache": {}
     }
 
     current_loading_folder = ""
@@ -137,3 +166,17 @@ class Settings:
     folders_total = 0
 
     RECOLL_CONFIG_DIR = "/data/recoll_config"
+    TEXT_INDEX_PATH = DATA_DIR / "text_index.db"  # FTS5-Index über TEXT_FILE_CACHE_DIR
+    TEXT_SEARCH_BACKEND = "fts"  # "fts" oder "recoll" (recollq muss installiert sein)
+    TEXT_SEARCH_CACHE_SIZE = 32  # Trefferlisten pro (Suchtext, Index-Generation)
+    TEXT_SEARCH_RECOLL_TTL = 300  # Sekunden, recoll hat keine Generation
+    TEXT_CACHE_MAX_BYTES = 64 * 1024 ** 2  # Bildbeschreibungen im Speicher (LRU), 0 = aus
+    TEXT_CACHE_MMAP = False  # Textdateien per mmap statt read_text lesen
+
+    # Civitai-Links (Hintergrund-Auflösung, Ergebnisse in SQLite)
+    CIVITAI_BASE_URL = "https://civitai.com/images"
+    CIVITAI_MAX_CONCURRENCY = 4
+    CIVITAI_TIMEOUT = 4.0
+    CIVITAI_TTL_FOUND = 30 * 24 * 3600  # Link gefunden
+    CIVITAI_TTL_MISSING = 7 * 24 * 3600  # Kein Bild auf Civitai
+    CIVITAI_TTL_ERROR = 15 * 60  # Netzwerkfehler/5xx, bald erneut versuchen
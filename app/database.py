@@ -1,8 +1,6 @@
 import sqlite3
 
 from .config import Settings
-from .config import reverse_score_type_map
-from .config import score_type_map
 from .utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -60,6 +58,9 @@ def init_db(db_path):
                          """)
 
             image_quality_scores(conn)
+            civitai_links(conn)
+            image_catalog(conn)
+            shared_versions(conn)
         logger.info(f"[init_db] ✅ Datenbank initialisiert")
     except sqlite3.Error as e:
         logger.error(f"[init_db] ❌ Fehler beim Initialisieren: {e}")
@@ -106,11 +107,68 @@ def image_quality_scores(conn):
                      )
                          )
                      """)
+        conn.execute("""
+                     CREATE INDEX IF NOT EXISTS idx_image_quality_scores_lower_name
+                         ON image_quality_scores (LOWER(image_name))
+                     """)
         logger.info(f"[image_quality_scores] ✅ Tabelle erstellt")
     except sqlite3.Error as e:
         logger.error(f"[image_quality_scores] ❌ Fehler beim Erstellen der Tabelle: {e}")
 
 
+def civitai_links(conn):
+    """Ergebnisse der Civitai-Auflösung; url ist NULL für negative Ergebnisse."""
+    try:
+        conn.execute("""
+                     CREATE TABLE IF NOT EXISTS civitai_links
+                     (
+                         image_name TEXT PRIMARY KEY,
+                         url        TEXT,
+                         expires_at REAL
+                     )
+                     """)
+    except sqlite3.Error as e:
+        logger.error(f"[civitai_links] ❌ Fehler beim Erstellen der Tabelle: {e}")
+
+
+def image_catalog(conn):
+    """
+    Katalog aller Bilder (Name, MD5, Kategorie, Aufnahmedatum, Größe). Der Index
+    (folder, capture_ts DESC, name) liefert die Galerie-Reihenfolge einer Kategorie direkt.
+    """
+    try:
+        conn.execute("""
+                     CREATE TABLE IF NOT EXISTS image_catalog
+                     (
+                         name       TEXT PRIMARY KEY,
+                         md5        TEXT,
+                         folder     TEXT,
+                         capture_ts REAL,
+                         size       INTEGER
+                     )
+                     """)
+        conn.execute("""
+                     CREATE INDEX IF NOT EXISTS idx_image_catalog_folder_ts
+                         ON image_catalog (folder, capture_ts DESC, name)
+                     """)
+    except sqlite3.Error as e:
+        logger.error(f"[image_catalog] ❌ Fehler beim Erstellen der Tabelle: {e}")
+
+
+def shared_versions(conn):
+    """Änderungszähler, über die Worker ihre prozesslokalen Indizes abgleichen (services/shared_versions.py)."""
+    try:
+        conn.execute("""
+                     CREATE TABLE IF NOT EXISTS shared_versions
+                     (
+                         name  TEXT PRIMARY KEY,
+                         value INTEGER NOT NULL
+                     )
+                     """)
+    except sqlite3.Error as e:
+        logger.error(f"[shared_versions] ❌ Fehler beim Erstellen der Tabelle: {e}")
+
+
 def migrate_score():
     logger.info(f"[migrate_score] 🔄 Starte Migration der Scores")
     try:
@@ -188,40 +246,6 @@ def check_folder_status_in_db(db_path, image_id, folder_key):
         conn.close()
 
 
-def get_scores_filtered_by_expr(db_path, expr):
-    import sqlite3
-
-    def extract_used_score_types(expr):
-        types = set()
-        # Klartextnamen wie 'porn' oder 'nsfw_score'
-        for key in score_type_map:
-            if key in expr:
-                types.add(score_type_map[key])
-        return sorted(types)
-
-    used_score_types = extract_used_score_types(expr)
-    if not used_score_types:
-        return {}
-
-    placeholders = ",".join("?" for _ in used_score_types)
-    query = f"""
-        SELECT LOWER(image_name), score_type, score
-        FROM image_quality_scores
-        WHERE score_type IN ({placeholders})
-    """
-
-    with sqlite3.connect(db_path) as conn:
-        rows = conn.execute(query, used_score_types).fetchall()
-
-    result = {}
-    for image_name, score_type, score in rows:
-        score_key = reverse_score_type_map.get(score_type)
-        if score_key:
-            result.setdefault(image_name, {})[score_key] = score
-
-    return result
-
-
 def load_all_nsfw_images(db_path: str, score_type: int, score: int) -> set[str]:
     with sqlite3.connect(db_path) as conn:
         rows = conn.execute("""
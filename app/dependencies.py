@@ -1,6 +1,9 @@
 from fastapi import HTTPException
 from starlette.requests import Request  # Importiere Request von starlette
 
+from .services.media import has_media_signature
+from .services.media import signed_media_path
+
 
 def require_login(request: Request):
     """
@@ -13,3 +16,16 @@ def require_login(request: Request):
     if not user:
         raise HTTPException(status_code=307, headers={"Location": "/gallery/login"})
     return user
+
+
+def require_media_access(request: Request):
+    """
+    Zugriff auf Bilder, Renditions, Gesichter und GIFs: eine gültig signierte URL genügt
+    (ohne Session, z.B. im eigenen Medien-Worker app.media_main); sonst wie require_login.
+    """
+    path = signed_media_path(request.url.path)
+    if path is not None and has_media_signature(request, path):
+        return None
+    if "session" not in request.scope:
+        raise HTTPException(status_code=403)
+    return require_login(request)
@@ -21,7 +21,6 @@ from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from starlette.middleware.sessions import SessionMiddleware  # Korrigierter Import
 
 # Importiere die Konfiguration aus app/config_new.py
 from .config import Settings
@@ -29,6 +28,7 @@ from .config import Settings
 from .database import init_db
 # Importiere die Routen
 from .routes import admin
+from .routes import api
 from .routes import auth
 from .routes import dashboard
 from .routes import gallery
@@ -41,6 +41,12 @@ from .routes.auth import TOKEN_FILE
 from .routes import diff_gdrive_local
 
 # Importiere die Google Drive Funktionen aus app/services/google_drive.py
+from .services.fragment_store import migrate_rendered_html_dir
+from .services.media import MediaSessionMiddleware
+from .services.media import media_url_secret
+from .services.catalog import sync_all_catalogs
+from .services.name_index import build_name_index
+from .services.text_index import sync_text_index
 from .services.google_drive import verify_folders_exist
 from .tools import fillcache_local
 from .utils.logger_config import setup_logger
@@ -49,7 +55,8 @@ logger = setup_logger(__name__)
 
 # FastAPI application setup
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key="**idefix**")  # Secret Key aus Config laden!
+# Signierte Medienanfragen laufen ohne Dekodieren des Session-Cookies durch
+app.add_middleware(MediaSessionMiddleware, secret_key="**idefix**")  # Secret Key aus Config laden!
 # Templates setup
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))  # Adjusted path
 
@@ -62,6 +69,13 @@ def init_service():
     os.environ.pop("HTTPS_PROXY", None)
     os.environ.pop("HTTP_PROXY", None)
 
+    # ohne lesbaren Schlüssel für Medien-URLs nicht starten
+    media_url_secret()
+
+    if not Settings.in_process_caches():
+        logger.warning(f"⚠️ {Settings.WORKERS} Worker: Score-/Suchcache und Seiten-304 sind aus, "
+                       f"die Galerie ist für einen Worker ausgelegt")
+
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
     else:
@@ -90,12 +104,21 @@ def slow_start():
         os._exit(1)
     Settings.app_ready = True
     logger.info("🚀 Anwendung bereit!")
+    # Alte <name>.j2-Dateien in den FragmentStore übernehmen (einmalig, danach leer)
+    migrate_rendered_html_dir()
+    # Volltextindex mit den Textdateien abgleichen (nur geänderte Dateien werden gelesen)
+    sync_text_index()
+    # Trigramm-Index der Bildnamen aller Kategorien vorbauen
+    build_name_index()
+    # Bildkatalog (Keyset-Blättern nach Aufnahmedatum) mit den Hash-Dateien abgleichen
+    sync_all_catalogs()
 
 
 # Include Routers
 app.include_router(auth.router)
 app.include_router(login.router)
 app.include_router(gallery.router)
+app.include_router(api.router)
 app.include_router(static.router)
 app.include_router(admin.router)
 app.include_router(dashboard.router)
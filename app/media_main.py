@@ -0,0 +1,17 @@
+# Eigener ASGI-Worker nur für Medien (ohne SessionMiddleware), z.B.:
+#   uvicorn app.media_main:app --port 8001
+# Der Proxy leitet /gallery/static/{renditions,imagefiles,facefiles,comfyui_gif,thumbnails} hierher.
+# Zugriff nur über signierte URLs; der Schlüssel kommt aus MEDIA_URL_SECRET oder, wie bei der
+# Haupt-App, aus Settings.MEDIA_URL_SECRET_FILE.
+from fastapi import FastAPI
+
+from .routes import static
+from .services.media import media_url_secret
+
+app = FastAPI()
+app.include_router(static.router)
+
+
+@app.on_event("startup")
+def load_media_url_secret():
+    media_url_secret()
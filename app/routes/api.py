@@ -0,0 +1,223 @@
+import base64
+import binascii
+import json
+import sqlite3
+from typing import List
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi import Body
+from fastapi import Depends
+from fastapi import Query
+from fastapi import Request
+from fastapi.responses import Response
+
+from .gallery import DEFAULT_FOLDER
+from .gallery import build_gallery_view
+from ..config import Settings
+from ..config import reverse_score_type_map
+from ..dependencies import require_login
+from ..scores.texte import search_etag_state
+from ..services.bitmap_index import get_bitmap_index
+from ..services.catalog import catalog_page
+from ..services.catalog import sync_catalog_if_changed
+from ..services.filter_state import get_filter_state
+from ..services.folder_index import FolderIndex
+from ..services.folder_index import find_folder_of_image_id
+from ..services.folder_index import get_folder_index
+from ..services.name_index import search_names
+from ..services.page_cache import etag_matches
+from ..services.page_cache import page_etag
+from ..services.pagination import GalleryView
+from ..services.text_index import get_text_index
+from ..utils.compression import compressed_response
+from ..utils.db_utils import load_page_data
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+router = APIRouter()
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+TEXT_SUMMARY_LENGTH = 200
+
+
+def encode_cursor(offset: int, image_name: str, capture_ts: Optional[float] = None) -> str:
+    data = {"o": offset, "n": image_name}
+    if capture_ts is not None:
+        data["t"] = capture_ts  # Keyset: nach Aufnahmedatum t / Name n weiterblättern
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, Optional[str], Optional[float]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        capture_ts = data.get("t")
+        return max(0, int(data.get("o", 0))), data.get("n"), float(capture_ts) if capture_ts is not None else None
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        return 0, None, None
+
+
+def _catalog_in_sync(view: GalleryView, folder: str) -> bool:
+    """Ungefilterte Sicht und zum FolderIndex abgeglichener Katalog → Blättern per Keyset direkt aus SQL."""
+    if view.filtered:
+        return False
+    try:
+        sync_catalog_if_changed(folder)
+        return True
+    except sqlite3.Error as e:
+        logger.warning(f"[api_images] ⚠️ Katalog {folder} nicht abgeglichen: {e}")
+        return False
+
+
+def image_items(images: List[tuple[str, str, str]]) -> List[dict]:
+    """
+    Kompakte Einträge für (image_name, image_id, folder_name) – alle DB-Daten
+    über einen load_page_data-Aufruf.
+    """
+    page_data = load_page_data(Settings.DB_PATH, [(name, image_id) for name, image_id, _ in images])
+    metas = get_text_index().metas(name for name, _, _ in images)
+    items = []
+    for image_name, image_id, folder_name in images:
+        record = page_data.get(image_name) or {}
+        scores = {}
+        for score_type, score in record.get("quality_rows", []) + record.get("nsfw_rows", []) + \
+                record.get("face_rows", []):
+            label = reverse_score_type_map.get(score_type)
+            if label:
+                scores[label] = score
+        items.append({
+            "name": image_name,
+            "image_id": image_id,
+            "folder": folder_name,
+            "thumbnail": f"/gallery/static/thumbnails/{image_id}.png",
+            "scores": scores,
+            "status": record.get("status", {}),
+            "comfyui_count": record.get("comfyui_count", 0),
+            "text": metas[image_name].summary[:TEXT_SUMMARY_LENGTH] if image_name in metas else None
+        })
+    return items
+
+
+def _restrict_to_checkbox(view: GalleryView, checkbox: str) -> GalleryView:
+    """Schnittmenge der Sicht mit Kategorie UND Checkbox aus dem Bitmap-Index."""
+    bitmap_index = get_bitmap_index()
+    marked = bitmap_index.names_of(bitmap_index.query(view.index.folder_name, [checkbox]))
+    positions = view.index.positions
+    selected = {positions[name] for name in marked if name in positions}
+    ordinals = range(len(view.index)) if view.ordinals is None else view.ordinals
+    return GalleryView(view.index, [ordinal for ordinal in ordinals if ordinal in selected])
+
+
+def _json_response(request: Request, payload: dict, headers: dict | None = None) -> Response:
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return compressed_response(request, body, "application/json", headers)
+
+
+@router.get("/api/images")
+def api_images(
+        request: Request,
+        folder: str = Query(DEFAULT_FOLDER),
+        cursor: Optional[str] = Query(None, description="next_cursor der vorherigen Antwort"),
+        page: Optional[int] = Query(None, ge=1),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        checkbox: Optional[str] = Query(None, description="nur Bilder mit gesetzter Checkbox"),
+        user: str = Depends(require_login)
+):
+    """
+    Bilder einer Kategorie als JSON, mit denselben Filtern wie die Galerie.
+    Blättern über cursor (stabil, auch wenn davor Bilder wegfallen) oder page/limit.
+    Ohne Filter kommt die Seite aus dem Bildkatalog, neueste zuerst (Cursor per Keyset, page per OFFSET).
+    """
+    state = get_filter_state(request)
+    view = build_gallery_view(folder, state)
+    index: FolderIndex = view.index
+    if checkbox:
+        view = _restrict_to_checkbox(view, checkbox)
+
+    offset, last_name, last_ts = decode_cursor(cursor) if cursor else (0, None, None)
+    start = 0
+    entries = None
+    if (last_ts is not None or not cursor) and _catalog_in_sync(view, folder):
+        if last_ts is not None:
+            start = offset
+            entries = catalog_page(folder, (last_ts, last_name), limit)
+        else:
+            # page=N in derselben Reihenfolge wie die Cursor-Seiten
+            start = (page - 1) * limit if page else 0
+            entries = catalog_page(folder, None, limit, start)
+        # zwischen Abgleich und Abfrage geänderte Kategorie: nur Bilder, die der Index kennt
+        entries = [entry for entry in entries if entry.name in index]
+    elif cursor:
+        rank = view.rank(last_name) if last_name else None
+        start = rank + 1 if rank is not None else offset
+    elif page:
+        start = (page - 1) * limit
+
+    names = [entry.name for entry in entries] if entries is not None else view.page_names(start, limit)
+    end = start + len(names)
+
+    headers = None
+    search_state = search_etag_state(state.search_text)
+    if search_state is not None:
+        etag = page_etag(index, names, "api", start, limit, view.total, tuple(names),
+                         state.filter_text, checkbox, search_state)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    next_cursor = None
+    if names and end < view.total:
+        next_cursor = encode_cursor(end, names[-1], entries[-1].capture_ts if entries else None)
+
+    payload = {
+        "folder": folder,
+        "total": view.total,
+        "start": start,
+        "items": image_items([(name, index.image_id(name), folder) for name in names]),
+        "next_cursor": next_cursor
+    }
+    logger.info(f"[api_images] {folder}: {len(names)} Bilder ab {start} von {view.total}")
+    return _json_response(request, payload, headers)
+
+
+@router.post("/api/images/batch")
+def api_images_batch(
+        request: Request,
+        image_ids: List[str] = Body(..., embed=True, max_length=MAX_LIMIT),
+        user: str = Depends(require_login)
+):
+    """Einträge für beliebige image_ids (z.B. Prefetch); unbekannte IDs stehen in missing."""
+    images = []
+    missing = []
+    for image_id in dict.fromkeys(image_ids):
+        index = find_folder_of_image_id(image_id)
+        if index is None:
+            missing.append(image_id)
+            continue
+        images.append((index.name_by_id(image_id), image_id, index.folder_name))
+
+    return _json_response(request, {"items": image_items(images), "missing": missing})
+
+
+@router.get("/api/names")
+def api_names(
+        request: Request,
+        q: str = Query(..., min_length=1),
+        fuzzy: bool = Query(False, description="unscharfe Suche über gemeinsame Trigramme"),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        user: str = Depends(require_login)
+):
+    """Bildnamen aller Kategorien, die q enthalten (bzw. ähnlich sind), mit Position in der Kategorie."""
+    items = []
+    total = 0
+    for folder_name, ordinals in search_names(q, fuzzy).items():
+        total += len(ordinals)
+        index = get_folder_index(folder_name)
+        for ordinal in ordinals[:max(0, limit - len(items))]:
+            items.append({"name": index.names[ordinal], "folder": folder_name, "ordinal": ordinal,
+                          "image_id": index.image_ids[ordinal]})
+    return _json_response(request, {"query": q, "fuzzy": fuzzy, "total": total, "items": items})
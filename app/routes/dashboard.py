@@ -11,6 +11,7 @@ from datetime import datetime
 from datetime import timedelta
 from pathlib import Path
 from typing import Dict
+from typing import Optional
 
 from google.cloud import bigquery
 
@@ -41,6 +42,7 @@ from ..scores.faces import reload_faces
 from ..scores.nsfw import reload_nsfw
 from ..scores.quality import reload_quality
 from ..scores.texte import reload_texte
+from ..services.thumbnail import get_thumbnail_engine
 from ..tools import fill_pair_cache
 from ..tools import readimages
 from ..utils.db_utils import delete_all_checkbox_status
@@ -207,7 +209,8 @@ async def dashboard(request: Request, year: int = None, month: int = None):
         {"label": "Reload Texte", "url": f"{_BASE}/test?direction=reload_texte", "icon": "📝"},
         {"label": 'Reload ComfyUI nur in "KI"', "url": f"{_BASE}/test?direction=reload_comfyui", "icon": "🤖"},
         {"label": "Lösche Doppelte Bilder", "url": f"{_BASE}/test?direction=del_double_images", "icon": "🎯"},
-        {"label": "Gen Pages", "url": f"{_BASE}/test?direction=gen_pages", "icon": "📄"}
+        {"label": "Gen Pages", "url": f"{_BASE}/test?direction=gen_pages", "icon": "📄"},
+        {"label": "Thumbnails vorwärmen", "url": f"{_BASE}/test?direction=prewarm_thumbnails", "icon": "🖼️"}
     ]
 
     cost_datasets = [
@@ -411,6 +414,14 @@ calls = {
         "start_url": "/gallery/dashboard/multi/gen_pages",
         "progress_url": DASHBOARD_PROGRESS
     },
+    "prewarm_thumbnails": {
+        "label": lambda folder_key: (
+            f'Erzeuge fehlende Thumbnails für "{next((k["label"] for k in Settings.kategorien() if k["key"] == folder_key), folder_key)}" ...'
+            if folder_key else "Erzeuge fehlende Thumbnails aller Kategorien ..."
+        ),
+        "start_url": "/gallery/dashboard/multi/prewarm_thumbnails",
+        "progress_url": DASHBOARD_PROGRESS
+    },
     "reload_comfyui": {
         "label": "Kopiere Bilder mit Workflow in ComfyUI ...",
         "start_url": "/gallery/dashboard/multi/reload_comfyui",
@@ -982,41 +993,41 @@ async def _reload_comfyui(folder: str = Form(...), direction: str = Form(...)):
     return {"status": "ok"}
 
 
-def load_rendered_html_file(file_dir: Path, file_name: str) -> str | None:
-    file_path = file_dir / (file_name + ".j2")
-    if file_path.is_file():
-        try:
-            logger.info(f"[load_rendered_html_file] ✅ {file_path}")
-            return file_path.read_text(encoding='utf-8')
-        except Exception as e:
-            logger.error(f"Fehler beim Laden der Datei {file_path}: {e}")
-            return None
-    else:
-        logger.info(f"[load_rendered_html_file] ⚠️ {file_path}")
-        return None
+@router.post("/dashboard/multi/prewarm_thumbnails")
+async def _prewarm_thumbnails(folder: str = Form(...), direction: str = Form(...)):
+    if not progress_state["running"]:
+        asyncio.create_task(prewarm_thumbnails(folder if folder not in ("", "None") else None))
+    return {"status": "ok"}
 
 
-def save_rendered_html_file(file_dir: Path, file_name: str, content: str) -> bool:
-    file_path = file_dir / (file_name + ".j2")
+async def prewarm_thumbnails(folder_key: Optional[str] = None):
+    """Erzeugt die fehlenden Thumbnails einer (oder aller) Kategorien im Prozess-Pool der ThumbnailEngine."""
+    await init_progress_state()
     try:
-        file_dir.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content, encoding="utf-8")
-        return True
-    except Exception as e:
-        logger.error(f"Fehler beim Speichern der Datei {file_path}: {e}")
-        return False
-
-
-def delete_rendered_html_file(file_dir: Path, file_name: str) -> bool:
-    file_path = file_dir / (file_name + ".j2")
-    if file_path.is_file():
-        try:
-            file_path.unlink()
-            return True
-        except Exception as e:
-            logger.error(f"Fehler beim Löschen der Datei {file_path}: {e}")
-            return False
-    return False
+        engine = get_thumbnail_engine()
+        for eintrag in Settings.kategorien():
+            if folder_key and eintrag["key"] != folder_key:
+                continue
+            label = eintrag["label"]
+            futures = [asyncio.wrap_future(future) for future in engine.submit_missing(eintrag["key"])]
+            start = time.time()
+            failed = 0
+            await update_progress(f"Thumbnails in \"{label}\": 0/{len(futures)}", 0)
+            for i, future in enumerate(asyncio.as_completed(futures), 1):
+                try:
+                    if not await future:
+                        failed += 1
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"[prewarm_thumbnails] ⚠️ {e}")
+                if i % 20 == 0 or i == len(futures):
+                    await update_progress(f"Thumbnails in \"{label}\": {i}/{len(futures)} (Fehler: {failed})",
+                                          int(i / len(futures) * 100), showlog=False)
+            rate = (len(futures) - failed) / max(time.time() - start, 1e-6)
+            await update_progress_text(f"✅ {label}: {len(futures) - failed} Thumbnails erzeugt, "
+                                       f"{failed} Fehler ({rate:.1f} Bilder/s)")
+    finally:
+        await stop_progress()
 
 
 @router.post("/dashboard/multi/del_double_images")
@@ -14,6 +14,7 @@ from ..config import Settings, UserType
 from ..config_gdrive import calculate_md5, folder_id_by_name
 from ..config_gdrive import sanitize_filename
 from ..routes.auth import load_drive_service
+from ..services.media import signed_media_url
 from ..utils.logger_config import setup_logger
 
 VERSION = 201
@@ -21,6 +22,8 @@ logger = setup_logger(__name__)
 
 router = APIRouter()
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "../templates"))
+# Originale im Modal auch über den Medien-Worker ohne Session
+templates.env.globals["signed_media_url"] = signed_media_url
 
 PROGRESS = {"status": "Bereit", "progress": 0, "details": {"status": "Bereit", "progress": 0}}
 PROGRESS_LOCK = asyncio.Lock()
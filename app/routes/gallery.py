@@ -1,38 +1,71 @@
 import asyncio
-import json
 import math
 import os
 import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from urllib.parse import unquote
 
-import httpx
 from fastapi import APIRouter
+from fastapi import Body
 from fastapi import Depends
 from fastapi import Form
 from fastapi import Query
 from fastapi import Request
 from fastapi.responses import HTMLResponse
 from fastapi.responses import RedirectResponse
+from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
 from starlette.responses import JSONResponse
 
 from app.routes.hashes import download_file
 from .auth import load_drive_service_token
-from .dashboard import load_rendered_html_file
-from .dashboard import save_rendered_html_file
 from ..config import Settings  # Importiere die Settings-Klasse
 from ..config import score_type_map
 from ..config_gdrive import SettingsGdrive
 from ..config_gdrive import calculate_md5
-from ..database import get_scores_filtered_by_expr
 from ..dependencies import require_login
-from ..scores.texte import search_recoll
+from ..scores.texte import search_etag_state
+from ..scores.texte import search_key
+from ..scores.texte import search_texts
+from ..services.civitai import get_cached_civitai_url
+from ..services.civitai import settle_civitai_url
+from ..services.filter_state import FilterState
+from ..services.filter_state import get_filter_state
+from ..services.filter_state import save_filter_state
 from ..services.image_processing import clean
+from ..services.folder_index import find_folder_of_image_id
+from ..services.folder_index import get_folder_index
+from ..services.fragment_store import fragment_variant
+from ..services.fragment_store import get_fragment_store
+from ..services.image_entry import compose_entry
+from ..services.image_entry import render_static_part
+from ..services.image_entry import text_part
 from ..services.image_processing import prepare_image_data
-from ..tools import newpaircache
-from ..utils.db_utils import load_comfyui_count
+from ..services.media import media_url_epoch
+from ..services.pack_store import get_face_pack
+from ..services.pack_store import get_thumbnail_pack
+from ..services.page_cache import etag_matches
+from ..services.page_cache import get_page
+from ..services.page_cache import page_etag
+from ..services.page_cache import store_page
+from ..services.page_cache import touch_image
+from ..services.pagination import GalleryView
+from ..services.pagination import get_gallery_view
+from ..services.renditions import get_rendition_store
+from ..services.score_filter_cache import get_score_filter_cache
+from ..services.score_filter_cache import score_versions
+from ..services.score_matrix import get_score_matrix
+from ..services.text_cache import get_text_cache
+from ..services.text_index import get_text_index
+from ..utils.db_utils import load_page_data
 from ..utils.logger_config import setup_logger
 from ..utils.move_utils import get_checkbox_count
 from ..utils.move_utils import move_marked_images_by_checkbox
@@ -42,8 +75,9 @@ from ..utils.progress import progress_state
 from ..utils.progress import stop_progress
 from ..utils.progress import update_progress
 from ..utils.progress import update_progress_text
-from ..utils.score_parser import parse_score_expression
+from ..utils.score_parser import compile_score_expression
 from ..utils.status_utils import load_status
+from ..utils.status_utils import load_status_bulk
 from ..utils.status_utils import save_status
 from ..utils.status_utils import set_status
 
@@ -53,9 +87,77 @@ DEFAULT_FOLDER: str = "real"
 router = APIRouter()
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "../templates"))
 
+# Begrenzte Parallelität für nicht gecachte Bildeinträge, gemeinsam für alle Anfragen
+RENDER_EXECUTOR = ThreadPoolExecutor(max_workers=Settings.GALLERY_RENDER_WORKERS)
+GRID_MARKER = "<!--@images@-->"
+
 logger = setup_logger(__name__)
 
 
+def build_gallery_view(folder_name: str, state: FilterState) -> GalleryView:
+    """
+    Wendet Score-Filter und Textsuche der Sitzung auf eine Kategorie an und liefert die geordnete Sicht.
+    Bei aktiver Textsuche zählen zusätzlich alle Bilder, deren Name den Suchtext enthält.
+    """
+    score_expr_raw = state.filter_text
+
+    logger.info(f"[Gallery] Beginne Verarbeitung mit Score-Filter: {score_expr_raw}")
+
+    # Prüfe, ob ein sinnvoller Ausdruck übergeben wurde
+    score_expr = None
+    if score_expr_raw and score_expr_raw.lower() != "none":
+        try:
+            # Versuch, Ausdruck zu parsen (wirft ValueError als ungültig)
+            compile_score_expression(score_expr_raw)
+            score_expr = score_expr_raw
+        except Exception as e:
+            logger.warning(f"[score_filter] Ungültiger Score-Ausdruck ignoriert: {score_expr_raw} ({e})")
+
+    # 2. Ausdruck verarbeiten und ggf. Trefferliste cachen
+    filtered_names = None
+    if score_expr:
+        cache_key = score_expr_raw.strip().lower()
+        # Versionen der verwendeten Score-Typen: neue Scores → neuer Cache-Eintrag und neue Sicht
+        versions = score_versions(score_type_map[key] for key in compile_score_expression(score_expr).keys)
+        filter_cache = get_score_filter_cache()
+        filtered_names = filter_cache.get(cache_key, versions)
+        if filtered_names is not None:
+            logger.info(f"[score_filter] ⚡ Treffer aus Cache: {len(filtered_names)} Bilder für '{score_expr}'")
+        else:
+            try:
+                filtered_names = get_score_matrix().filter(score_expr)
+                filter_cache.put(cache_key, versions, filtered_names)
+                logger.info(f"[score_filter] 🧮 Neu berechnet: {len(filtered_names)} Bilder für '{score_expr}'")
+            except Exception as e:
+                logger.warning(f"[score_filter] ⚠️ Fehler beim Score-Filter '{score_expr}': {e}")
+                score_expr = None
+                filtered_names = None
+        cache_key = (cache_key, versions)
+
+    if state.search_text:
+        # Trefferliste ist pro (Suchtext, Index-Generation) gecacht, die Sicht ebenso
+        search_results = search_texts(state.search_text)
+        view_key = ("search", search_key(state.search_text))
+
+        if filtered_names is None:
+            # Wenn noch keine Einschränkung existiert, nur Textsuche verwenden
+            filtered_names = search_results
+        else:
+            # Wenn bereits eine Einschränkung existiert, Schnittmenge bilden
+            filtered_names = search_results.intersection(filtered_names)
+            view_key += (cache_key,)
+
+        logger.info(f"[Gallery] Nach Textsuche: {len(filtered_names)} Bilder")
+
+        # Bei Textsuche zählen zusätzlich alle Bilder, deren Name den Suchtext enthält
+        return get_gallery_view(folder_name, match_names=filtered_names, substring=state.search_text,
+                                cache_key=view_key)
+
+    if filtered_names is not None:
+        return get_gallery_view(folder_name, match_names=filtered_names, cache_key=("score", cache_key))
+    return get_gallery_view(folder_name)
+
+
 @router.get("/images", response_class=HTMLResponse)
 def show_image_redirect(
         request: Request,
@@ -76,14 +178,11 @@ def show_image_redirect(
     textflag = request.query_params.get('textflag', '1')
     image_name = unquote(request.query_params.get('image_name', '')).strip().lower()
 
-    pair_cache = newpaircache(folder_name)
-    pagecounter = 0
-    for image_name_l in pair_cache:
-        pagecounter += 1
-        if image_name_l.strip().lower() == image_name:
-            clean(image_name)
-            url = f"/gallery/?page={pagecounter}&count=1&folder={folder_name}&textflag=2&lastpage={page}&lastcount={count}&lasttextflag={textflag}"
-            return RedirectResponse(url=url)
+    image_page = build_gallery_view(folder_name, get_filter_state(request)).page_of(image_name, 1) if image_name else None
+    if image_page is not None:
+        clean(image_name)
+        url = f"/gallery/?page={image_page}&count=1&folder={folder_name}&textflag=2&lastpage={page}&lastcount={count}&lasttextflag={textflag}"
+        return RedirectResponse(url=url)
 
     url = f"/gallery/?page={page}&count={count}&folder={folder_name}&textflag={textflag}"
     return RedirectResponse(url=url)
@@ -94,30 +193,6 @@ def show_images_gallery(
         request: Request,
         user: str = Depends(require_login)
 ):
-    def get_civitai_url(image_name: str):
-        base = image_name.split('.')[0]
-        url = f"https://civitai.com/images/{base}"
-
-        try:
-            with httpx.Client(follow_redirects=True, timeout=4.0) as client:
-                # HEAD liefert keinen HTML-Body → wir brauchen GET
-                response = client.get(url)
-
-                # Bedingung 1: Status 200
-                if response.status_code != 200:
-                    return None
-
-                # Bedingung 2: HTML muss den Namen enthalten
-                html = response.text or ""
-
-                if base in html:
-                    return url
-
-        except Exception:
-            pass
-
-        return None
-
     """
     Zeigt eine Galerie von Bildern an, mit Paginierung, Filtern und Textanzeigeoptionen.
     """
@@ -155,197 +230,40 @@ def show_images_gallery(
         page = (lastindex // count) + 1
 
     start = (page - 1) * count
-    end = start + count
-
-    image_keys = []
-    total_images = 0
-
-    if SettingsFilter.FILTER_TEXT:
-        score_expr_raw = SettingsFilter.FILTER_TEXT
-    else:
-        score_expr_raw = None
-
-    logger.info(f"[Gallery] Beginne Verarbeitung mit Score-Filter: {score_expr_raw}")
-
-    # Prüfe, ob ein sinnvoller Ausdruck übergeben wurde
-    score_expr = None
-    if score_expr_raw and score_expr_raw.lower() != "none":
-        try:
-            # Versuch, Ausdruck zu parsen (wirft ValueError als ungültig)
-            dummy_scores = dict.fromkeys(score_type_map.keys(), 0)
-            parse_score_expression(score_expr_raw, dummy_scores)
-            score_expr = score_expr_raw
-        except Exception as e:
-            logger.warning(f"[score_filter] Ungültiger Score-Ausdruck ignoriert: {score_expr_raw} ({e})")
 
-    # 2. Ausdruck verarbeiten und ggf. Trefferliste cachen
-    filtered_names = None
-    if score_expr:
-        cache_key = score_expr_raw.strip().lower()
-        if cache_key in Settings.CACHE["score_filter_result"]:
-            filtered_names = Settings.CACHE["score_filter_result"][cache_key]
-            logger.info(f"[score_filter] ⚡ Treffer aus Cache: {len(filtered_names)} Bilder für '{score_expr}'")
-        else:
-            try:
-                all_scores = get_scores_filtered_by_expr(Settings.DB_PATH, score_expr)
-                filtered_names = [
-                    name for name, scores in all_scores.items()
-                    if parse_score_expression(score_expr, scores)
-                ]
-                logger.info(f"[Gallery] filtered_names {filtered_names}")
-                Settings.CACHE["score_filter_result"][cache_key] = filtered_names
-                logger.info(f"[score_filter] 🧮 Neu berechnet: {len(filtered_names)} Bilder für '{score_expr}'")
-            except Exception as e:
-                logger.warning(f"[score_filter] ⚠️ Fehler beim Score-Filter '{score_expr}': {e}")
-                score_expr = None
-                filtered_names = None
-
-    if SettingsFilter.SEARCH_TEXT:
-        search_results = asyncio.run(search_recoll(SettingsFilter.SEARCH_TEXT))
-        search_results_lower = {name.lower() for name in search_results}
-
-        if filtered_names is None:
-            # Wenn noch keine Einschränkung existiert, nur Textsuche verwenden
-            filtered_names = list(search_results_lower)
-        else:
-            # Wenn bereits eine Einschränkung existiert, Schnittmenge bilden
-            filtered_names = [name for name in filtered_names if name.lower() in search_results_lower]
-
-        score_expr = "textsearch"  # Markieren dass gefiltert wurde
-        logger.info(f"[Gallery] Nach Textsuche: {len(filtered_names)} Bilder")
-
-    pair_cache = newpaircache(folder_name)
-
-    # 3. Hauptschleife über alle Bilder
-    logger.info("[Gallery] Starte Hauptschleife über Bilder")
-    for image_name in pair_cache.keys():
-        # Bei Textsuche: Prüfe ob Bildname den Suchtext enthält
-        if SettingsFilter.SEARCH_TEXT:
-            text_match = SettingsFilter.SEARCH_TEXT.lower() in image_name.lower()
-            if text_match:
-                if start <= total_images < end:
-                    image_keys.append(image_name.lower())
-                total_images += 1
-                continue
-
-        # Bei Score-Filter: Prüfe ob Bild in gefilterten Namen enthalten
-        if score_expr and filtered_names is not None:
-            if image_name.lower() not in filtered_names:
-                continue
-
-        # Füge Bild zur aktuellen Seite hinzu wenn im richtigen Bereich
-        if start <= total_images < end:
-            image_keys.append(image_name.lower())
-        total_images += 1
+    state = get_filter_state(request)
+    view = build_gallery_view(folder_name, state)
+    total_images = view.total
+    image_keys = view.page_names(start, count)
+    folder_index = view.index
 
     logger.info(f"[Gallery] Gefunden: {total_images} Bilder gesamt, {len(image_keys)} auf aktueller Seite")
 
-    images_html_parts = []
-
-    logger.info("[Gallery] Beginne HTML-Generierung")
+    # Textsuche über recoll hat keine Version → dann ohne ETag
+    etag = None
+    search_state = search_etag_state(state.search_text)
+    if search_state is not None:
+        etag = page_etag(folder_index, image_keys, total_images, tuple(image_keys),
+                         str(request.url.query), str(Settings.get_user_type()),
+                         state.filter_text, tuple(state.filter_history),
+                         tuple(state.search_history), search_state, media_url_epoch())
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            logger.info(f"[Gallery] 304 – Seite unverändert ({etag})")
+            return Response(status_code=304, headers=cache_headers)
+        if body := get_page(etag):
+            logger.info(f"[Gallery] Seite aus dem Speicher ({etag})")
+            return HTMLResponse(body, headers=cache_headers)
+
+    page_data = load_page_data(Settings.DB_PATH, [(name, folder_index.image_id(name)) for name in image_keys])
+
+    variant = fragment_variant(folder_name)
+    fragments = get_fragment_store().get_many((folder_index.image_id(name), variant) for name in image_keys)
+
+    entries = []
     for image_name in image_keys:
-        pair = pair_cache[image_name]  # Verwende Caches aus Settings
-        image_id = pair['image_id']
-
-        if Settings.is_admin():
-            image_id_text = f"{image_id}_{textflag}"
-        else:
-            image_id_text = f"{image_id}_{textflag}_{Settings.get_user_type()}"
-
-        if Settings.COMFYUI == folder_name:
-            image_id_text = f"{folder_name}_{image_id_text}"
-
-        if rendered_html := load_rendered_html_file(Settings.RENDERED_HTML_DIR, image_id_text):
-            logger.debug(f"[Gallery] Cache-Hit für {image_id_text}")
-            images_html_parts.append(rendered_html)
-        else:
-            logger.debug(f"[Gallery] Cache-Miss für {image_id_text}, generiere neu")
-            image_data = prepare_image_data(min(count, total_images), folder_name, image_name)
-            text_content = ""  # Standardwert
-            match textflag:
-                case '1':
-                    text_content = ""
-                case '2':
-                    text_content = Settings.CACHE["text_cache"].get(image_name,
-                                                                    Settings.KEIN_TEXT_GEFUNDEN)
-                    if Settings.KEIN_TEXT_GEFUNDEN == text_content:
-                        logger.warning(f"[Gallery] Kein Text gefunden für Bild {image_name}")
-                        set_status(image_name, Settings.RECHECK)
-                case '3':
-                    text_content = Settings.CACHE["text_cache"].get(image_name,
-                                                                    Settings.KEIN_TEXT_GEFUNDEN)
-                    if Settings.KEIN_TEXT_GEFUNDEN == text_content:
-                        logger.warning(f"[Gallery] Kein Text gefunden für Bild {image_name}")
-                        set_status(image_name, Settings.RECHECK)
-
-                    if isinstance(text_content, str):
-                        lines = text_content.splitlines()
-                        if lines and lines[0].startswith("Aufgenommen:"):
-                            text_content = lines[0]
-
-                case '4':
-                    text_content = Settings.CACHE["text_cache"].get(image_name,
-                                                                    Settings.KEIN_TEXT_GEFUNDEN)
-                    if Settings.KEIN_TEXT_GEFUNDEN == text_content:
-                        logger.warning(f"[Gallery] Kein Text gefunden für Bild {image_name}")
-                        set_status(image_name, Settings.RECHECK)
-
-                    if isinstance(text_content, str):
-                        index1 = text_content.find("\n\nThe")
-                        index2 = text_content.find("\n\nClose")
-                        indices = [i for i in (index1, index2) if i != -1]
-                        if indices:
-                            text_content = text_content[:min(indices)]
-
-            # Stelle sicher, dass quality_scores ein Dictionary ist
-            quality_scores = image_data.get("quality_scores", {})
-            if not isinstance(quality_scores, dict):
-                quality_scores = {}
-
-            civitai = get_civitai_url(image_name)
-
-            rendered_html = templates.get_template("image_entry_local.j2").render(
-                thumbnail_src=image_data["thumbnail_src"],
-                text_content=text_content,
-                image_name=image_name,
-                civitai=civitai,
-                folder_name=folder_name,
-                image_id=image_id,
-                status={},
-                quality_scores=quality_scores,
-                nsfw_scores=image_data["nsfw_scores"],
-                kategorien=Settings.kategorien(),
-                extra_thumbnails=image_data["extra_thumbnails"]
-            )
-            images_html_parts.append(rendered_html)
-            save_rendered_html_file(Settings.RENDERED_HTML_DIR, image_id_text, rendered_html)
-
-        # Status dynamisch nachschieben
-        status = load_status(image_name)
-        value = Settings.CACHE["text_cache"].get(image_name, "")  # Verwende Caches aus Settings
-        if isinstance(value, str):
-            if "Error 2" in value:
-                status[Settings.RECHECK] = True
-
-        status_json = json.dumps({f"{image_id}_{key}": value for key, value in status.items()})
-
-        comfyui_count = load_comfyui_count(Settings.DB_PATH, image_id)
-
-        images_html_parts.append(f"""
-        <script>
-        const checkboxStatus_{image_id} = {status_json};
-        for (const key in checkboxStatus_{image_id}) {{
-            const checkbox = document.querySelector(`input[name=\"${{key}}\"]`);  // <-- RICHTIG: Backticks!
-            if (checkbox) {{
-                checkbox.checked = checkboxStatus_{image_id}[key];
-            }}
-        }}
-        const input_{image_id} = document.getElementById('comfyui_count_{image_id}');
-        if (input_{image_id}) {{
-            input_{image_id}.value = {comfyui_count};
-        }}
-        </script>
-        """)
+        image_id = folder_index.image_id(image_name)
+        entries.append(GalleryEntry(image_name, image_id, page_data.get(image_name), fragments.get((image_id, variant))))
 
     # Berechnung total_pages
     total_pages = max(1, math.ceil(total_images / count))
@@ -354,9 +272,7 @@ def show_images_gallery(
     if lastpage > 0 and lastcount > 0:
         lastcall = f"/gallery/?page={lastpage}&count={lastcount}&folder={folder_name}&textflag={lasttextflag}"
 
-    logger.info(f"[Gallery] Seite erfolgreich generiert: {total_images} Bilder, {total_pages} Seiten")
-
-    return templates.TemplateResponse("image_gallery_local.j2", {
+    context = {
         "request": request,
         "page": page,
         "total_pages": total_pages,
@@ -365,13 +281,125 @@ def show_images_gallery(
         "count": count,
         "textflag": textflag,
         "kategorien": Settings.kategorien(),
-        "images_html": ''.join(images_html_parts),
         "lastcall": lastcall,
-        "last_texts": SettingsFilter.FILTER_HISTORY,
-        "filter_text": SettingsFilter.FILTER_TEXT,
-        "search_history": SettingsFilter.SEARCH_HISTORY,
-        "search_text": SettingsFilter.SEARCH_TEXT
-    })
+        "last_texts": state.filter_history,
+        "filter_text": state.filter_text,
+        "search_history": state.search_history,
+        "search_text": state.search_text
+    }
+    render_count = min(count, total_images)
+
+    stream = request.query_params.get('stream', '1' if Settings.GALLERY_STREAMING else '0') == '1'
+    if not stream:
+        logger.info("[Gallery] Beginne HTML-Generierung")
+        images_html_parts = []
+        for entry in entries:
+            static_html = entry.static_html or render_static_entry(folder_name, entry, render_count)
+            images_html_parts.append(render_entry(static_html, entry, textflag))
+        logger.info(f"[Gallery] Seite erfolgreich generiert: {total_images} Bilder, {total_pages} Seiten")
+        response = templates.TemplateResponse("image_gallery_local.j2", {
+            **context,
+            "images_html": ''.join(images_html_parts)
+        })
+        if etag:
+            response.headers.update(cache_headers)
+            store_page(etag, response.body)
+        return response
+
+    # Seitenrahmen sofort senden, Bilder folgen einzeln
+    shell = templates.get_template("image_gallery_local.j2").render(**context, images_html=Markup(GRID_MARKER))
+    head, tail = shell.split(GRID_MARKER, 1)
+    return StreamingResponse(
+        stream_gallery(head, tail, folder_name, entries, textflag, render_count, etag),
+        media_type="text/html",
+        headers=cache_headers if etag else None
+    )
+
+
+class GalleryEntry(NamedTuple):
+    image_name: str
+    image_id: str
+    image_record: Optional[dict]
+    static_html: Optional[str]
+
+
+def render_static_entry(folder_name: str, entry: GalleryEntry, count: int) -> str:
+    """Rendert den statischen Teil eines Bildeintrags (Cache-Miss) und legt ihn im FragmentStore ab."""
+    logger.debug(f"[Gallery] Cache-Miss für {entry.image_id}, generiere neu")
+    image_data = prepare_image_data(count, folder_name, entry.image_name, entry.image_record)
+
+    # Stelle sicher, dass quality_scores ein Dictionary ist
+    quality_scores = image_data.get("quality_scores", {})
+    if not isinstance(quality_scores, dict):
+        quality_scores = {}
+
+    _, civitai = get_cached_civitai_url(entry.image_name)
+
+    static_html = render_static_part(
+        thumbnail_src=image_data["thumbnail_src"],
+        **image_data.get("renditions", {}),
+        image_name=entry.image_name,
+        civitai=civitai,
+        folder_name=folder_name,
+        image_id=entry.image_id,
+        quality_scores=quality_scores,
+        nsfw_scores=image_data["nsfw_scores"],
+        extra_thumbnails=image_data["extra_thumbnails"]
+    )
+    get_fragment_store().put(entry.image_id, fragment_variant(folder_name), static_html)
+    # erst nach dem put auflösen, sonst kann die Invalidierung vor dem Speichern laufen
+    settle_civitai_url(entry.image_name, entry.image_id, civitai)
+    return static_html
+
+
+def render_entry(static_html: str, entry: GalleryEntry, textflag: str) -> str:
+    """Bildeintrag mit Text und Kategorien; Checkbox-Status lädt der Client über /status/bulk."""
+    image_name, image_id, image_record = entry.image_name, entry.image_id, entry.image_record
+    status = image_record["status"] if image_record else load_status(image_name)
+
+    text_content, text_missing = text_part(image_name, textflag)
+    if text_missing and not status.get(Settings.RECHECK):
+        logger.warning(f"[Gallery] Kein Text gefunden für Bild {image_name}")
+        set_status(image_name, Settings.RECHECK)
+
+    return compose_entry(static_html, image_id, image_name, text_content)
+
+
+def stream_gallery(head: str, tail: str, folder_name: str, entries: List[GalleryEntry], textflag: str,
+                   count: int, etag: Optional[str] = None) -> Iterator[str]:
+    """
+    Liefert Seitenkopf, Bildeinträge in Seitenreihenfolge und Seitenende.
+    Gecachte Einträge gehen sofort raus, fehlende werden parallel im RENDER_EXECUTOR erzeugt.
+    Mit etag wird die vollständig und fehlerfrei gesendete Seite im Seiten-Cache abgelegt.
+    """
+    parts = [head]
+    failed = False
+    yield head
+    futures = {
+        index: RENDER_EXECUTOR.submit(render_static_entry, folder_name, entry, count)
+        for index, entry in enumerate(entries) if not entry.static_html
+    }
+    try:
+        for index, entry in enumerate(entries):
+            static_html = entry.static_html
+            if static_html is None:
+                try:
+                    static_html = futures[index].result()
+                except Exception as e:
+                    logger.error(f"[Gallery] ❌ Fehler beim Rendern von {entry.image_name}: {e}")
+                    failed = True
+                    continue
+            parts.append(render_entry(static_html, entry, textflag))
+            yield parts[-1]
+        parts.append(tail)
+        yield tail
+        if etag and not failed:
+            store_page(etag, ''.join(parts).encode("utf-8"))
+        logger.info(f"[Gallery] Seite gestreamt: {len(entries)} Bilder, {len(futures)} neu gerendert")
+    finally:
+        # Client weg → noch nicht gestartete Einträge verwerfen
+        for future in futures.values():
+            future.cancel()
 
 
 @router.post("/save")
@@ -386,6 +414,30 @@ async def save(
     return {"status": "ok"}
 
 
+@router.post("/status/bulk")
+def get_status_bulk(
+        image_ids: List[str] = Body(..., embed=True),
+        folder: Optional[str] = Body(None, embed=True),
+        user: str = Depends(require_login)
+):
+    """Checkbox-Status und comfyui_count aller Bilder einer Seite mit einer Abfrage."""
+    images = []
+    for image_id in dict.fromkeys(image_ids):
+        index = get_folder_index(folder) if folder else None
+        if index is None or index.name_by_id(image_id) is None:
+            index = find_folder_of_image_id(image_id)
+        if index is not None:
+            images.append((index.name_by_id(image_id), image_id))
+
+    result = load_status_bulk(images)
+    metas = get_text_index().metas(image_name for image_name, _ in images)
+    for image_name, image_id in images:
+        meta = metas.get(image_name)
+        if meta and meta.has_error:
+            result[image_id]["status"][Settings.RECHECK] = True
+    return result
+
+
 @router.get("/status/{image_name}")
 def get_status_for_image(image_name: str, user: str = Depends(require_login)):
     logger.info(f"📥 Lade Status für Bild: {image_name}")
@@ -407,6 +459,18 @@ def loading_status(user: str = Depends(require_login)):
     }
 
 
+@router.get("/cache_status")
+def cache_status(user: str = Depends(require_login)):
+    """Kennzahlen der Speicher-Caches (Einträge, Bytes, Treffer, Verdrängungen)."""
+    return {
+        "text_cache": get_text_cache().stats(),
+        "score_filter": get_score_filter_cache().stats(),
+        "renditions": get_rendition_store().stats(),
+        "thumbnail_pack": get_thumbnail_pack().stats(),
+        "face_pack": get_face_pack().stats()
+    }
+
+
 @router.post("/savegencount")
 async def save_gen_count(
         image_id: str = Query(..., description="ID des Bildes"),
@@ -427,6 +491,7 @@ async def save_gen_count(
             """, (image_id, key, comfyui_count))
             logger.info(f"[savegencount] ✅ Textfeld '{key}' für {image_id} gespeichert. Wert: {comfyui_count}")
             conn.commit()
+        touch_image(image_id)
     except sqlite3.Error as e:
         logger.error(f"[savegencount] ❌ Fehler beim Speichern des Status für {image_id}: {e}")
         raise
@@ -569,25 +634,15 @@ async def _gen_pages(folder: str = Form(...), direction: str = Form(...)):
     return {"status": "ok"}
 
 
-class SettingsFilter:
-    # Filter-Status
-    FILTER_TEXT = None
-    FILTER_HISTORY = []
-
-    SEARCH_TEXT = None
-    SEARCH_HISTORY = []
-
-
 @router.post("/filter/update_history")
-async def update_text_history(text: str = Form(...)):
+async def update_text_history(request: Request, text: str = Form(...)):
     """Aktualisiert die Text-Historie"""
     text = text.strip().replace(":", " > ")  # Ersetze ":" durch ">"
     logger.info(f'[update_text_history] Filter-Text: "{text}"')
 
     if text:
-        dummy_scores = {key: 0 for key in score_type_map.keys()}
         try:
-            parse_score_expression(text, dummy_scores)
+            compile_score_expression(text)
         except ValueError as e:
             # Fange die spezifische ValueError ab
             error_msg = str(e)
@@ -610,27 +665,24 @@ async def update_text_history(text: str = Form(...)):
             return {
                 "status": f"❌ {msg}"
             }
-        if text in SettingsFilter.FILTER_HISTORY:
-            SettingsFilter.FILTER_HISTORY.remove(text)
-            logger.debug(f'[update_text_history] Filter-Text aus Historie entfernt: "{text}"')
-
-        SettingsFilter.FILTER_HISTORY.insert(0, text)
-        SettingsFilter.FILTER_HISTORY = SettingsFilter.FILTER_HISTORY[:10]  # Auf 10 Einträge begrenzen
-        SettingsFilter.FILTER_TEXT = text
-        logger.info(f'[update_text_history] Filter-Text, neue Historie: {SettingsFilter.FILTER_HISTORY}')
+
+    state = get_filter_state(request)
+    state.set_filter(text)
+    save_filter_state(request, state)
+    if text:
+        logger.info(f'[update_text_history] Filter-Text, neue Historie: {state.filter_history}')
     else:
         logger.info('[update_text_history] Filter-Text zurückgesetzt (leer)')
-        SettingsFilter.FILTER_TEXT = None
 
     return {
         "status": "ok",
-        "last_texts": SettingsFilter.FILTER_HISTORY,
-        "filter_text": SettingsFilter.FILTER_TEXT
+        "last_texts": state.filter_history,
+        "filter_text": state.filter_text
     }
 
 
 @router.post("/search/update_history")
-async def update_search_history(text: str = Form(...)):
+async def update_search_history(request: Request, text: str = Form(...)):
     """Aktualisiert die Text-Historie"""
     text = text.strip().replace(":", " > ")  # Ersetze ":" durch ">"
     logger.info(f'[update_search_history] Search-Text: "{text}"')
@@ -648,22 +700,18 @@ async def update_search_history(text: str = Form(...)):
                 "status": f"❌ {msg}"
             }
 
-        if text in SettingsFilter.SEARCH_HISTORY:
-            SettingsFilter.SEARCH_HISTORY.remove(text)
-            logger.debug(f'[update_search_history] Search-Text aus Historie entfernt: "{text}"')
-
-        SettingsFilter.SEARCH_HISTORY.insert(0, text)
-        SettingsFilter.SEARCH_HISTORY = SettingsFilter.SEARCH_HISTORY[:10]  # Auf 10 Einträge begrenzen
-        SettingsFilter.SEARCH_TEXT = text
-        logger.info(f'[update_search_history] Search-Text aktualisiert, neue Historie: {SettingsFilter.SEARCH_HISTORY}')
+    state = get_filter_state(request)
+    state.set_search(text)
+    save_filter_state(request, state)
+    if text:
+        logger.info(f'[update_search_history] Search-Text aktualisiert, neue Historie: {state.search_history}')
     else:
         logger.info('[update_search_history] Search-Text zurückgesetzt (leer)')
-        SettingsFilter.SEARCH_TEXT = None
 
     return {
         "status": "ok",
-        "search_history": SettingsFilter.SEARCH_HISTORY,
-        "search_text": SettingsFilter.SEARCH_TEXT
+        "search_history": state.search_history,
+        "search_text": state.search_text
     }
 
 
@@ -674,20 +722,7 @@ TEXT_FLAGS: list[int] = [1, 2, 3, 4]
 async def get_total_images_from_cache(folder_key: str) -> int:
     await update_progress_text(f"🔍 get_total_images_from_cache(folder_key={folder_key})")
 
-    count = 0
-
-    folder_path = Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_key
-    if folder_path.exists():
-        gallery_hash_file = folder_path / Settings.GALLERY_HASH_FILE
-
-        try:
-            if gallery_hash_file.exists():
-                with open(gallery_hash_file, 'r') as f:
-                    local_hashes = json.load(f)
-                    count = len(local_hashes)
-
-        except Exception as e:
-            await update_progress_text(f"❌ Fehler beim Lesen/Schreiben der Cache-Dateien: {e}")
+    count = len(get_folder_index(folder_key))
 
     await update_progress_text(f"📊 get_total_images_from_cache → {count} Bilder für Folder '{folder_key}'")
     return count
@@ -743,7 +778,7 @@ async def process_pages(folder_key: str, start_page: int, text_flags=TEXT_FLAGS)
                     'type': 'http',
                     'method': 'GET',
                     'path': '/',
-                    'query_string': f'page={page}&folder={folder_key}&textflag={textflag}'.encode(),
+                    'query_string': f'page={page}&folder={folder_key}&textflag={textflag}&stream=0'.encode(),
                 })
 
                 # Direkte Funktion aufrufen mit korrekten Parametern
@@ -23,8 +23,14 @@ from ..config_gdrive import sanitize_filename
 from ..database import clear_folder_status_db_by_name
 from ..routes.auth import load_drive_service_token
 from ..routes.gdrive_from_lokal import save_structured_hashes
+from ..services.folder_index import bump_folder_generation
 from ..services.image_processing import download_text_file
 from ..services.image_processing import find_png_file
+from ..services.score_filter_cache import bump_score_version
+from ..services.score_matrix import loaded_score_matrix
+from ..services.score_matrix import reset_score_matrix
+from ..services.text_cache import get_text_cache
+from ..services.text_index import sync_text_index
 from ..tools import readimages
 from ..utils.db_utils import load_folder_status_from_db
 from ..utils.db_utils import save_folder_status_to_db
@@ -48,7 +54,7 @@ async def update_local_hashes_text():
         await init_progress_state()
         await update_progress_text("🧮 Verarbeite Textdateien")
 
-        Settings.CACHE["text_cache"].clear()
+        get_text_cache().clear()
 
         # Update database and collect files
         await _update_database()
@@ -63,6 +69,7 @@ async def update_local_hashes_text():
 
         # Save results
         await _save_hash_file(local_hashes)
+        await asyncio.to_thread(sync_text_index)
         await update_progress_text(f"✅ Verarbeitung abgeschlossen: {len(text_files)} Dateien")
     finally:
         await stop_progress()
@@ -78,6 +85,8 @@ async def _update_database():
                          WHERE score_type = ?
                            AND LOWER(image_name) LIKE '%.txt'
                          """, (score_type_map['text'],))
+        bump_score_version(score_type_map['text'])
+        reset_score_matrix()
     except Exception as e:
         await update_progress_text(f"❌ Datenbankfehler: {e}")
 
@@ -150,6 +159,10 @@ async def _create_new_entry(png_file):
                 (image_name, score_type, score)
                 VALUES (?, ?, ?)
             """, (str(png_file.name), score_type_map['text'], len(content)))
+        bump_score_version(score_type_map['text'])
+        matrix = loaded_score_matrix()
+        if matrix is not None:
+            matrix.set_scores(png_file.name, {score_type_map['text']: len(content)})
 
 
 async def _save_hash_file(local_hashes):
@@ -231,6 +244,7 @@ async def update_local_hashes(folder_name):
 
     try:
         await save_simple_hashes(local_hashes, hash_file)
+        bump_folder_generation(Path(folder_path).name)
         await update_progress_auto(f"✅ {len(local_hashes)} Hashes gespeichert für {folder_name}")
     except Exception as e:
         await update_progress_auto(f"❌ Fehler beim Speichern der Hashes für {folder_name}: {e}")
@@ -1,71 +1,86 @@
+import asyncio
 from pathlib import Path
+from typing import Optional
 
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Request
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 
-from ..config import Settings  # Importiere die Settings-Klasse
-from ..dependencies import require_login
+from ..dependencies import require_media_access
+from ..services.media import IMMUTABLE
+from ..services.media import PRIVATE_IMMUTABLE
+from ..services.media import REVALIDATE
+from ..services.media import media_response
+from ..services.media import pack_response
+from ..services.media import resolve_image_file
+from ..services.pack_store import get_face_pack
+from ..services.pack_store import get_thumbnail_pack
+from ..services.renditions import get_rendition_store
+from ..services.renditions import parse_rendition_name
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
 router = APIRouter()
 
+THUMBNAIL_ROOT = Path("/app/thumbnails")
+IMAGE_ROOT = Path("/app/imagefiles")
+FACE_ROOT = Path("/app/facefiles")
+GIF_ROOT = Path("/app/comfyui_gif")
+
+
+def _media_file(root: Path, file_path: str) -> Path:
+    if ".." in Path(file_path).parts:
+        raise HTTPException(status_code=404)
+    return root / file_path
+
+
+def _serve(request: Request, path: Optional[Path], cache_control: str, etag: Optional[str] = None) -> Response:
+    response = media_response(request, path, cache_control, etag) if path is not None else None
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
+
 
 @router.get("/thumbnails/{file_path:path}")
 @router.get("/static/thumbnails/{file_path:path}")
 async def _thumbnails(file_path: str, request: Request):
-    file = Path("/app/thumbnails") / file_path
-    logger.info(f"🔍 Angeforderte Datei: {file}")
-    logger.info(f"📁 Existiert: {file.exists()}")
-    if file.exists() and file.is_file():
-        return FileResponse(file)
-    raise HTTPException(status_code=404)
+    """Thumbnails heißen '<md5>.png' und ändern sich nie: immutable. Zuerst aus dem Pack, sonst Einzeldatei."""
+    response = pack_response(request, get_thumbnail_pack(), file_path.removesuffix(".png"), "image/jpeg", IMMUTABLE)
+    return response or _serve(request, _media_file(THUMBNAIL_ROOT, file_path), IMMUTABLE, file_path)
 
 
-@router.get("/imagefiles/{file_path:path}")
-@router.get("/static/imagefiles/{file_path:path}")
-async def _imagefiles(file_path: str, request: Request, user: str = Depends(require_login)):
-    """Liefert eine Bilddatei. Wenn nicht vorhanden, wird anhand der Kategorien gesucht."""
-    base_path = Path("/app/imagefiles")
-    file = base_path / file_path
-
-    if file.exists() and file.is_file():
-        return FileResponse(file)
+@router.get("/renditions/{file_name}")
+@router.get("/static/renditions/{file_name}")
+async def _renditions(file_name: str, request: Request, user: str = Depends(require_media_access)):
+    """Liefert eine Rendition '<md5>_<größe>.<webp|jpg>'; fehlt sie, wird sie jetzt erzeugt."""
+    parsed = parse_rendition_name(file_name)
+    if parsed is None:
+        raise HTTPException(status_code=404)
+    path = await asyncio.to_thread(get_rendition_store().ensure, *parsed)
+    return _serve(request, path, PRIVATE_IMMUTABLE, file_name)
 
-    # Versuche alternative Pfade durch Ersetzen des Präfix
-    for eintrag in Settings.kategorien():
-        alt_key = eintrag["key"]
-        if file_path.startswith(alt_key + "/"):
-            rest = file_path[len(alt_key) + 1:]  # Restlicher Pfad ohne Präfix
-            for ersatz in [k["key"] for k in Settings.kategorien() if k["key"] != alt_key]:
-                alt_file = base_path / ersatz / rest
-                if alt_file.exists() and alt_file.is_file():
-                    return FileResponse(alt_file)
 
-    raise HTTPException(status_code=404)
+@router.get("/imagefiles/{file_path:path}")
+@router.get("/static/imagefiles/{file_path:path}")
+async def _imagefiles(file_path: str, request: Request, user: str = Depends(require_media_access)):
+    """Liefert eine Bilddatei. Wurde sie in eine andere Kategorie verschoben, wird sie dort geliefert."""
+    _media_file(IMAGE_ROOT, file_path)
+    return _serve(request, resolve_image_file(IMAGE_ROOT, file_path), REVALIDATE)
 
 
 @router.get("/facefiles/{file_path:path}")
 @router.get("/static/facefiles/{file_path:path}")
-async def _facefiles(file_path: str, request: Request, user: str = Depends(require_login)):
-    """Liefert eine Datei mit Gesichtsausschnitten."""
-    # decoded_file_path = unquote(file_path) # Entfernt
-    file = Path("/app/facefiles") / file_path  # Zurück zum Originalpfad
-    if file.exists() and file.is_file():
-        return FileResponse(file)
-    raise HTTPException(status_code=404)
+async def _facefiles(file_path: str, request: Request, user: str = Depends(require_media_access)):
+    """Liefert einen Gesichtsausschnitt '<md5>_<i>.jpg', zuerst aus dem Pack."""
+    response = pack_response(request, get_face_pack(), file_path.removesuffix(".jpg"), "image/jpeg", REVALIDATE)
+    return response or _serve(request, _media_file(FACE_ROOT, file_path), REVALIDATE)
 
 
 @router.get("/comfyui_gif/{file_path:path}")
 @router.get("/static/comfyui_gif/{file_path:path}")
-async def _comfyui_gif(file_path: str, request: Request, user: str = Depends(require_login)):
-    """Liefert eine Datei mit Gesichtsausschnitten."""
-    # decoded_file_path = unquote(file_path) # Entfernt
-    file = Path("/app/comfyui_gif") / file_path  # Zurück zum Originalpfad
-    if file.exists() and file.is_file():
-        return FileResponse(file)
-    raise HTTPException(status_code=404)
+async def _comfyui_gif(file_path: str, request: Request, user: str = Depends(require_media_access)):
+    """Liefert ein ComfyUI-GIF zu einem Bild."""
+    return _serve(request, _media_file(GIF_ROOT, file_path), REVALIDATE)
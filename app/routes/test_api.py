@@ -0,0 +1,202 @@
+import base64
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from ..config import Settings
+from ..database import init_db
+from ..dependencies import require_login
+from ..routes import api
+from ..routes.api import MAX_LIMIT
+from ..routes.api import decode_cursor
+from ..routes.api import encode_cursor
+from ..services.folder_index import bump_folder_generation
+from ..utils import compression
+from ..utils.compression import accepted_encodings
+from ..utils.compression import compressed_response
+from ..utils.status_utils import set_status
+
+COUNT = 12
+
+
+def _request(accept_encoding: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode("ascii"))]})
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old = (Settings.DB_PATH, Settings.IMAGE_FILE_CACHE_DIR, Settings.TEXT_FILE_CACHE_DIR,
+                     Settings.TEXT_INDEX_PATH)
+        Settings.DB_PATH = str(Path(self._tmp.name) / "gallery.db")
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        Settings.TEXT_FILE_CACHE_DIR = self._tmp.name
+        Settings.TEXT_INDEX_PATH = Path(self._tmp.name) / "text_index.db"
+        init_db(Settings.DB_PATH)
+        bump_folder_generation()
+
+        # Hash-Datei neueste zuerst, die mtime der Bilddateien ist das Aufnahmedatum im Katalog
+        self.folder = Path(self._tmp.name) / "real"
+        self.folder.mkdir()
+        self.names = [f"img{i:02d}.png" for i in range(COUNT)]
+        for i, name in enumerate(self.names):
+            (self.folder / name).write_bytes(b"png")
+            os.utime(self.folder / name, (1_000_000 - i * 10, 1_000_000 - i * 10))
+        self._write_hashes(self.names)
+
+        app = FastAPI()
+        app.include_router(api.router)
+        app.dependency_overrides[require_login] = lambda: "test"
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        bump_folder_generation()
+        (Settings.DB_PATH, Settings.IMAGE_FILE_CACHE_DIR, Settings.TEXT_FILE_CACHE_DIR,
+         Settings.TEXT_INDEX_PATH) = self._old
+        self._tmp.cleanup()
+
+    def _write_hashes(self, names):
+        hashes = {name: f"md5_{name}" for name in names}
+        (self.folder / Settings.GALLERY_HASH_FILE).write_text(json.dumps(hashes))
+
+    def _names(self, **params) -> list:
+        return [item["name"] for item in self.client.get("/api/images", params=params).json()["items"]]
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(5, "a.png")), (5, "a.png", None))
+        self.assertEqual(decode_cursor(encode_cursor(7, "b.png", 12.5)), (7, "b.png", 12.5))
+        self.assertNotIn("=", encode_cursor(1, "c.png"))
+
+    def test_garbage_cursor(self):
+        for cursor in ("", "!!!", "a", base64.urlsafe_b64encode(b"[1]").decode(),
+                       base64.urlsafe_b64encode(b'{"o":"x"}').decode()):
+            self.assertEqual(decode_cursor(cursor), (0, None, None), cursor)
+        negative = base64.urlsafe_b64encode(b'{"o":-4,"n":"a.png"}').decode()
+        self.assertEqual(decode_cursor(negative), (0, "a.png", None))
+
+        response = self.client.get("/api/images", params={"cursor": "!!!", "limit": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["start"], 0)
+
+    def test_cursor_pages_cover_folder(self):
+        names, cursor = [], None
+        while True:
+            params = {"limit": 5}
+            if cursor:
+                params["cursor"] = cursor
+            payload = self.client.get("/api/images", params=params).json()
+            names += [item["name"] for item in payload["items"]]
+            cursor = payload["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(names, self.names)
+
+    def test_cursor_stable_when_earlier_images_removed(self):
+        first = self.client.get("/api/images", params={"limit": 5}).json()
+        self.assertEqual([item["name"] for item in first["items"]], self.names[:5])
+        offset_cursor = encode_cursor(5, self.names[4])  # Cursor einer gefilterten Sicht, ohne Aufnahmedatum
+
+        self._write_hashes(self.names[3:])
+        self.assertEqual(self._names(cursor=first["next_cursor"], limit=5), self.names[5:10])
+        self.assertEqual(self._names(cursor=offset_cursor, limit=5), self.names[5:10])
+
+    def test_limit_and_page_bounds(self):
+        for params in ({"limit": 0}, {"limit": MAX_LIMIT + 1}, {"page": 0}):
+            self.assertEqual(self.client.get("/api/images", params=params).status_code, 422, params)
+        self.assertEqual(len(self._names(limit=MAX_LIMIT)), COUNT)
+
+        payload = self.client.get("/api/images", params={"page": 2, "limit": 5}).json()
+        self.assertEqual(payload["start"], 5)
+        self.assertEqual([item["name"] for item in payload["items"]], self.names[5:10])
+        self.assertIsNotNone(payload["next_cursor"])
+
+        payload = self.client.get("/api/images", params={"page": 3, "limit": 5}).json()
+        self.assertEqual([item["name"] for item in payload["items"]], self.names[10:])
+        self.assertIsNone(payload["next_cursor"])
+
+        payload = self.client.get("/api/images", params={"page": 9, "limit": 5}).json()
+        self.assertEqual((payload["items"], payload["next_cursor"], payload["total"]), ([], None, COUNT))
+
+    def test_page_from_catalog(self):
+        # img05 ist das neueste Bild: der Katalog sortiert anders als die Hash-Datei
+        os.utime(self.folder / "img05.png", (2_000_000, 2_000_000))
+        self._write_hashes(self.names)
+        bump_folder_generation("real")
+        catalog_order = ["img05.png"] + [name for name in self.names if name != "img05.png"]
+
+        first = self.client.get("/api/images", params={"limit": 5}).json()
+        page1 = self.client.get("/api/images", params={"page": 1, "limit": 5}).json()
+        self.assertEqual(page1["items"], first["items"])
+        self.assertEqual([item["name"] for item in page1["items"]], catalog_order[:5])
+        self.assertEqual(self._names(page=2, limit=5), self._names(cursor=first["next_cursor"], limit=5))
+        self.assertEqual(self._names(page=3, limit=5), catalog_order[10:])
+
+        # gefilterte Sicht (Checkbox): page zählt in der Reihenfolge der Hash-Datei
+        for name in ("img01.png", "img05.png", "img07.png", "img09.png"):
+            set_status(name, "delete")
+        self.assertEqual(self._names(page=1, limit=3, checkbox="delete"), ["img01.png", "img05.png", "img07.png"])
+        self.assertEqual(self._names(page=2, limit=3, checkbox="delete"), ["img09.png"])
+
+    def test_batch_missing(self):
+        response = self.client.post("/api/images/batch",
+                                    json={"image_ids": ["md5_img03.png", "unbekannt", "md5_img03.png"]})
+        payload = response.json()
+        self.assertEqual([item["name"] for item in payload["items"]], ["img03.png"])
+        self.assertEqual(payload["items"][0]["folder"], "real")
+        self.assertEqual(payload["missing"], ["unbekannt"])
+
+        too_many = {"image_ids": [f"md5_{i}" for i in range(MAX_LIMIT + 1)]}
+        self.assertEqual(self.client.post("/api/images/batch", json=too_many).status_code, 422)
+
+    def test_etag_and_304(self):
+        response = self.client.get("/api/images", params={"limit": 5})
+        etag = response.headers["etag"]
+        self.assertEqual(response.headers["cache-control"], "private, no-cache")
+
+        cached = self.client.get("/api/images", params={"limit": 5}, headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers["etag"], etag)
+
+        # andere Seite oder geänderter Status eines Bildes der Seite → neue Version
+        other = self.client.get("/api/images", params={"limit": 4}, headers={"If-None-Match": etag})
+        self.assertEqual(other.status_code, 200)
+        set_status(self.names[2], "delete")
+        changed = self.client.get("/api/images", params={"limit": 5}, headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertTrue(changed.json()["items"][2]["status"]["delete"])
+
+    def test_response_compression(self):
+        for encoding in ("br", "gzip"):
+            response = self.client.get("/api/images", headers={"Accept-Encoding": encoding})
+            self.assertEqual(response.headers["content-encoding"], encoding)
+            self.assertEqual(response.headers["vary"], "Accept-Encoding")
+            self.assertEqual(len(response.json()["items"]), COUNT)
+        response = self.client.get("/api/images", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(accepted_encodings(_request("gzip, br;q=0.5, deflate")), {"gzip", "br", "deflate"})
+        self.assertEqual(accepted_encodings(_request("br;q=0, GZIP;q=1")), {"gzip"})
+        self.assertEqual(accepted_encodings(_request("")), set())
+
+        body = b"x" * compression.MIN_SIZE
+        self.assertEqual(compressed_response(_request("gzip, br"), body, "text/plain").headers["content-encoding"],
+                         "br" if compression.brotli is not None else "gzip")
+        response = compressed_response(_request("br;q=0, gzip"), body, "text/plain")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.body), body)
+        small = compressed_response(_request("gzip"), body[:-1], "text/plain")
+        self.assertNotIn("content-encoding", small.headers)
+        self.assertEqual(small.body, body[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
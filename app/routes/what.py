@@ -10,6 +10,9 @@ from fastapi.templating import Jinja2Templates
 from starlette.responses import JSONResponse
 
 from ..config import Settings
+from ..services.fragment_store import get_fragment_store
+from ..services.pack_store import get_face_pack
+from ..services.pack_store import get_thumbnail_pack
 from ..utils.score_utils import delete_scores_by_type
 
 router = APIRouter()
@@ -68,9 +71,18 @@ async def confirm_what(request: Request):
 async def remove_items(dir, name):
     if name == "faces":
         delete_scores_by_type(3)
+        get_face_pack().clear()
+
+    if name == "thumbnail":
+        get_thumbnail_pack().clear()
+
+    if name == "rendered":
+        get_fragment_store().clear()
 
     if dir.exists() and dir.is_dir():
         for item in dir.iterdir():
+            if name == "rendered" and item.name.startswith(Settings.RENDERED_HTML_STORE):
+                continue
             try:
                 if item.is_dir():
                     shutil.rmtree(item)
@@ -4,6 +4,7 @@ import cv2
 
 from ..config import Settings
 from ..routes.what import remove_items
+from ..services.pack_store import get_face_pack
 from ..tools import readimages, dict2md5
 from ..utils.db_utils import load_face_from_db
 from ..utils.db_utils import save_quality_scores
@@ -25,10 +26,11 @@ mapping = {
 reverse_mapping = {v: k for k, v in mapping.items()}
 
 
-def generate_faces(db_path, folder_key, image_name, image_id, min_size=(50, 50)):
+def generate_faces(db_path, folder_key, image_name, image_id, min_size=(50, 50), rows: list | None = None):
     from ..config import Settings
 
-    rows = load_face_from_db(db_path, image_id)
+    if rows is None:
+        rows = load_face_from_db(db_path, image_id)
 
     scores = {score_type: score for score_type, score in rows}
     if set(range(5)).issubset(scores):
@@ -56,15 +58,19 @@ def generate_faces(db_path, folder_key, image_name, image_id, min_size=(50, 50))
 
     if len(faces) > 0:
         logger.info(f"[gen_faces] {len(faces)} Gesichter erkannt in {image_name}")
+        crops = []
         for i, (x, y, w, h) in enumerate(faces):
-            face_img = img[y:y + h, x:x + w]
-            face_filename = f'/app/facefiles/{image_id}_{i}.jpg'  # Zielpfad für Gesichtsausschnitt
-            try:
-                cv2.imwrite(face_filename, face_img)
-                logger.info(f"[gen_faces] Gesichtsausschnitt gespeichert: {face_filename}")
-            except Exception as e:
-                logger.error(f"[gen_faces] Fehler beim Speichern des Gesichtsausschnitts: {face_filename} - {e}")
+            ok, encoded = cv2.imencode(".jpg", img[y:y + h, x:x + w])
+            if not ok:
+                logger.error(f"[gen_faces] Fehler beim Kodieren des Gesichtsausschnitts {image_id}_{i}")
                 return False
+            crops.append((f"{image_id}_{i}", encoded.tobytes()))
+        try:
+            get_face_pack().put_many(crops)  # Gesichtsausschnitte '<md5>_<i>' im Pack
+            logger.info(f"[gen_faces] {len(crops)} Gesichtsausschnitte gespeichert: {image_id}")
+        except Exception as e:
+            logger.error(f"[gen_faces] Fehler beim Speichern der Gesichtsausschnitte: {image_id} - {e}")
+            return False
         save(db_path, image_id, scores)
         return True
     else:
@@ -73,23 +79,26 @@ def generate_faces(db_path, folder_key, image_name, image_id, min_size=(50, 50))
         return False
 
 
-def load_faces(db_path, folder_key: str, image_name: str, image_id: object) -> list[dict]:
+def load_faces(db_path, folder_key: str, image_name: str, image_id: object, rows: list | None = None) -> list[dict]:
     image_id = dict2md5(image_id)
 
     logger.info(f"🔍 Starte load_faces() für {image_name} {image_id}")
 
-    generate_faces(db_path, folder_key, image_name, image_id)
+    generate_faces(db_path, folder_key, image_name, image_id, rows=rows)
 
     base_url = "/static/facefiles"
     face_dir = Path(Settings.GESICHTER_FILE_CACHE_DIR)
-    thumbs = sorted(face_dir.glob(f"{image_id}_*.jpg"))
+    # Pack plus noch nicht übernommene Einzeldateien
+    names = {f"{key}.jpg" for key in get_face_pack().keys_with_prefix(f"{image_id}_")}
+    names.update(file.name for file in face_dir.glob(f"{image_id}_*.jpg"))
+    thumbs = sorted(names)
     if thumbs:
         logger.info(f"[load_faces] ✅ {len(thumbs)} gefunden")
     return [
         {
-            "src": f"/gallery{base_url}/{thumb.name}",
-            "link": f"/gallery{base_url}/{thumb.name}",
-            "image_name": f"/gallery/static/facefiles/{thumb.name}"
+            "src": f"/gallery{base_url}/{thumb}",
+            "link": f"/gallery{base_url}/{thumb}",
+            "image_name": f"/gallery/static/facefiles/{thumb}"
         }
         for thumb in thumbs
     ]
@@ -18,9 +18,10 @@ logger = setup_logger(__name__)
 NSFW_SERVICE_URL = "http://nsfw-service:8000/check-nsfw-path/"
 
 
-def load_nsfw(db_path, folder_name: str | Path, image_name: str) -> dict[str, float] | None:
+def load_nsfw(db_path, folder_name: str | Path, image_name: str, rows: list | None = None) -> dict[str, float] | None:
     try:
-        rows = load_nsfw_from_db(db_path, image_name)
+        if rows is None:
+            rows = load_nsfw_from_db(db_path, image_name)
 
         scores = {score_type: score for score_type, score in rows}
         if set(range(10, 15)).issubset(scores):
@@ -31,10 +31,14 @@ mapping = {
 reverse_mapping = {v: k for k, v in mapping.items()}
 
 
-def load_quality(db_path, image_file_path, folder_name: str, image_name: str):
-    """Lädt die Qualitätsbewertung (0–100) eines Bildes aus der neuen Tabelle image_quality_scores."""
+def load_quality(db_path, image_file_path, folder_name: str, image_name: str, rows: list | None = None):
+    """
+    Lädt die Qualitätsbewertung (0–100) eines Bildes aus der neuen Tabelle image_quality_scores.
+    rows kann bereits vorab geladen sein (load_page_data), dann entfällt die DB-Abfrage.
+    """
     try:
-        rows = load_quality_from_db(db_path, image_name)
+        if rows is None:
+            rows = load_quality_from_db(db_path, image_name)
 
         scores = {score_type: score for score_type, score in rows}
         if set(range(1, 2)).issubset(scores):
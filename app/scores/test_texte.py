@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ..config import Settings
+from ..scores.texte import search_etag_state
+from ..scores.texte import search_texts
+from ..services.text_index import TextIndex
+from ..services.text_index import get_text_index
+
+
+class TestSearchTexts(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_index = Settings.TEXT_INDEX_PATH
+        self._old_backend = Settings.TEXT_SEARCH_BACKEND
+        Settings.TEXT_INDEX_PATH = Path(self._tmp.name) / "text_index.db"
+        Settings.TEXT_SEARCH_BACKEND = "fts"
+        self.text_dir = Path(self._tmp.name) / "textfiles"
+        self.text_dir.mkdir()
+        (self.text_dir / "A.png.txt").write_text("Ein roter Leuchtturm", encoding="utf-8")
+        (self.text_dir / "b.png.txt").write_text("Roter Apfel", encoding="utf-8")
+        get_text_index().sync(self.text_dir)
+
+    def tearDown(self):
+        Settings.TEXT_INDEX_PATH = self._old_index
+        Settings.TEXT_SEARCH_BACKEND = self._old_backend
+        self._tmp.cleanup()
+
+    def test_cached_per_generation(self):
+        with patch.object(TextIndex, "search", wraps=get_text_index().search) as search:
+            self.assertEqual(search_texts("roter"), frozenset({"a.png", "b.png"}))
+            for _ in range(50):
+                search_texts("Roter")
+            self.assertEqual(search.call_count, 1)
+
+            state = search_etag_state("roter")
+            (self.text_dir / "c.png.txt").write_text("roter Hahn", encoding="utf-8")
+            get_text_index().update_file(self.text_dir / "c.png.txt")
+            self.assertNotEqual(search_etag_state("roter"), state)
+            self.assertIn("c.png", search_texts("roter"))
+            self.assertEqual(search.call_count, 2)
+
+    def test_etag_state(self):
+        self.assertEqual(search_etag_state(None), ())
+        Settings.TEXT_SEARCH_BACKEND = "recoll"
+        self.assertIsNone(search_etag_state("roter"))
+
+
+if __name__ == '__main__':
+    unittest.main()
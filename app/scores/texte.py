@@ -1,10 +1,14 @@
 import asyncio
-import subprocess
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
+from typing import Optional
 
 from ..config import Settings
 from ..config_gdrive import SettingsGdrive
+from ..services.text_index import get_text_index
 from ..utils.find_missing_text_files import move_images_without_textfile_2_recheck
 
 # Type-Hint für IDE und Fallback-Import
@@ -21,6 +25,9 @@ from ..utils.progress import init_progress_state, stop_progress
 
 logger = setup_logger(__name__)
 
+_LOCK = threading.Lock()
+_SEARCH_RESULTS: "OrderedDict[tuple, frozenset]" = OrderedDict()
+
 
 async def reload_texte():
     await init_progress_state()
@@ -31,19 +38,77 @@ async def reload_texte():
         await stop_progress()
 
 
+def search_key(query: str) -> Optional[tuple]:
+    """
+    Version der Suchergebnisse: Backend, Suchtext und Generation des FTS-Index.
+    recoll indiziert extern, dort gilt ein Ergebnis nur TEXT_SEARCH_RECOLL_TTL Sekunden.
+    """
+    if not query:
+        return None
+    if Settings.TEXT_SEARCH_BACKEND == "recoll":
+        return "recoll", query.strip().lower(), int(time.time() // Settings.TEXT_SEARCH_RECOLL_TTL)
+    return "fts", query.strip().lower(), get_text_index().generation
+
+
+def search_etag_state(query: Optional[str]) -> Optional[tuple]:
+    """Zustand der Textsuche für ETags; None, wenn sich das Ergebnis nicht versionieren lässt (recoll)."""
+    if not query:
+        return ()
+    key = search_key(query)
+    return None if key[0] == "recoll" else key
+
+
+def _cached_search(key: tuple) -> Optional[frozenset]:
+    with _LOCK:
+        names = _SEARCH_RESULTS.get(key)
+        if names is not None:
+            _SEARCH_RESULTS.move_to_end(key)
+        return names
+
+
+def _remember_search(key: tuple, names: frozenset) -> None:
+    if not Settings.in_process_caches():
+        return  # Index-Generation ist prozesslokal
+    with _LOCK:
+        _SEARCH_RESULTS[key] = names
+        _SEARCH_RESULTS.move_to_end(key)
+        while len(_SEARCH_RESULTS) > Settings.TEXT_SEARCH_CACHE_SIZE:
+            _SEARCH_RESULTS.popitem(last=False)
+
+
+def search_texts(query: str) -> frozenset:
+    """
+    Volltextsuche über die Textdateien → Menge der Bildnamen (lowercase).
+    Standard ist der FTS5-Index; recollq nur bei TEXT_SEARCH_BACKEND = "recoll".
+    Ergebnisse werden pro (Suchtext, Index-Generation) gemerkt, Blättern sucht nicht erneut.
+    """
+    key = search_key(query)
+    names = _cached_search(key)
+    if names is None:
+        if key[0] == "recoll":
+            names = frozenset(name.lower() for name in asyncio.run(search_recoll(query)))
+        else:
+            names = frozenset(get_text_index().search(query))
+        _remember_search(key, names)
+        logger.info(f"[search_texts] 🔎 '{query}': {len(names)} Treffer ({key[0]})")
+    return names
+
+
 async def search_recoll(query: str) -> list:
     config_dir: str = Settings.RECOLL_CONFIG_DIR
 
     try:
-        cmd = ["recollq", "-c", config_dir, query]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        process = await asyncio.create_subprocess_exec(
+            "recollq", "-c", config_dir, query,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await process.communicate()
 
-        if result.returncode != 0:
-            logger.info(f"Fehler bei der Suche: {result.stderr}")
+        if process.returncode != 0:
+            logger.info(f"Fehler bei der Suche: {stderr.decode(errors='replace')}")
             return []
 
         # Ergebnisse nach Zeilen aufteilen und leere Zeilen entfernen
-        results = [line.strip() for line in result.stdout.split('\n') if line.strip()]
+        results = [line.strip() for line in stdout.decode(errors='replace').split('\n') if line.strip()]
 
         # Die erste Zeile (Anzahl der Ergebnisse) überspringen
         results = results[1:]
@@ -79,7 +144,7 @@ def p4():
     Settings.RECOLL_CONFIG_DIR = "../../cache/recoll_config"
 
     # Fix: Properly run the async function and store its result
-    erg = asyncio.run(search_recoll("keine Verbesserung"))
+    erg = search_texts("keine Verbesserung")
     logger.info(erg)
 
 
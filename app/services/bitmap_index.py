@@ -0,0 +1,265 @@
+import sqlite3
+import threading
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from ..config import Settings
+from ..config import score_type_map
+from ..services.folder_index import get_folder_index
+from ..services.score_matrix import MISSING
+from ..services.score_matrix import get_score_matrix
+from ..services.shared_versions import CHECKBOXES
+from ..services.shared_versions import bump_shared_version
+from ..services.shared_versions import shared_version
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+WORD_BITS = 64
+INITIAL_WORDS = 256  # 16384 Bilder
+SCORE_BUCKET_WIDTH = 10
+
+_LOCK = threading.Lock()
+_INDEX: Optional["BitmapIndex"] = None
+
+
+def popcount(bitmap: np.ndarray) -> int:
+    return int(np.bitwise_count(bitmap).sum())
+
+
+def bitmap_and(*bitmaps: np.ndarray) -> np.ndarray:
+    result = bitmaps[0].copy()
+    for bitmap in bitmaps[1:]:
+        result &= bitmap
+    return result
+
+
+def bitmap_or(*bitmaps: np.ndarray) -> np.ndarray:
+    result = bitmaps[0].copy()
+    for bitmap in bitmaps[1:]:
+        result |= bitmap
+    return result
+
+
+def _set_bits(bitmap: np.ndarray, ordinals: np.ndarray) -> None:
+    if len(ordinals):
+        np.bitwise_or.at(bitmap, ordinals >> 6, np.left_shift(np.uint64(1), (ordinals & 63).astype(np.uint64)))
+
+
+class BitmapIndex:
+    """
+    Bitsets (uint64-Wörter) über eine globale Bild-Ordinalzahl.
+
+    Schlüssel:
+        ("folder", kategorie)        – Bild liegt in der Kategorie (aus dem FolderIndex)
+        ("checkbox", checkbox)       – checkbox_status.checked = 1
+        ("score", key, bucket)       – Score in [bucket * SCORE_BUCKET_WIDTH, (bucket + 1) * SCORE_BUCKET_WIDTH)
+
+    Kombinierte Filter sind bitweises UND/ODER, Anzahlen ein popcount.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ordinals: Dict[str, int] = {}
+        self.words = INITIAL_WORDS
+        self.bitmaps: Dict[tuple, np.ndarray] = {}
+        self._folder_keys: Dict[str, tuple] = {}  # kategorie -> (generation, stamp) des FolderIndex
+        self._score_versions: Dict[str, int] = {}  # score-key -> ScoreMatrix.version
+        self.shared_version = 0  # Stand von shared_versions[CHECKBOXES], den die Checkbox-Bitsets enthalten
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # --- Ordinalzahlen ---------------------------------------------------
+
+    def _ordinal(self, image_name: str) -> int:
+        ordinal = self.ordinals.get(image_name)
+        if ordinal is None:
+            ordinal = len(self.names)
+            if ordinal >= self.words * WORD_BITS:
+                self._grow(self.words * 2)
+            self.names.append(image_name)
+            self.ordinals[image_name] = ordinal
+        return ordinal
+
+    def _grow(self, words: int) -> None:
+        for key, bitmap in self.bitmaps.items():
+            grown = np.zeros(words, dtype=np.uint64)
+            grown[:len(bitmap)] = bitmap
+            self.bitmaps[key] = grown
+        self.words = words
+
+    def _bitmap(self, key: tuple) -> np.ndarray:
+        bitmap = self.bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self.bitmaps[key] = np.zeros(self.words, dtype=np.uint64)
+        return bitmap
+
+    def _set(self, key: tuple, image_name: str, value: bool) -> None:
+        ordinal = self._ordinal(image_name.lower())
+        bitmap = self._bitmap(key)
+        bit = np.uint64(1) << np.uint64(ordinal & 63)
+        if value:
+            bitmap[ordinal >> 6] |= bit
+        else:
+            bitmap[ordinal >> 6] &= ~bit
+
+    def _fill(self, key: tuple, names: Iterable[str]) -> np.ndarray:
+        ordinals = np.fromiter((self._ordinal(name.lower()) for name in names), dtype=np.int64)
+        bitmap = self.bitmaps[key] = np.zeros(self.words, dtype=np.uint64)
+        _set_bits(bitmap, ordinals)
+        return bitmap
+
+    # --- Kategorien ------------------------------------------------------
+
+    def folder(self, folder_name: str) -> np.ndarray:
+        """Bitset einer Kategorie; wird nur neu aufgebaut, wenn sich der FolderIndex geändert hat."""
+        index = get_folder_index(folder_name)
+        with self._lock:
+            key = ("folder", folder_name)
+            if self._folder_keys.get(folder_name) != (index.generation, index.stamp) or key not in self.bitmaps:
+                self._fill(key, index.names)
+                self._folder_keys[folder_name] = (index.generation, index.stamp)
+            return self.bitmaps[key]
+
+    def move_image(self, image_name: str, old_folder: str, new_folder: str) -> None:
+        """Verschiebt ein Bild zwischen den Kategorie-Bitsets, ohne sie neu aufzubauen."""
+        with self._lock:
+            self._set(("folder", old_folder), image_name, False)
+            self._set(("folder", new_folder), image_name, True)
+        for folder_name in (old_folder, new_folder):
+            if folder_name in self._folder_keys:
+                index = get_folder_index(folder_name)
+                self._folder_keys[folder_name] = (index.generation, index.stamp)
+
+    # --- Checkboxen ------------------------------------------------------
+
+    def load_checkboxes(self, rows) -> None:
+        """rows: (image_name, checkbox) mit checked = 1"""
+        by_checkbox: Dict[str, List[str]] = {}
+        for image_name, checkbox in rows:
+            by_checkbox.setdefault(checkbox, []).append(image_name)
+        with self._lock:
+            for checkbox, names in by_checkbox.items():
+                self._fill(("checkbox", checkbox), names)
+
+    def checkbox(self, checkbox: str) -> np.ndarray:
+        with self._lock:
+            return self._bitmap(("checkbox", checkbox))
+
+    def set_checkbox(self, image_name: str, checkbox: str, checked: bool) -> None:
+        with self._lock:
+            self._set(("checkbox", checkbox), image_name, checked)
+
+    def clear_checkboxes(self, image_name: Optional[str] = None) -> None:
+        """Löscht alle Checkbox-Bits eines Bildes (oder aller Bilder, wenn None)."""
+        with self._lock:
+            for key in [key for key in self.bitmaps if key[0] == "checkbox"]:
+                if image_name is None:
+                    self.bitmaps[key][:] = 0
+                else:
+                    self._set(key, image_name, False)
+
+    # --- Score-Buckets ---------------------------------------------------
+
+    def score_range(self, score_key: str, low: int, high: int) -> np.ndarray:
+        """Bilder mit low <= Score < high, auf Bucket-Grenzen gerundet (ODER über die Buckets)."""
+        self._build_score_buckets(score_key)
+        with self._lock:
+            buckets = [self._bitmap(("score", score_key, bucket))
+                       for bucket in range(low // SCORE_BUCKET_WIDTH, -(-high // SCORE_BUCKET_WIDTH))]
+            return bitmap_or(*buckets) if buckets else np.zeros(self.words, dtype=np.uint64)
+
+    def _build_score_buckets(self, score_key: str) -> None:
+        matrix = get_score_matrix()
+        if self._score_versions.get(score_key) == matrix.version:
+            return
+        names, values, version = matrix.column(score_type_map[score_key])
+        present = values != MISSING
+        buckets = values // SCORE_BUCKET_WIDTH
+        with self._lock:
+            ordinals = np.fromiter((self._ordinal(name) for name in names), dtype=np.int64, count=len(names))
+            for key in [key for key in self.bitmaps if key[:2] == ("score", score_key)]:
+                del self.bitmaps[key]
+            for bucket in np.unique(buckets[present]):
+                bitmap = self._bitmap(("score", score_key, int(bucket)))
+                _set_bits(bitmap, ordinals[present & (buckets == bucket)])
+            self._score_versions[score_key] = version
+
+    # --- Abfragen --------------------------------------------------------
+
+    def query(self, folder_name: Optional[str] = None, checkboxes: Iterable[str] = (),
+              score_ranges: Optional[Dict[str, Tuple[int, int]]] = None) -> np.ndarray:
+        """UND über Kategorie, Checkboxen und Score-Bereiche."""
+        parts = []
+        if folder_name:
+            parts.append(self.folder(folder_name))
+        parts.extend(self.checkbox(checkbox) for checkbox in checkboxes)
+        for score_key, (low, high) in (score_ranges or {}).items():
+            parts.append(self.score_range(score_key, low, high))
+        with self._lock:
+            if not parts:
+                return np.zeros(self.words, dtype=np.uint64)
+            width = self.words
+            return bitmap_and(*[np.pad(part, (0, width - len(part))) for part in parts])
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return popcount(bitmap)
+
+    def names_of(self, bitmap: np.ndarray) -> List[str]:
+        bits = np.unpackbits(bitmap.astype("<u8").view(np.uint8), bitorder="little")
+        with self._lock:
+            names = self.names
+            return [names[ordinal] for ordinal in np.flatnonzero(bits) if ordinal < len(names)]
+
+
+def load_bitmap_index(db_path: str) -> BitmapIndex:
+    index = BitmapIndex()
+    with sqlite3.connect(db_path) as conn:
+        index.load_checkboxes(conn.execute("SELECT image_name, checkbox FROM checkbox_status WHERE checked = 1"))
+    logger.info(f"[bitmap_index] 🧮 Index geladen: {len(index)} Bilder, {len(index.bitmaps)} Checkbox-Bitsets")
+    return index
+
+
+def get_bitmap_index() -> BitmapIndex:
+    """Der Index dieses Prozesses; neu geladen, wenn ein anderer Worker Checkboxen geschrieben hat."""
+    global _INDEX
+    current = shared_version(CHECKBOXES)
+    if _INDEX is None or _INDEX.shared_version != current:
+        with _LOCK:
+            if _INDEX is None or _INDEX.shared_version != current:
+                if _INDEX is not None:
+                    logger.info(f"[get_bitmap_index] 🔄 Checkboxen von anderem Prozess geändert ({_INDEX.shared_version} → {current})")
+                index = load_bitmap_index(Settings.DB_PATH)
+                index.shared_version = current
+                _INDEX = index
+    return _INDEX
+
+
+def checkboxes_written() -> None:
+    """
+    Nach jedem Checkbox-Schreibzugriff: erhöht den gemeinsamen Zähler. Der eigene Index wird
+    vom Aufrufer inkrementell nachgeführt und bleibt gültig, solange kein anderer Prozess
+    dazwischen geschrieben hat.
+    """
+    current = bump_shared_version(CHECKBOXES)
+    index = _INDEX
+    if index is not None and index.shared_version == current - 1:
+        index.shared_version = current
+
+
+def loaded_bitmap_index() -> Optional[BitmapIndex]:
+    """Der Index, falls schon geladen – für inkrementelle Updates ohne Nachladen."""
+    return _INDEX
+
+
+def reset_bitmap_index() -> None:
+    global _INDEX
+    with _LOCK:
+        _INDEX = None
@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..services.folder_index import get_folder_index
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_COLUMNS = "name, md5, folder, capture_ts, size"
+
+_LOCK = threading.Lock()
+# Kategorie -> (generation, stamp) des FolderIndex beim letzten sync_catalog
+_SYNCED: Dict[str, tuple] = {}
+
+
+class CatalogEntry(NamedTuple):
+    name: str
+    md5: str
+    folder: str
+    capture_ts: float  # Aufnahmedatum (EXIF, sonst mtime) als Unix-Zeit
+    size: int
+
+
+def upsert_catalog(entries: Iterable[CatalogEntry]) -> int:
+    rows = [(entry.name.lower(), entry.md5, entry.folder, entry.capture_ts, entry.size) for entry in entries]
+    if not rows:
+        return 0
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        conn.executemany(f"INSERT OR REPLACE INTO image_catalog ({_COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def remove_from_catalog(names: Iterable[str]) -> None:
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        conn.executemany("DELETE FROM image_catalog WHERE name = ?", [(name.lower(),) for name in names])
+
+
+def move_in_catalog(name: str, folder: str) -> None:
+    """Neue Kategorie eines Bildes; Aufnahmedatum und damit die Position bleiben erhalten."""
+    try:
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.execute("UPDATE image_catalog SET folder = ? WHERE name = ?", (folder, name.lower()))
+    except sqlite3.Error as e:
+        logger.warning(f"[move_in_catalog] ⚠️ {name} → {folder}: {e}")
+
+
+def catalog_count(folder: str) -> int:
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        return conn.execute("SELECT COUNT(*) FROM image_catalog WHERE folder = ?", (folder,)).fetchone()[0]
+
+
+def catalog_page(folder: str, after: Optional[Tuple[float, str]], limit: int, offset: int = 0) -> List[CatalogEntry]:
+    """
+    Bis zu limit Bilder einer Kategorie, neueste zuerst, bei gleichem Datum nach Name.
+    after ist (capture_ts, name) des letzten Bildes der vorigen Seite; die Kosten hängen
+    nicht von der Seitentiefe ab, und neu hinzugekommene Bilder verschieben keine Cursor.
+    offset überspringt Bilder (für page=N ohne Cursor) und kostet linear in der Tiefe.
+    """
+    sql = f"SELECT {_COLUMNS} FROM image_catalog WHERE folder = ?"
+    params: list = [folder]
+    if after is not None:
+        sql += " AND (capture_ts < ? OR (capture_ts = ? AND name > ?))"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY capture_ts DESC, name LIMIT ? OFFSET ?"
+    params += [limit, offset]
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        return [CatalogEntry(*row) for row in conn.execute(sql, params)]
+
+
+def sync_catalog(folder_name: str) -> Tuple[int, int]:
+    """
+    Gleicht den Katalog einer Kategorie mit ihrer Hash-Datei ab. Neue Bilder bekommen die mtime
+    der Bilddatei als Aufnahmedatum (download_text_file setzt sie auf das EXIF-Datum).
+    Liefert (hinzugefügt oder verschoben, entfernt).
+    """
+    index = get_folder_index(folder_name)
+    synced_key = (index.generation, index.stamp)
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        known = {name: (md5, folder) for name, md5, folder in conn.execute("SELECT name, md5, folder FROM image_catalog")}
+
+    folder_path = Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_name
+    added, moved = [], []
+    for name, md5 in zip(index.names, index.image_ids):
+        entry = known.get(name)
+        if entry == (md5, folder_name):
+            continue
+        if entry is not None and entry[0] == md5:
+            moved.append((folder_name, name))  # anderswo verschoben: Aufnahmedatum behalten
+            continue
+        try:
+            stat = (folder_path / name).stat()
+            capture_ts, size = stat.st_mtime, stat.st_size
+        except OSError:
+            capture_ts, size = 0.0, 0
+        added.append(CatalogEntry(name, md5, folder_name, capture_ts, size))
+    removed = [name for name, (_, folder) in known.items() if folder == folder_name and name not in index]
+
+    if moved:
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.executemany("UPDATE image_catalog SET folder = ? WHERE name = ?", moved)
+    upsert_catalog(added)
+    remove_from_catalog(removed)
+    with _LOCK:
+        _SYNCED[folder_name] = synced_key
+    if added or moved or removed:
+        logger.info(f"[catalog] 🔄 {folder_name}: {len(added)} hinzugefügt, {len(moved)} verschoben, "
+                    f"{len(removed)} entfernt")
+    return len(added) + len(moved), len(removed)
+
+
+def sync_catalog_if_changed(folder_name: str) -> None:
+    """
+    Gleicht den Katalog nur ab, wenn sich der FolderIndex seit dem letzten sync_catalog geändert hat
+    (gleiche Anzahl heißt nicht gleiche Bilder). Danach passt er zum aktuellen Index.
+    """
+    index = get_folder_index(folder_name)
+    if _SYNCED.get(folder_name) != (index.generation, index.stamp):
+        sync_catalog(folder_name)
+
+
+def sync_all_catalogs() -> None:
+    for kategorie in Settings.kategorien():
+        try:
+            sync_catalog(kategorie["key"])
+        except sqlite3.Error as e:
+            logger.error(f"[catalog] ❌ Sync {kategorie['key']} fehlgeschlagen: {e}")
@@ -0,0 +1,227 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import httpx
+
+from ..config import Settings
+from ..database import civitai_links
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_RESOLVER: Optional["CivitaiResolver"] = None
+_TABLE_READY: set = set()
+
+# image_name -> (url, expires_at); spiegelt die Tabelle civitai_links
+_MEMORY: Dict[str, Tuple[Optional[str], float]] = {}
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(Settings.DB_PATH)
+    if Settings.DB_PATH not in _TABLE_READY:
+        civitai_links(conn)
+        _TABLE_READY.add(Settings.DB_PATH)
+    return conn
+
+
+def get_cached_civitai_url(image_name: str) -> Tuple[bool, Optional[str]]:
+    """
+    Liefert (bekannt, url). bekannt ist False, wenn noch nie geprüft wurde oder das
+    Ergebnis abgelaufen ist; url ist None für negative Ergebnisse.
+    """
+    now = time.time()
+    cached = _MEMORY.get(image_name)
+    if cached is None:
+        try:
+            with _connect() as conn:
+                row = conn.execute(
+                    "SELECT url, expires_at FROM civitai_links WHERE image_name = ?",
+                    (image_name,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"[civitai] ❌ Fehler beim Lesen von {image_name}: {e}")
+            return False, None
+        if row is None:
+            return False, None
+        cached = (row[0], row[1] or 0)
+        _MEMORY[image_name] = cached
+
+    url, expires_at = cached
+    return expires_at > now, url
+
+
+def store_civitai_url(image_name: str, url: Optional[str], ttl: float) -> None:
+    expires_at = time.time() + ttl
+    _MEMORY[image_name] = (url, expires_at)
+    try:
+        with _connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO civitai_links (image_name, url, expires_at)
+                VALUES (?, ?, ?)
+            """, (image_name, url, expires_at))
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"[civitai] ❌ Fehler beim Speichern von {image_name}: {e}")
+
+
+class CivitaiResolver:
+    """
+    Löst Civitai-Links im Hintergrund auf: eigener Thread mit Event-Loop,
+    ein httpx.AsyncClient mit Connection-Pool und begrenzter Parallelität.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            max_concurrency: int = 4,
+            timeout: float = 4.0,
+            on_changed: Optional[Callable[[str, Optional[str]], None]] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.on_changed = on_changed
+
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._started = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="civitai-resolver", daemon=True)
+                self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency)
+        )
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._client.aclose())
+            self._loop.close()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            thread.join(timeout=5)
+            self._started.clear()
+
+    def submit(self, image_name: str, image_id: Optional[str] = None) -> bool:
+        """Stellt ein Bild zur Auflösung ein. False, wenn es bereits in Arbeit ist."""
+        with self._lock:
+            if image_name in self._pending:
+                return False
+            self._pending.add(image_name)
+        self.start()
+        asyncio.run_coroutine_threadsafe(self._resolve(image_name, image_id), self._loop)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while self.pending() and time.time() < deadline:
+            time.sleep(0.02)
+        return not self.pending()
+
+    async def fetch(self, image_name: str) -> Tuple[Optional[str], float]:
+        """Prüft ein Bild auf Civitai und liefert (url, ttl)."""
+        base = image_name.split('.')[0]
+        url = f"{self.base_url}/{base}"
+        try:
+            # HEAD liefert keinen HTML-Body → wir brauchen GET
+            response = await self._client.get(url)
+        except Exception as e:
+            logger.info(f"[civitai] ⚠️ Fehler bei {url}: {e}")
+            return None, Settings.CIVITAI_TTL_ERROR
+
+        if response.status_code >= 500 or response.status_code == 429:
+            return None, Settings.CIVITAI_TTL_ERROR
+        if response.status_code != 200:
+            return None, Settings.CIVITAI_TTL_MISSING
+
+        # HTML muss den Namen enthalten
+        if base in (response.text or ""):
+            return url, Settings.CIVITAI_TTL_FOUND
+        return None, Settings.CIVITAI_TTL_MISSING
+
+    async def _resolve(self, image_name: str, image_id: Optional[str]) -> None:
+        try:
+            async with self._semaphore:
+                url, ttl = await self.fetch(image_name)
+            # DB-Zugriff und Invalidierung blockieren, daher außerhalb des Event-Loops
+            await asyncio.to_thread(self._store, image_name, image_id, url, ttl)
+        except Exception as e:
+            logger.error(f"[civitai] ❌ Fehler bei der Auflösung von {image_name}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(image_name)
+
+    def _store(self, image_name: str, image_id: Optional[str], url: Optional[str], ttl: float) -> None:
+        _, previous = get_cached_civitai_url(image_name)
+        store_civitai_url(image_name, url, ttl)
+        if url != previous:
+            logger.info(f"[civitai] ✅ Link geändert: {image_name} → {url}")
+            if self.on_changed:
+                self.on_changed(image_name, image_id)
+
+
+def _invalidate_fragment(image_name: str, image_id: Optional[str]) -> None:
+    """Gerendertes HTML des Bildes verwerfen, damit der neue Link beim nächsten Aufruf erscheint."""
+    from ..services.image_processing import delete_rendered_html_file
+
+    if image_id:
+        delete_rendered_html_file(image_id)
+
+
+def get_resolver() -> CivitaiResolver:
+    global _RESOLVER
+    with _LOCK:
+        if _RESOLVER is None:
+            _RESOLVER = CivitaiResolver(
+                Settings.CIVITAI_BASE_URL,
+                max_concurrency=Settings.CIVITAI_MAX_CONCURRENCY,
+                timeout=Settings.CIVITAI_TIMEOUT,
+                on_changed=_invalidate_fragment
+            )
+        return _RESOLVER
+
+
+def settle_civitai_url(image_name: str, image_id: Optional[str], rendered_url: Optional[str]) -> None:
+    """
+    Nach dem Speichern eines Fragments mit rendered_url aufrufen: unbekannte oder abgelaufene
+    Links werden erst jetzt im Hintergrund aufgelöst, damit die Invalidierung des Resolvers
+    nie vor dem Speichern läuft. Hat sich der Link inzwischen geändert (paralleles Rendern,
+    Resolver schneller als dieser Aufruf), wird das Fragment direkt verworfen.
+    """
+    known, url = get_cached_civitai_url(image_name)
+    if not known:
+        get_resolver().submit(image_name, image_id)
+        known, url = get_cached_civitai_url(image_name)
+    if known and url != rendered_url:
+        _invalidate_fragment(image_name, image_id)
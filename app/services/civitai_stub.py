@@ -0,0 +1,43 @@
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Tuple
+
+
+def start_stub_server(known: set, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Offline-Ersatz für civitai.com/images: GET /<name> liefert 200 mit dem Namen im HTML,
+    wenn der Name in known ist, sonst 404. Liefert (server, base_url).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            base = self.path.strip("/").split("?")[0]
+            if base in known:
+                body = f"<html><body><h1>{base}</h1></body></html>".encode("utf-8")
+                self.send_response(200)
+            else:
+                body = b"<html><body>not found</body></html>"
+                self.send_response(404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, name="civitai-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import sys
+
+    server, base_url = start_stub_server(set(sys.argv[1:]), port=8765)
+    print(f"Civitai-Stub läuft auf {base_url}/images → CIVITAI_BASE_URL")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
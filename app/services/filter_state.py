@@ -0,0 +1,64 @@
+from typing import List
+from typing import Optional
+
+from starlette.requests import Request
+
+HISTORY_SIZE = 10
+SESSION_KEY = "filter"
+
+
+class FilterState:
+    """
+    Score-Filter und Textsuche einer Sitzung samt Historie.
+
+    Liegt im signierten Session-Cookie statt in Klassenvariablen: jeder Benutzer hat
+    seinen eigenen Zustand, und mehrere Worker sehen denselben. Die Trefferlisten selbst
+    bleiben in den gemeinsamen Caches (Score-Filter-Cache, Textsuche), Schlüssel ist der Ausdruck.
+    """
+
+    def __init__(self, filter_text: Optional[str] = None, filter_history: Optional[List[str]] = None,
+                 search_text: Optional[str] = None, search_history: Optional[List[str]] = None):
+        self.filter_text = filter_text or None
+        self.filter_history = list(filter_history or [])[:HISTORY_SIZE]
+        self.search_text = search_text or None
+        self.search_history = list(search_history or [])[:HISTORY_SIZE]
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "FilterState":
+        data = data if isinstance(data, dict) else {}
+        return cls(data.get("filter_text"), data.get("filter_history"),
+                   data.get("search_text"), data.get("search_history"))
+
+    def to_dict(self) -> dict:
+        return {
+            "filter_text": self.filter_text,
+            "filter_history": self.filter_history,
+            "search_text": self.search_text,
+            "search_history": self.search_history
+        }
+
+    def set_filter(self, text: Optional[str]) -> None:
+        """Setzt den Score-Filter; ein nicht-leerer Text wandert an den Anfang der Historie."""
+        if text:
+            self.filter_history = _remember(self.filter_history, text)
+        self.filter_text = text or None
+
+    def set_search(self, text: Optional[str]) -> None:
+        if text:
+            self.search_history = _remember(self.search_history, text)
+        self.search_text = text or None
+
+
+def _remember(history: List[str], text: str) -> List[str]:
+    return ([text] + [entry for entry in history if entry != text])[:HISTORY_SIZE]
+
+
+def get_filter_state(request: Request) -> FilterState:
+    """Zustand der Sitzung; leer für Anfragen ohne Session (z.B. interne Seitengenerierung)."""
+    if "session" not in request.scope:
+        return FilterState()
+    return FilterState.from_dict(request.session.get(SESSION_KEY))
+
+
+def save_filter_state(request: Request, state: FilterState) -> None:
+    request.session[SESSION_KEY] = state.to_dict()
@@ -0,0 +1,154 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_INDEXES: Dict[str, "FolderIndex"] = {}  # Pfad der Hash-Datei -> FolderIndex
+_GENERATIONS: Dict[str, int] = {}  # folder_name -> Generation
+
+
+class FolderIndex:
+    """
+    In-Memory-Abbild von gallery202505_hashes.json einer Kategorie.
+
+    Die Reihenfolge der Einträge entspricht der Hash-Datei (nach Aufnahmedatum sortiert).
+    Bildnamen werden wie überall in der Galerie kleingeschrieben geführt.
+    """
+
+    def __init__(self, folder_name: str, local_hashes: Dict[str, str], generation: int,
+                 stamp: Optional[Tuple[int, int]]):
+        self.folder_name = folder_name
+        self.generation = generation
+        self.stamp = stamp
+
+        self.names: List[str] = []
+        self.image_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.md5_to_name: Dict[str, str] = {}
+
+        for filename, md5_hash in local_hashes.items():
+            name = filename.lower()
+            if name in self.positions:
+                continue
+            self.positions[name] = len(self.names)
+            self.names.append(name)
+            self.image_ids.append(md5_hash)
+            self.md5_to_name.setdefault(md5_hash, name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, image_name: str) -> bool:
+        return image_name.lower() in self.positions
+
+    def position(self, image_name: str) -> Optional[int]:
+        return self.positions.get(image_name.lower())
+
+    def image_id(self, image_name: str) -> Optional[str]:
+        pos = self.positions.get(image_name.lower())
+        return self.image_ids[pos] if pos is not None else None
+
+    def name_by_id(self, image_id: str) -> Optional[str]:
+        return self.md5_to_name.get(image_id)
+
+    def entry(self, image_name: str) -> Optional[dict]:
+        """Eintrag im Format des bisherigen pair_cache."""
+        image_id = self.image_id(image_name)
+        if image_id is None:
+            return None
+        return {"image_id": image_id, "folder": self.folder_name}
+
+    def pair_cache(self) -> Dict[str, dict]:
+        return {name: {"image_id": image_id, "folder": self.folder_name}
+                for name, image_id in zip(self.names, self.image_ids)}
+
+
+def _hash_file_path(folder_name: str) -> Path:
+    return Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_name / Settings.GALLERY_HASH_FILE
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_hash_file(path: Path) -> Dict[str, str]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"[folder_index] ❌ Fehler beim Lesen von {path}: {e}")
+        return {}
+
+
+def get_folder_index(folder_name: str) -> FolderIndex:
+    """
+    Liefert den Index einer Kategorie. Die Hash-Datei wird nur neu gelesen,
+    wenn sich mtime/Größe geändert haben oder die Generation erhöht wurde.
+    """
+    hash_file = _hash_file_path(folder_name)
+    key = str(hash_file)
+    stamp = _file_stamp(hash_file)
+
+    index = _INDEXES.get(key)
+    if index and index.stamp == stamp and index.generation == _GENERATIONS.get(folder_name, 0):
+        return index
+
+    with _LOCK:
+        generation = _GENERATIONS.get(folder_name, 0)
+        index = _INDEXES.get(key)
+        if index and index.stamp == stamp and index.generation == generation:
+            return index
+
+        index = FolderIndex(folder_name, _load_hash_file(hash_file), generation, stamp)
+        _INDEXES[key] = index
+        Settings.CACHE["pair_cache"].update(index.pair_cache())
+        logger.info(f"[folder_index] 📂 Index geladen: {folder_name} ({len(index)} Bilder, Generation {generation})")
+        return index
+
+
+def bump_folder_generation(folder_name: Optional[str] = None) -> None:
+    """Markiert den Index einer Kategorie (oder aller, wenn None) als veraltet."""
+    with _LOCK:
+        if folder_name is None:
+            for key in set(_GENERATIONS) | {index.folder_name for index in _INDEXES.values()}:
+                _GENERATIONS[key] = _GENERATIONS.get(key, 0) + 1
+        else:
+            _GENERATIONS[folder_name] = _GENERATIONS.get(folder_name, 0) + 1
+    logger.info(f"[folder_index] 🔄 Generation erhöht: {folder_name or 'alle'}")
+
+
+def folder_generation(folder_name: str) -> int:
+    return _GENERATIONS.get(folder_name, 0)
+
+
+def find_folder_of_image(image_name: str) -> Optional[FolderIndex]:
+    """Sucht die Kategorie, in der ein Bild liegt."""
+    for kategorie in Settings.kategorien():
+        index = get_folder_index(kategorie["key"])
+        if image_name in index:
+            return index
+    return None
+
+
+def find_folder_of_image_id(image_id: str) -> Optional[FolderIndex]:
+    """Sucht die Kategorie, in der ein Bild mit der MD5 liegt."""
+    for kategorie in Settings.kategorien():
+        index = get_folder_index(kategorie["key"])
+        if index.name_by_id(image_id) is not None:
+            return index
+    return None
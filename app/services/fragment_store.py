@@ -0,0 +1,213 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+SQLITE_MAX_PARAMS = 900
+EVICT_TARGET = 0.9  # nach Überschreitung auf 90 % des Limits verkleinern
+
+_LOCK = threading.Lock()
+_STORES: Dict[str, "FragmentStore"] = {}
+
+# Statischer Teil eines Bildeintrags, unabhängig von Textflag und Benutzertyp;
+# bei geändertem Markup hochzählen, damit alte Fragmente nicht mehr getroffen werden
+FRAGMENT_VARIANT = "entry2"
+
+
+def fragment_variant(folder_name: str) -> str:
+    """Variante des statischen Teils; ComfyUI-Einträge haben zusätzlich die Gen-Anzahl."""
+    if Settings.COMFYUI == folder_name:
+        return f"{folder_name}_{FRAGMENT_VARIANT}"
+    return FRAGMENT_VARIANT
+
+
+class FragmentStore:
+    """
+    Gerenderte Bild-Fragmente in einer SQLite-Datei, Schlüssel (image_id, variant).
+
+    Größe wird mitgezählt; wird max_bytes überschritten, fliegen die am längsten nicht
+    gelesenen Fragmente raus.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS fragments
+                         (
+                             image_id    TEXT,
+                             variant     TEXT,
+                             html        TEXT,
+                             size        INTEGER,
+                             last_access REAL,
+                             PRIMARY KEY (image_id, variant)
+                         ) WITHOUT ROWID
+                         """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fragments_last_access ON fragments (last_access)")
+            self.total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fragments").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, image_id: str, variant: str) -> Optional[str]:
+        return self.get_many([(image_id, variant)]).get((image_id, variant))
+
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Alle vorhandenen Fragmente einer Seite mit einer Abfrage je 450 Schlüssel."""
+        keys = list(dict.fromkeys(keys))
+        result = {}
+        if not keys:
+            return result
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                step = SQLITE_MAX_PARAMS // 2
+                for i in range(0, len(keys), step):
+                    chunk = keys[i:i + step]
+                    condition = " OR ".join("(image_id = ? AND variant = ?)" for _ in chunk)
+                    params = [value for key in chunk for value in key]
+                    for image_id, variant, html in conn.execute(
+                            f"SELECT image_id, variant, html FROM fragments WHERE {condition}", params):
+                        result[(image_id, variant)] = html
+                if result:
+                    conn.executemany(
+                        "UPDATE fragments SET last_access = ? WHERE image_id = ? AND variant = ?",
+                        [(now, image_id, variant) for image_id, variant in result])
+        except sqlite3.Error as e:
+            logger.error(f"[fragment_store] ❌ Fehler beim Lesen: {e}")
+        return result
+
+    def put(self, image_id: str, variant: str, html: str) -> bool:
+        return self.put_many([(image_id, variant, html)]) == 1
+
+    def put_many(self, entries: Iterable[Tuple[str, str, str]]) -> int:
+        rows = [(image_id, variant, html, len(html.encode("utf-8")), time.time())
+                for image_id, variant, html in entries]
+        if not rows:
+            return 0
+        try:
+            with self._lock, self._connect() as conn:
+                for image_id, variant, _, size, _ in rows:
+                    old = conn.execute("SELECT size FROM fragments WHERE image_id = ? AND variant = ?",
+                                       (image_id, variant)).fetchone()
+                    self.total_bytes += size - (old[0] if old else 0)
+                conn.executemany("""
+                    INSERT OR REPLACE INTO fragments (image_id, variant, html, size, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                """, rows)
+                if self.max_bytes and self.total_bytes > self.max_bytes:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            logger.error(f"[fragment_store] ❌ Fehler beim Speichern: {e}")
+            return 0
+        return len(rows)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        target = int(self.max_bytes * EVICT_TARGET)
+        removed = 0
+        cursor = conn.execute("SELECT image_id, variant, size FROM fragments ORDER BY last_access")
+        victims = []
+        for image_id, variant, size in cursor:
+            if self.total_bytes - removed <= target:
+                break
+            victims.append((image_id, variant))
+            removed += size
+        cursor.close()
+        conn.executemany("DELETE FROM fragments WHERE image_id = ? AND variant = ?", victims)
+        self.total_bytes -= removed
+        logger.info(f"[fragment_store] 🧹 {len(victims)} Fragmente verdrängt ({removed} Bytes)")
+
+    def delete_image(self, image_id: str) -> int:
+        """Alle Varianten eines Bildes über den Primärschlüssel löschen."""
+        try:
+            with self._lock, self._connect() as conn:
+                size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fragments WHERE image_id = ?",
+                                    (image_id,)).fetchone()[0]
+                deleted = conn.execute("DELETE FROM fragments WHERE image_id = ?", (image_id,)).rowcount
+                self.total_bytes -= size
+                return deleted
+        except sqlite3.Error as e:
+            logger.error(f"[fragment_store] ❌ Fehler beim Löschen von {image_id}: {e}")
+            return 0
+
+    def delete_variants_except(self, variants: set) -> int:
+        placeholders = ",".join("?" for _ in variants)
+        try:
+            with self._lock, self._connect() as conn:
+                deleted = conn.execute(
+                    f"DELETE FROM fragments WHERE variant NOT IN ({placeholders})", list(variants)).rowcount
+                self.total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fragments").fetchone()[0]
+                return deleted
+        except sqlite3.Error as e:
+            logger.error(f"[fragment_store] ❌ Fehler beim Aufräumen: {e}")
+            return 0
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM fragments")
+            self.total_bytes = 0
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM fragments").fetchone()[0]
+
+
+def get_fragment_store() -> FragmentStore:
+    path = Path(Settings.RENDERED_HTML_DIR) / Settings.RENDERED_HTML_STORE
+    key = str(path)
+    store = _STORES.get(key)
+    if store is None:
+        with _LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                store = FragmentStore(path, Settings.RENDERED_HTML_MAX_BYTES)
+                _STORES[key] = store
+    return store
+
+
+def migrate_rendered_html_dir(file_dir: Path = None) -> int:
+    """
+    Räumt die alte Ablage auf: <name>.j2-Dateien und gespeicherte Varianten pro Textflag/Benutzertyp
+    enthalten Text und Kategorien fest eingerendert und lassen sich nicht zusammensetzen.
+    Sie werden gelöscht und beim nächsten Aufruf als statischer Teil neu gerendert.
+    """
+    file_dir = Path(file_dir or Settings.RENDERED_HTML_DIR)
+    removed = 0
+    if file_dir.is_dir():
+        for file_path in file_dir.glob("*.j2"):
+            try:
+                file_path.unlink()
+                removed += 1
+            except Exception as e:
+                logger.error(f"[migrate_rendered_html_dir] ❌ Fehler beim Löschen von {file_path}: {e}")
+
+    removed += get_fragment_store().delete_variants_except(
+        {FRAGMENT_VARIANT, fragment_variant(Settings.COMFYUI)})
+
+    if removed:
+        logger.info(f"[migrate_rendered_html_dir] ✅ {removed} alte Fragmente entfernt")
+    return removed
+
+
+def p4():
+    Settings.RENDERED_HTML_DIR = "../../cache/rendered_html"
+    migrate_rendered_html_dir()
+
+
+if __name__ == "__main__":
+    p4()
@@ -0,0 +1,94 @@
+import os
+import threading
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+from markupsafe import escape
+
+from ..config import Settings
+from ..services.media import sign_media_urls
+from ..services.text_cache import get_text_cache
+from ..services.text_index import get_text_meta
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "../templates"))
+
+# Platzhalter im gespeicherten statischen Teil, werden pro Anfrage ersetzt
+KATEGORIEN_MARKER = "<!--@kategorien@-->"
+TEXT_MARKER = "<!--@text@-->"
+_IMAGE_ID = "@@image_id@@"
+_IMAGE_NAME = "@@image_name@@"
+
+_LOCK = threading.Lock()
+_KATEGORIEN_TEMPLATES: Dict[Tuple[str, ...], str] = {}
+
+
+def render_static_part(**context) -> str:
+    """
+    Rendert den von Textflag und Benutzertyp unabhängigen Teil eines Bildeintrags
+    (Thumbnail, Score-Balken, Buttons) mit Platzhaltern für Kategorien und Text.
+    """
+    return templates.get_template("image_entry_local.j2").render(
+        kategorien_html=Markup(KATEGORIEN_MARKER),
+        text_html=Markup(TEXT_MARKER),
+        **context
+    )
+
+
+def kategorien_part(image_id: str, image_name: str) -> str:
+    """Kategorie-Zeilen für den aktuellen Benutzertyp; die Vorlage wird pro Kategorienliste einmal gerendert."""
+    kategorien = Settings.kategorien()
+    key = tuple(k["key"] for k in kategorien)
+    template = _KATEGORIEN_TEMPLATES.get(key)
+    if template is None:
+        template = templates.get_template("image_entry_kategorien.j2").render(
+            kategorien=kategorien, image_id=_IMAGE_ID, image_name=_IMAGE_NAME)
+        with _LOCK:
+            _KATEGORIEN_TEMPLATES[key] = template
+    return template.replace(_IMAGE_ID, str(escape(image_id))).replace(_IMAGE_NAME, str(escape(image_name)))
+
+
+def text_part(image_name: str, textflag: str) -> Tuple[str, bool]:
+    """
+    Text eines Bildes für textflag 1–4. Volltext (2) aus dem TextCache (bzw. der Textdatei),
+    Aufnahmezeile (3) und Kurztext (4) aus den vorberechneten TextMeta-Feldern; fehlt die
+    Aufnahmezeile, zeigt 3 den Volltext.
+
+    Returns:
+        (text, fehlt) – fehlt ist True, wenn für textflag 2–4 kein Text vorhanden ist
+    """
+    if textflag not in ('2', '3', '4'):
+        return "", False
+
+    if textflag == '2':
+        text_content = get_text_cache().load(image_name)
+        if text_content is None:
+            return Settings.KEIN_TEXT_GEFUNDEN, True
+        return text_content, False
+
+    meta = get_text_meta(image_name)
+    if meta is None:
+        return Settings.KEIN_TEXT_GEFUNDEN, True
+    if textflag == '3':
+        # ohne Aufnahmezeile der Volltext (wie bisher)
+        if meta.capture:
+            return meta.capture, False
+        text_content = get_text_cache().load(image_name)
+        if text_content is None:
+            return Settings.KEIN_TEXT_GEFUNDEN, True
+        return text_content, False
+    return meta.summary, False
+
+
+def compose_entry(static_html: str, image_id: str, image_name: str, text_content: Optional[str]) -> str:
+    """
+    Setzt den statischen Teil mit Kategorien und Text zum fertigen Bildeintrag zusammen.
+    Medien-URLs werden erst hier signiert, damit gecachte Fragmente nie abgelaufene Signaturen enthalten.
+    """
+    return sign_media_urls(static_html).replace(KATEGORIEN_MARKER, kategorien_part(image_id, image_name), 1) \
+        .replace(TEXT_MARKER, str(text_content or ""), 1)
@@ -15,11 +15,19 @@ from ..config import Settings  # Importiere die Settings-Klasse
 from ..scores.faces import load_faces
 from ..scores.nsfw import load_nsfw
 from ..scores.quality import load_quality
-from ..services.thumbnail import generate_thumbnail
+from ..services.folder_index import get_folder_index
+from ..services.fragment_store import get_fragment_store
+from ..services.pack_store import get_face_pack
+from ..services.pack_store import get_thumbnail_pack
+from ..services.page_cache import touch_image
+from ..services.renditions import rendition_context
+from ..services.text_cache import get_text_cache
+from ..services.text_index import index_text_file
+from ..services.thumbnail import get_thumbnail_engine
 from ..services.thumbnail import get_thumbnail_path
 from ..services.thumbnail import thumbnail
+from ..services.thumbnail import thumbnail_exists
 from ..tools import find_image_id_by_name, dict2md5
-from ..tools import newpaircache
 from ..utils.db_utils import delete_checkbox_status
 from ..utils.logger_config import setup_logger
 from ..utils.score_utils import delete_scores
@@ -162,6 +170,7 @@ def download_text_file(folder_name: str, image_name: str, cache_dir: str) -> str
         if dt:
             os.utime(full_txt_path, (dt.timestamp(), dt.timestamp()))
             os.utime(full_image_path, (dt.timestamp(), dt.timestamp()))
+        index_text_file(full_txt_path)
         logger.info(f"[download_text_file] ✅ Textdatei aktualisiert: {full_txt_path}")
         return full_txt_path.read_text(encoding='utf-8')
     except FileNotFoundError:
@@ -195,38 +204,46 @@ def download_and_save_image(folder_name: str, image_name: str, image_id: str) ->
         return None
 
     thumbnail_path = get_thumbnail_path(image_id)
-    if not os.path.exists(thumbnail_path):
-        if not generate_thumbnail(image_path, thumbnail_path, image_id):
+    if not thumbnail_exists(image_id):
+        if not get_thumbnail_engine().ensure(image_path, image_id):
             return None
 
     return thumbnail_path
 
 
-def prepare_image_data(count: int, folder_name: str, image_name: str):
+def prepare_image_data(count: int, folder_name: str, image_name: str, page_data: dict | None = None):
+    """
+    Sammelt Thumbnail, Scores und Extra-Thumbnails eines Bildes.
+    page_data ist der Eintrag aus load_page_data; fehlt er, werden die Scores einzeln geladen.
+    """
     logger.info(f"📦 Starte prepare_image_data() für {image_name}")
     image_name = image_name.lower()
-    pair_cache = newpaircache(folder_name)
-    pair = pair_cache[image_name]
-    image_id = pair['image_id']
+    image_id = get_folder_index(folder_name).image_id(image_name)
 
+    text_cache = get_text_cache()
     try:
-        if image_name not in Settings.CACHE["text_cache"]:
+        if image_name not in text_cache:
             content = download_text_file(folder_name, image_name, Settings.TEXT_FILE_CACHE_DIR)
-            Settings.CACHE["text_cache"][image_name] = content
+            if content is not None:
+                text_cache.put(image_name, content)
     except Exception as e:
         logger.error(f"[prepare_image_data] ❌ Fehler beim Laden von Textdatei: {e}")
-        Settings.CACHE["text_cache"][image_name] = f"Fehler beim Laden: {e}"
+        text_cache.put(image_name, f"Fehler beim Laden: {e}")
 
     thumbnail_src = thumbnail(count, folder_name, image_id, image_name)
 
-    quality_scores = load_quality(Settings.DB_PATH, Settings.IMAGE_FILE_CACHE_DIR, folder_name, image_name)
-    nsfw_scores = load_nsfw(Settings.DB_PATH, folder_name, image_name)
+    page_data = page_data or {}
+    quality_scores = load_quality(Settings.DB_PATH, Settings.IMAGE_FILE_CACHE_DIR, folder_name, image_name,
+                                  rows=page_data.get("quality_rows"))
+    nsfw_scores = load_nsfw(Settings.DB_PATH, folder_name, image_name, rows=page_data.get("nsfw_rows"))
     extra_thumbnails1 = add_gif_thumbnail(image_name)
-    extra_thumbnails2 = load_faces(Settings.DB_PATH, folder_name, image_name, image_id)
+    extra_thumbnails2 = load_faces(Settings.DB_PATH, folder_name, image_name, image_id,
+                                   rows=page_data.get("face_rows"))
     extra_thumbnails = extra_thumbnails1 + extra_thumbnails2
 
     return {
         "thumbnail_src": thumbnail_src,
+        "renditions": rendition_context(image_id),
         "image_id": image_id,
         "quality_scores": quality_scores,
         "nsfw_scores": nsfw_scores,
@@ -255,28 +272,17 @@ def add_gif_thumbnail(image_name: str) -> list[Any] | list[dict[str, str]]:
     return extra_thumbnails
 
 
-def delete_rendered_html_file(file_dir: Path, image_id: str) -> bool:
-    try:
-        success = False
-        for file_path in file_dir.glob(f"*{image_id}*"):
-            try:
-                file_path.unlink()
-                logger.info(f"[delete_rendered_html_file] ✅ gelöscht: {file_path}")
-                success = True
-            except Exception as e:
-                logger.error(f"[delete_rendered_html_file] ❌ Fehler beim Löschen von {file_path}: {e}")
-        return success
-    except Exception as e:
-        logger.error(f"[delete_rendered_html_file] ❌ Fehler beim Durchsuchen des Verzeichnisses: {e}")
-        return False
+def delete_rendered_html_file(image_id: str) -> bool:
+    deleted = get_fragment_store().delete_image(image_id)
+    touch_image(image_id)
+    if deleted:
+        logger.info(f"[delete_rendered_html_file] ✅ {deleted} Fragmente gelöscht: {image_id}")
+    return deleted > 0
 
 
 def clean(image_name: str, image_id: str = None) -> JSONResponse | None:
     logger.info(f"🧹 Starte clean() für: {image_name}")
-    text_cache = Settings.CACHE.get("text_cache")
-
-    if image_name in text_cache:
-        text_cache.pop(image_name, None)
+    if get_text_cache().invalidate(image_name):
         logger.info(f"[clean] ✅ text_cache gelöscht: {image_name}")
 
     if not image_id:
@@ -287,14 +293,19 @@ def clean(image_name: str, image_id: str = None) -> JSONResponse | None:
     delete_checkbox_status(image_name)
     delete_scores(image_name)
     delete_scores(image_id)
+    touch_image(image_name, image_id)
 
-    if delete_rendered_html_file(Settings.RENDERED_HTML_DIR, image_id):
+    if delete_rendered_html_file(image_id):
         logger.info(f"[clean] ✅ gerendertes HTML gelöscht: {image_id}")
 
     thumbnail_path = get_thumbnail_path(image_id)
     if os.path.exists(thumbnail_path):
         os.remove(thumbnail_path)
         logger.info(f"[clean] ✅ Thumbnail gelöscht: {thumbnail_path}")
+    if get_thumbnail_pack().delete([image_id]):
+        logger.info(f"[clean] ✅ Thumbnail aus dem Pack gelöscht: {image_id}")
+    if count := get_face_pack().delete_image_ids([image_id]):
+        logger.info(f"[clean] ✅ {count} Gesichter aus dem Pack gelöscht: {image_id}")
 
     face_dir = Path(Settings.GESICHTER_FILE_CACHE_DIR)
     for file in face_dir.glob(f"{image_id}_*.jpg"):
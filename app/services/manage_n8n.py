@@ -16,6 +16,10 @@ from ..config_gdrive import sanitize_filename
 from ..routes.auth import load_drive_service
 from ..routes.auth import load_drive_service_token
 from ..routes.gdrive_from_lokal import save_structured_hashes
+from ..services.fragment_store import get_fragment_store
+from ..services.page_cache import touch_image
+from ..services.text_cache import get_text_cache
+from ..services.text_index import index_text_file
 from ..utils.logger_config import setup_logger
 from ..utils.move_utils import move_single_image
 from ..utils.progress import list_all_files
@@ -177,18 +181,12 @@ async def delete_drive_file(service, file_id: str, file_name: str, task_type: st
 
 
 async def delete_rendered_html_files(md5: str) -> None:
-    """Löscht alle gerenderten HTML-Dateien für eine bestimmte MD5"""
+    """Löscht alle gerenderten HTML-Fragmente für eine bestimmte MD5"""
     try:
-        html_dir = Path(Settings.RENDERED_HTML_DIR)
-        if not html_dir.exists():
-            return
-
-        # Suche nach allen HTML-Dateien die mit der MD5 beginnen
-        pattern = f"{md5}*.html"
-        for html_file in html_dir.glob(pattern):
-            if html_file.exists():
-                html_file.unlink()
-                logger.info(f"Gelöschte HTML-Datei: {html_file}")
+        deleted = get_fragment_store().delete_image(md5)
+        touch_image(md5)
+        if deleted:
+            logger.info(f"Gelöschte HTML-Fragmente: {md5} ({deleted})")
 
     except Exception as e:
         logger.error(f"[delete_rendered_html_files] Fehler beim Löschen der HTML-Dateien für MD5 {md5}: {e}")
@@ -210,6 +208,7 @@ async def process_completed_task(service, file_name: str, save_files_dict: dict,
         # Berechne MD5 der heruntergeladenen Text-Datei
         text_path = Path(Settings.TEXT_FILE_CACHE_DIR)
         text_file_full_path = text_path / f"{file_name}.txt"
+        index_text_file(text_file_full_path)
         text_md5 = calculate_md5(text_file_full_path)
         await update_hash_files(text_path, f"{file_name}.txt", text_md5, text_file_id)
 
@@ -556,8 +555,7 @@ async def update_hash_files(directory: Path, file_name: str, file_md5: str, file
 
         # Text-Cache aktualisieren wenn es eine Textdatei ist
         if file_name.lower().endswith('.txt'):
-            file_name_without_ext = file_name.lower()[:-4]
-            Settings.CACHE["text_cache"].pop(file_name_without_ext, None)
+            get_text_cache().invalidate(file_name)
             await delete_rendered_html_files(file_md5)
 
         logger.info(f"Hash-Dateien aktualisiert für: {file_name}")
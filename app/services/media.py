@@ -0,0 +1,300 @@
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from typing import Tuple
+from urllib.parse import quote
+from urllib.parse import unquote
+
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse
+from starlette.responses import Response
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from ..config import Settings
+from ..services.folder_index import find_folder_of_image
+from ..services.folder_index import get_folder_index
+from ..services.pack_store import PackEntry
+from ..services.pack_store import PackStore
+from ..services.page_cache import etag_matches
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Inhaltsadressierte Dateien (MD5 im Namen) ändern sich nie → ein Jahr, ohne Revalidierung
+IMMUTABLE = "public, max-age=31536000, immutable"
+PRIVATE_IMMUTABLE = "private, max-age=31536000, immutable"
+# Über den Bildnamen adressierte Dateien können sich ändern → jedes Mal per ETag nachfragen (meist 304)
+REVALIDATE = "private, no-cache"
+
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse, die ganze Dateien per ASGI-Erweiterung 'http.response.pathsend' ausliefert,
+    wenn der Server sie anbietet: der Server schickt die Datei dann selbst (sendfile, Zero-Copy),
+    statt sie in 64-KiB-Stücken durch Python zu reichen. Range-Anfragen erledigt FileResponse.
+    """
+
+    _pathsend = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if not self._pathsend or send_header_only:
+            return await super()._handle_simple(send, send_header_only)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+
+
+def media_response(request: Request, path: Path, cache_control: str, etag: Optional[str] = None) -> Optional[Response]:
+    """
+    Antwort für eine Mediendatei oder None, wenn es sie nicht gibt.
+
+    etag ist bei inhaltsadressierten Dateien der Dateiname, sonst wird er aus Größe und mtime
+    gebildet; beides ist ein starker ETag. Passt If-None-Match, kommt 304 ohne Dateizugriff.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+
+    etag = f'"{etag}"' if etag else f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+    headers = {"Cache-Control": cache_control, "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return MediaFileResponse(path, stat_result=stat_result, headers=headers)
+
+
+def parse_byte_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """
+    Ein Bereich aus 'Range: bytes=…' als (start, ende exklusiv). None heißt ganze Datei
+    (kein, fehlerhafter oder mehrteiliger Range); ValueError, wenn der Bereich nicht erfüllbar ist.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:  # Suffix: die letzten n Bytes
+        if int(last) == 0 or length == 0:
+            raise ValueError(header)
+        return max(length - int(last), 0), length
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= length:
+        raise ValueError(header)
+    return start, min(int(last) + 1 if last else length, length)
+
+
+class PackSliceResponse(Response):
+    """
+    Ein Eintrag aus einer Pack-Datei. Bietet der Server 'http.response.zerocopy' an, schickt er den
+    Ausschnitt per sendfile; sonst wird er mit einem pread gelesen (ein Systemaufruf, keine Kopie in Python).
+    Einfache Range-Anfragen werden wie bei FileResponse mit 206 beantwortet.
+    """
+
+    def __init__(self, store: PackStore, key: str, entry: PackEntry, headers: dict, media_type: str):
+        super().__init__(headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(entry.length)
+        self.headers["accept-ranges"] = "bytes"
+        self.store = store
+        self.key = key
+        self.entry = entry
+
+    def _byte_range(self, scope: Scope) -> Optional[Tuple[int, int]]:
+        request_headers = Headers(scope=scope)
+        if_range = request_headers.get("if-range")
+        if if_range is not None and if_range != self.headers.get("etag"):
+            return None  # Eintrag hat sich geändert → ganz ausliefern
+        return parse_byte_range(request_headers.get("range"), self.entry.length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            byte_range = self._byte_range(scope)
+        except ValueError:
+            headers = {"content-range": f"bytes */{self.entry.length}"}
+            return await Response(status_code=416, headers=headers)(scope, receive, send)
+        first, end = byte_range or (0, self.entry.length)
+        if byte_range is not None:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {first}-{end - 1}/{self.entry.length}"
+            self.headers["content-length"] = str(end - first)
+
+        start = {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        if scope["method"].upper() == "HEAD":
+            await send(start)
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            try:
+                with open(self.store.segment_path(self.entry.segment), "rb") as f:
+                    await send(start)
+                    await send({"type": "http.response.zerocopy", "file": f,
+                                "offset": self.entry.offset + first, "count": end - first})
+                return
+            except FileNotFoundError:
+                pass  # durch compact() ersetzt → über read() neu auflösen
+        body = self.store.read_entry(self.entry)
+        if body is None:
+            body = self.store.read(self.key)
+        if body is None or len(body) != self.entry.length:
+            return await Response(status_code=404)(scope, receive, send)
+        await send(start)
+        await send({"type": "http.response.body", "body": body[first:end]})
+
+
+def pack_response(request: Request, store: PackStore, key: str, media_type: str,
+                  cache_control: str) -> Optional[Response]:
+    """Antwort für einen Pack-Eintrag oder None; der ETag ändert sich, wenn der Eintrag neu geschrieben wird."""
+    entry = store.locate(key)
+    if entry is None:
+        return None
+    headers = {"Cache-Control": cache_control, "ETag": f'"{key}-{entry.segment:x}-{entry.offset:x}"'}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return PackSliceResponse(store, key, entry, headers, media_type)
+
+
+def resolve_image_file(base_path: Path, file_path: str) -> Optional[Path]:
+    """
+    Pfad eines Originals '<kategorie>/<bild>'. Liegt es nicht (mehr) in der angefragten Kategorie,
+    wird die aktuelle über die FolderIndex-Tabellen (Bildname → Kategorie) bestimmt statt
+    alle Kategorieordner abzufragen.
+    """
+    file = base_path / file_path
+    if file.is_file():
+        return file
+    folder_name, _, image_name = file_path.partition("/")
+    if not image_name or "/" in image_name:
+        return None
+    if image_name in get_folder_index(folder_name):
+        return None  # laut Hash-Datei hier, aber die Datei fehlt
+    index = find_folder_of_image(image_name)
+    if index is None:
+        return None
+    file = base_path / index.folder_name / image_name
+    return file if file.is_file() else None
+
+
+# Signierte Medien-URLs: '/gallery/static/<art>/<pfad>?e=<ablauf>&s=<hmac>'
+SIGNED_KINDS = ("renditions", "imagefiles", "facefiles", "comfyui_gif")
+_MEDIA_URL_RE = re.compile(r"(/gallery/static/(" + "|".join(SIGNED_KINDS) + r")/)([^\"'\s?,<>]+)")
+_SECRET_LOCK = threading.Lock()
+
+
+def media_url_secret() -> str:
+    """
+    Schlüssel für die Signaturen: MEDIA_URL_SECRET aus der Umgebung, sonst aus MEDIA_URL_SECRET_FILE.
+    Fehlt die Datei, legt der erste Prozess sie an (über os.link, damit gleichzeitig startende Worker
+    denselben Wert lesen). Ist sie nicht les- oder schreibbar, schlägt der Start fehl.
+    """
+    if Settings.MEDIA_URL_SECRET:
+        return Settings.MEDIA_URL_SECRET
+    with _SECRET_LOCK:
+        if not Settings.MEDIA_URL_SECRET:
+            path = Path(Settings.MEDIA_URL_SECRET_FILE)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f".{path.name}.{os.getpid()}")
+                tmp.write_text(secrets.token_hex(32), encoding="utf-8")
+                os.chmod(tmp, 0o600)
+                try:
+                    os.link(tmp, path)
+                    logger.info(f"[media_url_secret] 🔑 Neuer Schlüssel in {path}")
+                except FileExistsError:
+                    pass
+                finally:
+                    tmp.unlink()
+            secret = path.read_text(encoding="utf-8").strip()
+            if not secret:
+                raise RuntimeError(f"MEDIA_URL_SECRET fehlt und {path} ist leer")
+            Settings.MEDIA_URL_SECRET = secret
+    return Settings.MEDIA_URL_SECRET
+
+
+def media_url_epoch(now: Optional[float] = None) -> int:
+    """
+    Ablaufzeitpunkt für jetzt signierte URLs. Er springt nur alle MEDIA_URL_TTL/2 Sekunden,
+    damit URLs (und damit Browser-Cache und Seiten-ETag) so lange stabil bleiben; eine URL
+    gilt also noch mindestens TTL/2 Sekunden.
+    """
+    step = max(Settings.MEDIA_URL_TTL // 2, 1)
+    return (int(now if now is not None else time.time()) // step + 2) * step
+
+
+def media_signature(path: str, expires: int) -> str:
+    """HMAC über '<art>/<pfad>' und Ablaufzeit (path ohne führendes /gallery/static/)."""
+    message = f"{path}:{expires}".encode("utf-8")
+    return hmac.new(media_url_secret().encode("utf-8"), message, hashlib.sha256).hexdigest()[:32]
+
+
+def verify_media_signature(path: str, expires: Optional[str], signature: Optional[str]) -> bool:
+    if not expires or not signature or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(media_signature(path, int(expires)), signature)
+
+
+def sign_media_urls(html: str, expires: Optional[int] = None) -> str:
+    """Hängt an alle Medien-URLs im HTML (src, srcset, data-*) Ablaufzeit und Signatur an."""
+    expires = expires or media_url_epoch()
+
+    def _sign(match: "re.Match") -> str:
+        path = f"{match.group(2)}/{unquote(match.group(3))}"
+        return f"{match.group(0)}?e={expires}&amp;s={media_signature(path, expires)}"
+
+    return _MEDIA_URL_RE.sub(_sign, html)
+
+
+def signed_media_url(path: str, expires: Optional[int] = None) -> str:
+    """Signierte URL für '<art>/<pfad>', für Stellen, an denen sign_media_urls die URL nicht im HTML findet."""
+    expires = expires or media_url_epoch()
+    return f"/gallery/static/{quote(path)}?e={expires}&s={media_signature(path, expires)}"
+
+
+def signed_media_path(path: str) -> Optional[str]:
+    """'<art>/<pfad>' für eine Anfrage an eine signierbare Medienroute, sonst None."""
+    parts = path.strip("/").split("/")
+    for i, part in enumerate(parts[:3]):  # evtl. mit Präfix '/gallery/static/'
+        if part in SIGNED_KINDS:
+            rest = "/".join(parts[i + 1:])
+            return f"{part}/{rest}" if rest else None
+    return None
+
+
+def has_media_signature(request: Request, path: str) -> bool:
+    if request.scope.get("media_signed"):
+        return True
+    params = request.query_params
+    return verify_media_signature(path, params.get("e"), params.get("s"))
+
+
+class MediaSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware, die Medienanfragen mit gültiger Signatur durchreicht, ohne das
+    Session-Cookie zu dekodieren; ungültige oder fehlende Signaturen laufen normal über die Session.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and b"s=" in scope.get("query_string", b""):
+            path = signed_media_path(scope["path"])
+            if path is not None and has_media_signature(Request(scope), path):
+                scope["session"] = {}
+                scope["media_signed"] = True
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
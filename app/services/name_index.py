@@ -0,0 +1,134 @@
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+from ..config import Settings
+from ..services.folder_index import FolderIndex
+from ..services.folder_index import get_folder_index
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+VERIFY_DIRECTLY = 256
+
+_LOCK = threading.Lock()
+_INDEXES: Dict[str, "TrigramIndex"] = {}  # folder_name -> TrigramIndex des aktuellen FolderIndex
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    # np.sort + Nachbarvergleich ist hier deutlich schneller als np.unique
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if len(values) else values
+
+
+def _trigram_codes(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    if len(raw) < 3:
+        return np.empty(0, dtype=np.uint32)
+    return _sorted_unique(raw[:-2] << 16 | raw[1:-1] << 8 | raw[2:])
+
+
+class TrigramIndex:
+    """
+    Trigramm-Index über die Bildnamen eines FolderIndex (UTF-8-Bytes, lowercase).
+
+    Die Ergebnisse sind aufsteigende Ordinalzahlen, also Positionen im FolderIndex,
+    wie sie GalleryView erwartet.
+    """
+
+    def __init__(self, index: FolderIndex):
+        self.folder_name = index.folder_name
+        self.key = (index.generation, index.stamp)
+        self.names = index.names
+
+        encoded = [name.encode("utf-8") for name in self.names]
+        width = max([3] + [len(name) for name in encoded])
+        if encoded:
+            grid = np.array(encoded, dtype=f"S{width}").view(np.uint8).reshape(len(encoded), width)
+        else:
+            grid = np.zeros((0, width), dtype=np.uint8)
+        grid = grid.astype(np.uint32)
+        codes = grid[:, :-2] << 16 | grid[:, 1:-1] << 8 | grid[:, 2:]
+        valid = grid[:, 2:] != 0  # Auffüllung mit NUL-Bytes
+        ordinals = np.broadcast_to(np.arange(len(encoded), dtype=np.int64)[:, None], codes.shape)
+
+        # (Trigramm, Ordinalzahl) eindeutig und sortiert → Postings liegen hintereinander
+        pairs = _sorted_unique(codes[valid].astype(np.int64) << 32 | ordinals[valid])
+        self._ordinals = (pairs & 0xFFFFFFFF).astype(np.int32)
+        pair_codes = pairs >> 32
+        self._starts = np.flatnonzero(np.concatenate(([len(pairs) > 0], pair_codes[1:] != pair_codes[:-1])))
+        self._codes = pair_codes[self._starts]
+        self._ends = np.append(self._starts[1:], len(pairs))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _postings(self, code: int) -> np.ndarray:
+        i = np.searchsorted(self._codes, code)
+        if i >= len(self._codes) or self._codes[i] != code:
+            return self._ordinals[:0]
+        return self._ordinals[self._starts[i]:self._ends[i]]
+
+    def substring(self, text: str) -> List[int]:
+        """Alle Namen, die text enthalten."""
+        text = text.lower()
+        codes = _trigram_codes(text.encode("utf-8"))
+        if not len(codes):
+            return [ordinal for ordinal, name in enumerate(self.names) if text in name]
+
+        postings = sorted((self._postings(code) for code in codes), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            # Wenige Kandidaten direkt prüfen statt mit großen Postings zu schneiden
+            if len(candidates) <= VERIFY_DIRECTLY:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        names = self.names
+        # Trigramme sind notwendig, aber nicht hinreichend → Kandidaten prüfen
+        return [int(ordinal) for ordinal in candidates if text in names[ordinal]]
+
+    def fuzzy(self, text: str, threshold: Optional[float] = None) -> List[int]:
+        """Namen, die mindestens threshold der Trigramme von text enthalten (Tippfehler, Vertauschungen)."""
+        threshold = Settings.NAME_FUZZY_THRESHOLD if threshold is None else threshold
+        codes = _trigram_codes(text.lower().encode("utf-8"))
+        if not len(codes):
+            return self.substring(text)
+        hits = np.bincount(np.concatenate([self._postings(code) for code in codes]), minlength=len(self.names))
+        return np.flatnonzero(hits >= max(1.0, threshold * len(codes))).tolist()
+
+
+def get_trigram_index(index: FolderIndex) -> TrigramIndex:
+    """Trigramm-Index zum aktuellen FolderIndex; nach Verschieben/Umbenennen (neue Generation) neu gebaut."""
+    trigrams = _INDEXES.get(index.folder_name)
+    if trigrams is not None and trigrams.key == (index.generation, index.stamp):
+        return trigrams
+    with _LOCK:
+        trigrams = _INDEXES.get(index.folder_name)
+        if trigrams is None or trigrams.key != (index.generation, index.stamp):
+            trigrams = TrigramIndex(index)
+            _INDEXES[index.folder_name] = trigrams
+            logger.info(f"[name_index] 🔤 Trigramm-Index gebaut: {index.folder_name} ({len(trigrams)} Namen)")
+    return trigrams
+
+
+def build_name_index() -> int:
+    """Baut die Trigramm-Indizes aller Kategorien in einem Durchlauf vor; liefert die Anzahl der Namen."""
+    total = 0
+    for kategorie in Settings.kategorien():
+        total += len(get_trigram_index(get_folder_index(kategorie["key"])))
+    logger.info(f"[name_index] ✅ {total} Bildnamen indiziert")
+    return total
+
+
+def search_names(text: str, fuzzy: bool = False) -> Dict[str, List[int]]:
+    """Suche über alle Kategorien: folder_name -> Ordinalzahlen im jeweiligen FolderIndex."""
+    result = {}
+    for kategorie in Settings.kategorien():
+        trigrams = get_trigram_index(get_folder_index(kategorie["key"]))
+        ordinals = trigrams.fuzzy(text) if fuzzy else trigrams.substring(text)
+        if ordinals:
+            result[kategorie["key"]] = ordinals
+    return result
@@ -0,0 +1,432 @@
+import fcntl
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_STORES: Dict[str, "PackStore"] = {}
+
+_CHUNK = 500  # Schlüssel pro IN-/GLOB-Abfrage
+
+
+class PackEntry(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+
+
+class PackStore:
+    """
+    Append-only Ablage für kleine abgeleitete Bilder (Thumbnails, Gesichtsausschnitte).
+
+    Statt einer Datei pro Bild werden die Bytes an Segmentdateien '<nr>.pack' angehängt;
+    pack_index.db hält Schlüssel → (Segment, Offset, Länge). Überschreiben und Löschen ändern
+    nur den Index, der Platz in den Segmenten wird erst durch compact() freigegeben.
+    Schlüssel sind die Dateinamen der bisherigen Einzeldateien ohne Endung ('<md5>', '<md5>_<i>').
+
+    Mehrere Prozesse (Worker, CLI) dürfen dasselbe Verzeichnis nutzen: Schreiber serialisieren sich
+    über flock auf 'pack.lock', das aktive Segment steht in pack_meta und Segmentnummern werden nie
+    wiederverwendet. Offene Deskriptoren werden vor dem Lesen per Inode gegen die Datei geprüft.
+    """
+
+    def __init__(self, root: Path, segment_bytes: int):
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self.index_path = self.root / "pack_index.db"
+        self.lock_path = self.root / "pack.lock"
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._fds: Dict[int, Tuple[int, int]] = {}  # Segment -> (fd, Inode)
+        self._retired: List[int] = []
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._locked(), self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS pack_entries ("
+                         "key TEXT PRIMARY KEY, segment INTEGER NOT NULL, "
+                         "offset INTEGER NOT NULL, length INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pack_entries_segment ON pack_entries (segment)")
+            conn.execute("CREATE TABLE IF NOT EXISTS pack_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            segments = self.segments()
+            conn.execute("INSERT OR IGNORE INTO pack_meta (name, value) VALUES ('active_segment', ?)",
+                         (segments[-1] if segments else 1,))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    @contextmanager
+    def _locked(self):
+        """Schreibsperre für Threads (_lock) und Prozesse (flock auf pack.lock)."""
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _active_segment(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM pack_meta WHERE name = 'active_segment'").fetchone()[0]
+
+    @staticmethod
+    def _set_active_segment(conn: sqlite3.Connection, segment: int) -> None:
+        conn.execute("UPDATE pack_meta SET value = ? WHERE name = 'active_segment'", (segment,))
+
+    def _reader(self) -> sqlite3.Connection:
+        """Lesende Verbindung pro Thread; locate() läuft bei jedem Thumbnail-Abruf."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.index_path, timeout=30)
+        return conn
+
+    def _fd(self, segment: int) -> int:
+        """
+        Offener Deskriptor eines Segments (bleibt offen, pread braucht keinen Dateizeiger).
+        Hat ein anderer Prozess die Datei inzwischen gelöscht oder ersetzt, passt der Inode
+        nicht mehr und sie wird neu geöffnet; fehlt sie, gibt es FileNotFoundError.
+        """
+        path = self.segment_path(segment)
+        inode = os.stat(path).st_ino
+        cached = self._fds.get(segment)
+        if cached is not None and cached[1] == inode:
+            return cached[0]
+        fd = os.open(path, os.O_RDONLY)
+        inode = os.fstat(fd).st_ino
+        with self._lock:
+            cached = self._fds.get(segment)
+            if cached is not None and cached[1] == inode:
+                os.close(fd)
+                return cached[0]
+            self._drop_fd(segment)
+            self._fds[segment] = (fd, inode)
+        return fd
+
+    def _drop_fd(self, segment: int) -> None:
+        """Erst beim nächsten Verdichten schließen, damit laufende preads keinen neu vergebenen Deskriptor treffen."""
+        cached = self._fds.pop(segment, None)
+        if cached is not None:
+            self._retired.append(cached[0])
+
+    def _close_retired(self) -> None:
+        while self._retired:
+            os.close(self._retired.pop())
+
+    def segment_path(self, segment: int) -> Path:
+        return self.root / f"{segment:06d}.pack"
+
+    def segments(self) -> List[int]:
+        return sorted(int(path.stem) for path in self.root.glob("*.pack") if path.stem.isdigit())
+
+    def __contains__(self, key: str) -> bool:
+        return self.locate(key) is not None
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pack_entries").fetchone()[0]
+
+    def locate(self, key: str) -> Optional[PackEntry]:
+        row = self._reader().execute("SELECT segment, offset, length FROM pack_entries WHERE key = ?",
+                                     (key,)).fetchone()
+        return PackEntry(*row) if row else None
+
+    def read_entry(self, entry: PackEntry) -> Optional[bytes]:
+        try:
+            return os.pread(self._fd(entry.segment), entry.length, entry.offset)
+        except OSError:
+            return None  # Segment inzwischen durch compact() ersetzt
+
+    def read(self, key: str) -> Optional[bytes]:
+        for _ in range(2):  # compact() kann das Segment zwischen locate und Lesen ersetzen
+            entry = self.locate(key)
+            if entry is None:
+                return None
+            data = self.read_entry(entry)
+            if data is not None:
+                return data
+        return None
+
+    def _append(self, conn: sqlite3.Connection,
+                items: Iterable[Tuple[str, bytes]]) -> List[Tuple[str, int, int, int]]:
+        """
+        Hängt an das aktive Segment an (neues Segment ab segment_bytes); Aufrufer hält _locked().
+        Der Offset kommt erst unter der Sperre vom Dateiende, nicht aus einem gemerkten Wert.
+        """
+        rows = []
+        active = self._active_segment(conn)
+        f = open(self.segment_path(active), "ab")
+        try:
+            offset = f.seek(0, os.SEEK_END)
+            for key, data in items:
+                if offset and offset + len(data) > self.segment_bytes:
+                    os.fsync(f.fileno())
+                    f.close()
+                    active += 1
+                    self._set_active_segment(conn, active)
+                    f = open(self.segment_path(active), "ab")
+                    offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+                rows.append((key, active, offset, len(data)))
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        return rows
+
+    def _index(self, conn: sqlite3.Connection, rows: List[Tuple[str, int, int, int]]) -> None:
+        conn.executemany("INSERT OR REPLACE INTO pack_entries (key, segment, offset, length) VALUES (?, ?, ?, ?)",
+                         rows)
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> int:
+        """Hängt (Schlüssel, Bytes) an; ein fsync und eine Transaktion für alle."""
+        with self._locked(), self._connect() as conn:
+            rows = self._append(conn, items)
+            self._index(conn, rows)
+        return len(rows)
+
+    def put(self, key: str, data: bytes) -> None:
+        self.put_many([(key, data)])
+
+    def import_file(self, key: str, path: Path, remove: bool = True) -> bool:
+        """Übernimmt eine Einzeldatei in das Pack (und löscht sie danach)."""
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            return False
+        self.put(key, data)
+        if remove:
+            Path(path).unlink(missing_ok=True)
+        return True
+
+    def keys(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT key FROM pack_entries")]
+
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT key FROM pack_entries WHERE key GLOB ? ORDER BY key", (f"{prefix}*",))]
+
+    def delete(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        deleted = 0
+        with self._locked(), self._connect() as conn:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                deleted += conn.execute(f"DELETE FROM pack_entries WHERE key IN ({','.join('?' * len(chunk))})",
+                                        chunk).rowcount
+        return deleted
+
+    def delete_image_ids(self, image_ids: Iterable[str]) -> int:
+        """Löscht alle Einträge der Bilder: Schlüssel '<id>' und '<id>_*' (z.B. Gesichter)."""
+        deleted = 0
+        with self._locked(), self._connect() as conn:
+            for image_id in image_ids:
+                deleted += conn.execute("DELETE FROM pack_entries WHERE key = ? OR key GLOB ?",
+                                        (image_id, f"{image_id}_*")).rowcount
+        return deleted
+
+    def clear(self) -> None:
+        """Löscht alles; neue Einträge beginnen in einem neuen Segment (Nummern werden nicht wiederverwendet)."""
+        with self._locked():
+            self._close_retired()
+            with self._connect() as conn:
+                conn.execute("DELETE FROM pack_entries")
+                self._set_active_segment(conn, max([self._active_segment(conn)] + self.segments()) + 1)
+            for segment in self.segments():
+                self._drop_fd(segment)
+                self.segment_path(segment).unlink(missing_ok=True)
+
+    def live_bytes(self) -> Dict[int, int]:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT segment, SUM(length) FROM pack_entries GROUP BY segment"))
+
+    def compact(self, min_garbage: float = 0.3) -> Tuple[int, int]:
+        """
+        Schreibt Segmente (auch das aktive) mit mindestens min_garbage Anteil überschriebener/gelöschter Bytes neu
+        (lebende Einträge ans aktive Segment) und löscht sie. Liefert (Segmente, freigegebene Bytes).
+        """
+        with self._locked():
+            self._close_retired()
+        live = self.live_bytes()
+        compacted, freed = 0, 0
+        for segment in self.segments():
+            path = self.segment_path(segment)
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if size and 1 - live.get(segment, 0) / size < min_garbage:
+                continue
+            with self._locked(), self._connect() as conn:
+                if not path.exists():
+                    continue  # von einem anderen Prozess schon verdichtet
+                active = self._active_segment(conn)
+                if segment >= active:
+                    self._set_active_segment(conn, segment + 1)  # lebende Einträge in ein neues Segment
+                rows = conn.execute("SELECT key, offset, length FROM pack_entries WHERE segment = ?",
+                                    (segment,)).fetchall()
+                with open(path, "rb") as f:
+                    items = [(key, os.pread(f.fileno(), length, offset)) for key, offset, length in rows]
+                self._index(conn, self._append(conn, items))
+                conn.commit()
+                self._drop_fd(segment)
+                path.unlink()
+            compacted += 1
+            freed += size - live.get(segment, 0)
+        if compacted:
+            logger.info(f"[pack_store] 🧹 {self.root.name}: {compacted} Segmente verdichtet, {freed} Bytes frei")
+        return compacted, freed
+
+    def stats(self) -> dict:
+        segments = self.segments()
+        disk = sum(self.segment_path(segment).stat().st_size for segment in segments)
+        live = sum(self.live_bytes().values())
+        return {
+            "entries": len(self),
+            "segments": len(segments),
+            "bytes": disk,
+            "live_bytes": live,
+            "garbage": round(1 - live / disk, 3) if disk else 0.0
+        }
+
+
+def get_pack_store(root: Path) -> PackStore:
+    key = str(root)
+    store = _STORES.get(key)
+    if store is None:
+        with _LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                store = _STORES[key] = PackStore(root, Settings.PACK_SEGMENT_BYTES)
+    return store
+
+
+def get_thumbnail_pack() -> PackStore:
+    return get_pack_store(Settings.THUMBNAIL_PACK_DIR)
+
+
+def get_face_pack() -> PackStore:
+    return get_pack_store(Settings.FACE_PACK_DIR)
+
+
+def pack_loose_files(store: PackStore, directory: Path, pattern: str) -> int:
+    """Übernimmt vorhandene Einzeldateien (z.B. '*.png' im alten Thumbnail-Ordner) in das Pack."""
+    moved = 0
+    batch: List[Tuple[str, bytes]] = []
+    files: List[Path] = []
+    for file in Path(directory).glob(pattern):
+        batch.append((file.stem, file.read_bytes()))
+        files.append(file)
+        if len(batch) >= _CHUNK:
+            moved += store.put_many(batch)
+            for done in files:
+                done.unlink(missing_ok=True)
+            batch, files = [], []
+    if batch:
+        moved += store.put_many(batch)
+        for done in files:
+            done.unlink(missing_ok=True)
+    logger.info(f"[pack_store] 📦 {moved} Dateien aus {directory} übernommen")
+    return moved
+
+
+def _serve_all(make_response, keys: List[str]) -> float:
+    """Liefert alle Schlüssel über die ASGI-Antwortobjekte der Medienrouten aus (ohne HTTP-Schicht)."""
+    import asyncio
+    from starlette.requests import Request
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    async def run():
+        for key in keys:
+            scope = {"type": "http", "method": "GET", "headers": [], "path": f"/thumbnails/{key}.png"}
+            await make_response(Request(scope), key)(scope, receive, send)
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start
+
+
+def _bench(count: int, size: int = 12 * 1024) -> None:
+    """Einzeldateien gegen Pack: Schreiben, Ausliefern aller Einträge, Löschen."""
+    from ..services.media import IMMUTABLE
+    from ..services.media import media_response
+    from ..services.media import pack_response
+
+    payloads = [os.urandom(size) for _ in range(min(count, 256))]
+    with tempfile.TemporaryDirectory() as tmp:
+        loose_dir, pack_dir = Path(tmp) / "loose", Path(tmp) / "pack"
+        loose_dir.mkdir()
+        keys = [f"{i:032x}" for i in range(count)]
+
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            (loose_dir / f"{key}.png").write_bytes(payloads[i % len(payloads)])
+        loose_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = PackStore(pack_dir, Settings.PACK_SEGMENT_BYTES)
+        store.put_many((key, payloads[i % len(payloads)]) for i, key in enumerate(keys))
+        pack_write = time.perf_counter() - start
+
+        loose_read = _serve_all(lambda request, key: media_response(
+            request, loose_dir / f"{key}.png", IMMUTABLE, key), keys)
+        pack_read = _serve_all(lambda request, key: pack_response(
+            request, store, key, "image/jpeg", IMMUTABLE), keys)
+
+        start = time.perf_counter()
+        for file in loose_dir.glob("*.png"):
+            file.unlink()
+        loose_delete = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.delete(keys)
+        pack_delete = time.perf_counter() - start
+        pack_files = len(list(pack_dir.iterdir()))
+
+    logger.info(f"[pack_store] {count} × {size // 1024} KiB   Einzeldateien | Pack")
+    logger.info(f"[pack_store] Schreiben  {loose_write:8.3f}s | {pack_write:8.3f}s")
+    logger.info(f"[pack_store] Ausliefern {loose_read:8.3f}s | {pack_read:8.3f}s")
+    logger.info(f"[pack_store] Löschen    {loose_delete:8.3f}s | {pack_delete:8.3f}s")
+    logger.info(f"[pack_store] Inodes     {count:8d}  | {pack_files:8d}")
+
+
+def p4():
+    """
+    python -m app.services.pack_store pack     – alte Thumbnail- und Gesichtsdateien übernehmen
+    python -m app.services.pack_store compact  – Segmente verdichten
+    python -m app.services.pack_store bench [n]
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if command == "pack":
+        pack_loose_files(get_thumbnail_pack(), Path(Settings.THUMBNAIL_CACHE_DIR_300), "*.png")
+        pack_loose_files(get_face_pack(), Path(Settings.GESICHTER_FILE_CACHE_DIR), "*.jpg")
+    elif command == "compact":
+        get_thumbnail_pack().compact()
+        get_face_pack().compact()
+    else:
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000)
+
+
+if __name__ == "__main__":
+    p4()
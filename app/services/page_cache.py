@@ -0,0 +1,82 @@
+import hashlib
+import itertools
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+
+from ..config import Settings
+from ..services.folder_index import FolderIndex
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_COUNTER = itertools.count(1)
+# Neustart → neue ETags, auch wenn die Zähler wieder bei 0 anfangen
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+# Score-Reloads für alle Bilder (delete_scores_by_type, Neuberechnung)
+_CONTENT_GENERATION = 0
+# Bildname bzw. image_id (lowercase) -> Stempel der letzten Änderung
+_IMAGE_STAMPS: Dict[str, int] = {}
+_PAGES: "OrderedDict[str, bytes]" = OrderedDict()
+
+
+def touch_image(*keys: Optional[str]) -> None:
+    """Markiert ein Bild als geändert (Checkbox, Scores, clean(), neues Fragment)."""
+    stamp = next(_COUNTER)
+    with _LOCK:
+        for key in keys:
+            if key:
+                _IMAGE_STAMPS[str(key).lower()] = stamp
+
+
+def bump_content_generation() -> None:
+    """Änderung, die potenziell jedes Bild betrifft, z.B. Scores eines Typs neu laden."""
+    global _CONTENT_GENERATION
+    with _LOCK:
+        _CONTENT_GENERATION += 1
+        _PAGES.clear()
+
+
+def page_etag(index: FolderIndex, image_names: Iterable[str], *state) -> str:
+    """
+    Version einer Galerie-Seite: Kategorie-Generation, Score-Generation, jüngster
+    Änderungsstempel der Bilder auf der Seite und der übergebene Anfrage-/Filterzustand.
+    """
+    stamps = _IMAGE_STAMPS
+    max_stamp = 0
+    for name in image_names:
+        max_stamp = max(max_stamp, stamps.get(name, 0), stamps.get(index.image_id(name) or "", 0))
+    # mehrere Worker: Änderungen in einem anderen Prozess sind hier unsichtbar → nie 304
+    boot_id = _BOOT_ID if Settings.in_process_caches() else uuid.uuid4().hex
+    key = repr((boot_id, index.folder_name, index.generation, index.stamp, _CONTENT_GENERATION, max_stamp, state))
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def get_page(etag: str) -> Optional[bytes]:
+    with _LOCK:
+        body = _PAGES.get(etag)
+        if body is not None:
+            _PAGES.move_to_end(etag)
+        return body
+
+
+def store_page(etag: str, body: bytes) -> None:
+    if Settings.PAGE_CACHE_SIZE <= 0 or not Settings.in_process_caches():
+        return
+    with _LOCK:
+        _PAGES[etag] = body
+        _PAGES.move_to_end(etag)
+        while len(_PAGES) > Settings.PAGE_CACHE_SIZE:
+            _PAGES.popitem(last=False)
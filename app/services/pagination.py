@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from ..services.folder_index import FolderIndex
+from ..services.folder_index import get_folder_index
+from ..services.name_index import get_trigram_index
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MAX_CACHED_VIEWS = 64
+
+_LOCK = threading.Lock()
+_VIEWS: "OrderedDict[tuple, GalleryView]" = OrderedDict()
+_SUBSTRING_ORDINALS: "OrderedDict[tuple, List[int]]" = OrderedDict()
+
+
+class GalleryView:
+    """
+    Geordnete Sicht auf eine Kategorie.
+
+    Ohne Filter entspricht die Sicht direkt dem FolderIndex, mit Filter hält sie
+    die aufsteigend sortierten Ordinalzahlen (Positionen im Index) der Treffer.
+    """
+
+    def __init__(self, index: FolderIndex, ordinals: Optional[List[int]] = None):
+        self.index = index
+        self.ordinals = ordinals
+        self._ranks: Optional[Dict[int, int]] = None
+
+    @property
+    def filtered(self) -> bool:
+        return self.ordinals is not None
+
+    @property
+    def total(self) -> int:
+        return len(self.index) if self.ordinals is None else len(self.ordinals)
+
+    def page_ordinals(self, start: int, count: int) -> List[int]:
+        start = max(0, start)
+        if self.ordinals is None:
+            return list(range(start, min(start + count, len(self.index))))
+        return self.ordinals[start:start + count]
+
+    def page_names(self, start: int, count: int) -> List[str]:
+        """Bildnamen der Einträge start..start+count, unabhängig von der Seitentiefe O(count)."""
+        start = max(0, start)
+        if self.ordinals is None:
+            return self.index.names[start:start + count]
+        names = self.index.names
+        return [names[ordinal] for ordinal in self.ordinals[start:start + count]]
+
+    def rank(self, image_name: str) -> Optional[int]:
+        """0-basierte Position eines Bildes innerhalb der Sicht oder None."""
+        position = self.index.position(image_name)
+        if position is None or self.ordinals is None:
+            return position
+        if self._ranks is None:
+            self._ranks = {ordinal: rank for rank, ordinal in enumerate(self.ordinals)}
+        return self._ranks.get(position)
+
+    def page_of(self, image_name: str, count: int) -> Optional[int]:
+        """1-basierte Seite, auf der das Bild bei count Bildern pro Seite liegt."""
+        rank = self.rank(image_name)
+        return None if rank is None else rank // max(1, count) + 1
+
+
+def _remember(cache: OrderedDict, key: tuple, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED_VIEWS:
+        cache.popitem(last=False)
+
+
+def _index_key(index: FolderIndex) -> tuple:
+    return index.folder_name, index.generation, index.stamp
+
+
+def substring_ordinals(index: FolderIndex, text: str) -> List[int]:
+    """Ordinalzahlen aller Bildnamen, die text enthalten (einmal pro Index-Stand berechnet)."""
+    text = text.lower()
+    key = _index_key(index) + (text,)
+    with _LOCK:
+        cached = _SUBSTRING_ORDINALS.get(key)
+    if cached is not None:
+        return cached
+
+    ordinals = get_trigram_index(index).substring(text)
+    with _LOCK:
+        _remember(_SUBSTRING_ORDINALS, key, ordinals)
+    return ordinals
+
+
+def get_gallery_view(
+        folder_name: str,
+        match_names: Optional[Iterable[str]] = None,
+        substring: Optional[str] = None,
+        cache_key: Optional[Hashable] = None
+) -> GalleryView:
+    """
+    Baut die Sicht einer Kategorie.
+
+    Args:
+        folder_name: Kategorie
+        match_names: Bildnamen, die angezeigt werden sollen (z.B. Score-Filter), None = alle
+        substring: Zusätzlich alle Bilder, deren Name den Text enthält
+        cache_key: Wenn gesetzt, wird die Sicht pro Index-Stand unter diesem Schlüssel gemerkt
+    """
+    index = get_folder_index(folder_name)
+    if match_names is None and not substring:
+        return GalleryView(index)
+
+    key = None
+    if cache_key is not None:
+        key = _index_key(index) + (cache_key,)
+        with _LOCK:
+            view = _VIEWS.get(key)
+            if view is not None:
+                _VIEWS.move_to_end(key)
+                return view
+
+    selected = set()
+    if match_names is not None:
+        positions = index.positions
+        for name in match_names:
+            position = positions.get(name)
+            if position is not None:
+                selected.add(position)
+    if substring:
+        selected.update(substring_ordinals(index, substring))
+
+    view = GalleryView(index, sorted(selected))
+    logger.info(f"[pagination] 🧮 Sicht gebaut: {folder_name} → {view.total} von {len(index)} Bildern")
+
+    if key is not None:
+        with _LOCK:
+            _remember(_VIEWS, key, view)
+    return view
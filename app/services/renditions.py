@@ -0,0 +1,194 @@
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from PIL import features
+
+from ..config import Settings
+from ..services.folder_index import find_folder_of_image_id
+from ..services.thumbnail import get_thumbnail_engine
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_STORE: Optional["RenditionStore"] = None
+
+RENDITION_URL = "/gallery/static/renditions"
+_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+_NAME_RE = re.compile(r"^([\w-]+)_(\d+)\.(webp|jpg)$")
+
+
+@lru_cache(maxsize=1)
+def webp_supported() -> bool:
+    return features.check("webp")
+
+
+def rendition_name(image_id: str, size: int, ext: str) -> str:
+    """Inhaltsadressiert: MD5 des Originals plus Kantenlänge, z.B. '<md5>_600.webp'."""
+    return f"{image_id}_{size}.{ext}"
+
+
+def parse_rendition_name(name: str) -> Optional[Tuple[str, int, str]]:
+    """(image_id, size, ext) für gültige Namen mit konfigurierter Größe, sonst None."""
+    match = _NAME_RE.match(name)
+    if not match:
+        return None
+    image_id, size, ext = match.group(1), int(match.group(2)), match.group(3)
+    if size not in Settings.RENDITION_SIZES or (ext == "webp" and not webp_supported()):
+        return None
+    return image_id, size, ext
+
+
+def rendition_srcset(image_id: str, ext: str) -> str:
+    return ", ".join(f"{RENDITION_URL}/{rendition_name(image_id, size, ext)} {size}w"
+                     for size in Settings.RENDITION_SIZES)
+
+
+def rendition_context(image_id: Optional[str]) -> Dict[str, str]:
+    """srcset-Werte für image_entry_local.j2; WebP nur, wenn PIL es schreiben kann (sonst nur JPEG)."""
+    if not image_id:
+        return {}
+    return {
+        "rendition_webp": rendition_srcset(image_id, "webp") if webp_supported() else "",
+        "rendition_jpg": rendition_srcset(image_id, "jpg"),
+    }
+
+
+def largest_rendition_url(image_id: str) -> str:
+    return f"{RENDITION_URL}/{rendition_name(image_id, max(Settings.RENDITION_SIZES), 'jpg')}"
+
+
+class RenditionStore:
+    """
+    Verkleinerte Fassungen der Originale (RENDITION_SIZES, WebP/JPEG) unter RENDITION_DIR.
+
+    Renditions entstehen erst beim ersten Abruf in der ThumbnailEngine und werden als LRU auf
+    max_bytes Plattenplatz begrenzt. Da der Name die MD5 enthält, veralten sie nie; nicht mehr
+    benötigte fallen irgendwann aus dem LRU.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> Path:
+        return self.root / name[:2] / name
+
+    def _load(self) -> None:
+        """Bestand beim ersten Zugriff einlesen; die mtime ersetzt die LRU-Reihenfolge vor dem Neustart."""
+        if self._loaded:
+            return
+        files = []
+        if self.root.exists():
+            for file in self.root.glob("*/*"):
+                if file.suffix in (".webp", ".jpg"):
+                    stat = file.stat()
+                    files.append((stat.st_mtime, file.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.bytes += size
+        self._loaded = True
+
+    def lookup(self, name: str) -> Optional[Path]:
+        """Pfad einer vorhandenen Rendition (zählt als Zugriff) oder None."""
+        with self._lock:
+            self._load()
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return self.path(name)
+            self.misses += 1
+        return None
+
+    def submit(self, image_id: str, size: int, ext: str) -> Optional[Future]:
+        """Erzeugt eine Rendition in der ThumbnailEngine; None, wenn es kein Original zur MD5 gibt."""
+        index = find_folder_of_image_id(image_id)
+        if index is None:
+            return None
+        source = Path(Settings.IMAGE_FILE_CACHE_DIR) / index.folder_name / index.name_by_id(image_id)
+        if not source.exists():
+            return None
+        name = rendition_name(image_id, size, ext)
+        future = get_thumbnail_engine().submit_render(source, self.path(name), size, _FORMATS[ext])
+        future.add_done_callback(lambda f: self._log_failure(name, f))
+        return future
+
+    @staticmethod
+    def _log_failure(name: str, future: Future) -> None:
+        """Done-Callback: nur loggen; eingetragen wird die Rendition in ensure()."""
+        if future.cancelled():
+            logger.warning(f"[renditions] ⚠️ Erzeugen von {name} abgebrochen")
+        elif future.exception() is not None:
+            logger.error(f"[renditions] ❌ Fehler beim Erzeugen von {name}: {future.exception()}")
+
+    def add(self, name: str) -> None:
+        try:
+            size = self.path(name).stat().st_size
+        except OSError:
+            return
+        with self._lock:
+            self._load()
+            self.bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                evicted, evicted_size = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+                try:
+                    self.path(evicted).unlink()
+                except OSError:
+                    pass
+
+    def ensure(self, image_id: str, size: int, ext: str) -> Optional[Path]:
+        """Pfad der Rendition; fehlt sie, wird sie erzeugt und darauf gewartet."""
+        name = rendition_name(image_id, size, ext)
+        path = self.lookup(name)
+        if path is not None and path.is_file():
+            return path
+        future = self.submit(image_id, size, ext)
+        if future is None:
+            return None
+        try:
+            if not future.result():
+                return None
+        except Exception:
+            return None  # schon in _log_failure geloggt (auch CancelledError)
+        self.add(name)
+        return self.path(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def get_rendition_store() -> RenditionStore:
+    global _STORE
+    if _STORE is None:
+        with _LOCK:
+            if _STORE is None:
+                _STORE = RenditionStore(Settings.RENDITION_DIR, Settings.RENDITION_MAX_BYTES)
+    return _STORE
+
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..config import reverse_score_type_map
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_VERSIONS: Dict[int, int] = {}  # score_type -> Version
+_CACHE: Optional["ScoreFilterCache"] = None
+
+
+def bump_score_version(*score_types: int) -> None:
+    """Markiert Scores der Typen (oder aller, wenn keine angegeben) als geändert – auch für andere Worker."""
+    # lokaler Import: score_matrix -> score_parser -> db_utils -> score_filter_cache
+    from ..services.score_matrix import scores_written
+    with _LOCK:
+        for score_type in score_types or tuple(reverse_score_type_map):
+            _VERSIONS[score_type] = _VERSIONS.get(score_type, 0) + 1
+    scores_written()
+
+
+def score_versions(score_types: Iterable[int]) -> Tuple[Tuple[int, int], ...]:
+    with _LOCK:
+        return tuple((score_type, _VERSIONS.get(score_type, 0)) for score_type in sorted(score_types))
+
+
+class ScoreFilterCache:
+    """
+    Trefferlisten von Score-Ausdrücken. Jeder Eintrag merkt sich die Versionen der
+    verwendeten Score-Typen und gilt nur, solange sich keiner davon geändert hat.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[tuple, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, expr: str, versions: tuple) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(expr)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(expr)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[expr]
+            self.misses += 1
+            return None
+
+    def put(self, expr: str, versions: tuple, names: List[str]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[expr] = (versions, names)
+            self._entries.move_to_end(expr)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def get_score_filter_cache() -> ScoreFilterCache:
+    global _CACHE
+    if _CACHE is None:
+        with _LOCK:
+            if _CACHE is None:
+                # Versionen sind prozesslokal → bei mehreren Workern ohne Cache
+                size = Settings.SCORE_FILTER_CACHE_SIZE if Settings.in_process_caches() else 0
+                _CACHE = ScoreFilterCache(size)
+    return _CACHE
@@ -0,0 +1,166 @@
+import sqlite3
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from ..config import Settings
+from ..config import reverse_score_type_map
+from ..config import score_type_map
+from ..services.shared_versions import SCORES
+from ..services.shared_versions import bump_shared_version
+from ..services.shared_versions import shared_version
+from ..utils.logger_config import setup_logger
+from ..utils.score_parser import compile_score_expression
+
+logger = setup_logger(__name__)
+
+# int32: der Text-Score (9) ist die Textlänge und passt nicht in int8/int16
+MISSING = np.iinfo(np.int32).min
+INITIAL_CAPACITY = 1024
+
+_LOCK = threading.Lock()
+_MATRIX: Optional["ScoreMatrix"] = None
+# höchste Version einer ersetzten Matrix: der BitmapIndex vergleicht Score-Buckets mit
+# ScoreMatrix.version, eine neu geladene Matrix muss deshalb darüber weiterzählen
+_RETIRED_VERSION = 0
+
+
+class ScoreMatrix:
+    """
+    Alle Scores im Speicher: eine Zeile pro Bildname (bzw. image_id bei Gesichtern),
+    eine Spalte pro Score-Typ, MISSING für fehlende Werte.
+    """
+
+    def __init__(self):
+        self.columns: Dict[int, int] = {score_type: col for col, score_type in enumerate(sorted(reverse_score_type_map))}
+        self.names: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.values = np.full((INITIAL_CAPACITY, len(self.columns)), MISSING, dtype=np.int32)
+        self.version = 0  # wird bei jeder Änderung erhöht
+        self.shared_version = 0  # Stand von shared_versions[SCORES], den diese Matrix enthält
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _row(self, image_name: str) -> int:
+        row = self.rows.get(image_name)
+        if row is None:
+            row = len(self.names)
+            if row >= self.values.shape[0]:
+                grown = np.full((self.values.shape[0] * 2, len(self.columns)), MISSING, dtype=np.int32)
+                grown[:row] = self.values[:row]
+                self.values = grown
+            self.names.append(image_name)
+            self.rows[image_name] = row
+        return row
+
+    def load_rows(self, rows) -> None:
+        """rows: (image_name, score_type, score)"""
+        with self._lock:
+            for image_name, score_type, score in rows:
+                col = self.columns.get(score_type)
+                if col is None or score is None:
+                    continue
+                row = self._row(image_name.lower())
+                self.values[row, col] = score
+            self.version += 1
+
+    def set_scores(self, image_name: str, scores: Dict[int, int]) -> None:
+        with self._lock:
+            row = self._row(image_name.lower())
+            for score_type, score in scores.items():
+                col = self.columns.get(score_type)
+                if col is not None and score is not None:
+                    self.values[row, col] = score
+            self.version += 1
+
+    def delete_image(self, image_name: str) -> None:
+        with self._lock:
+            row = self.rows.get(image_name.lower())
+            if row is not None:
+                self.values[row, :] = MISSING
+                self.version += 1
+
+    def delete_type(self, score_type: int) -> None:
+        col = self.columns.get(score_type)
+        if col is not None:
+            with self._lock:
+                self.values[:len(self.names), col] = MISSING
+                self.version += 1
+
+    def column(self, score_type: int) -> Tuple[List[str], np.ndarray, int]:
+        """Bildnamen, Kopie der Spalte eines Score-Typs und die zugehörige Version."""
+        with self._lock:
+            count = len(self.names)
+            return self.names[:count], self.values[:count, self.columns[score_type]].copy(), self.version
+
+    def filter(self, expr: str) -> List[str]:
+        """Bildnamen (lowercase), für die der Ausdruck zutrifft; ValueError bei ungültigem Ausdruck."""
+        compiled = compile_score_expression(expr)
+        with self._lock:
+            count = len(self.names)
+            values = self.values[:count]
+            columns = {key: values[:, self.columns[score_type_map[key]]] for key in compiled.keys}
+            hits = np.flatnonzero(compiled.mask(columns, count, MISSING))
+            names = self.names
+            return [names[row] for row in hits]
+
+
+def load_score_matrix(db_path: str) -> ScoreMatrix:
+    matrix = ScoreMatrix()
+    with sqlite3.connect(db_path) as conn:
+        matrix.load_rows(conn.execute("SELECT image_name, score_type, score FROM image_quality_scores"))
+    logger.info(f"[score_matrix] 🧮 {len(matrix)} Bilder × {len(matrix.columns)} Scores geladen")
+    return matrix
+
+
+def _retire(matrix: Optional[ScoreMatrix]) -> None:
+    global _RETIRED_VERSION
+    if matrix is not None:
+        _RETIRED_VERSION = max(_RETIRED_VERSION, matrix.version)
+
+
+def get_score_matrix() -> ScoreMatrix:
+    """Die Matrix dieses Prozesses; neu geladen, wenn ein anderer Worker Scores geschrieben hat."""
+    global _MATRIX
+    current = shared_version(SCORES)
+    if _MATRIX is None or _MATRIX.shared_version != current:
+        with _LOCK:
+            if _MATRIX is None or _MATRIX.shared_version != current:
+                if _MATRIX is not None:
+                    logger.info(f"[get_score_matrix] 🔄 Scores von anderem Prozess geändert ({_MATRIX.shared_version} → {current})")
+                _retire(_MATRIX)
+                matrix = load_score_matrix(Settings.DB_PATH)
+                matrix.version += _RETIRED_VERSION
+                matrix.shared_version = current
+                _MATRIX = matrix
+    return _MATRIX
+
+
+def scores_written() -> None:
+    """
+    Nach jedem Score-Schreibzugriff: erhöht den gemeinsamen Zähler. Die eigene Matrix wird
+    vom Aufrufer inkrementell nachgeführt und bleibt gültig, solange kein anderer Prozess
+    dazwischen geschrieben hat.
+    """
+    current = bump_shared_version(SCORES)
+    matrix = _MATRIX
+    if matrix is not None and matrix.shared_version == current - 1:
+        matrix.shared_version = current
+
+
+def loaded_score_matrix() -> Optional[ScoreMatrix]:
+    """Die Matrix, falls schon geladen – für inkrementelle Updates ohne Nachladen."""
+    return _MATRIX
+
+
+def reset_score_matrix() -> None:
+    global _MATRIX
+    with _LOCK:
+        _retire(_MATRIX)
+        _MATRIX = None
@@ -0,0 +1,37 @@
+"""
+Änderungszähler in der SQLite-Datenbank, gemeinsam für alle Worker.
+
+ScoreMatrix und BitmapIndex liegen im Speicher jedes Workers. Wer Scores oder Checkboxen
+schreibt, erhöht den Zähler; get_score_matrix/get_bitmap_index vergleichen ihn pro Aufruf
+mit dem Stand ihrer Kopie und laden bei Abweichung neu.
+"""
+import sqlite3
+
+from ..config import Settings
+from ..database import shared_versions
+
+SCORES = "scores"
+CHECKBOXES = "checkboxes"
+
+
+def bump_shared_version(name: str) -> int:
+    """Erhöht den Zähler und gibt den neuen Wert zurück."""
+    with sqlite3.connect(Settings.DB_PATH) as conn:
+        shared_versions(conn)
+        rows = conn.execute("""
+                            INSERT INTO shared_versions (name, value)
+                            VALUES (?, 1) ON CONFLICT(name) DO
+                            UPDATE SET value = value + 1
+                            RETURNING value
+                            """, (name,)).fetchall()
+    return rows[0][0]
+
+
+def shared_version(name: str) -> int:
+    """Aktueller Zählerstand; 0, solange noch nie geschrieben wurde."""
+    try:
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            row = conn.execute("SELECT value FROM shared_versions WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
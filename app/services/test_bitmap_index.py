@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..config import score_type_map
+from ..database import init_db
+from ..services.bitmap_index import get_bitmap_index
+from ..services.bitmap_index import reset_bitmap_index
+from ..services.folder_index import bump_folder_generation
+from ..services.score_matrix import reset_score_matrix
+from ..services.shared_versions import CHECKBOXES
+from ..services.shared_versions import SCORES
+from ..services.shared_versions import bump_shared_version
+from ..utils.db_utils import delete_checkbox_status
+from ..utils.db_utils import save_nsfw_scores
+from ..utils.move_utils import get_checkbox_count
+from ..utils.status_utils import set_status
+
+
+class TestBitmapIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.DB_PATH = str(Path(self._tmp.name) / "test.db")
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        init_db(Settings.DB_PATH)
+        for folder, count in (("real", 100), ("delete", 5)):
+            (Path(self._tmp.name) / folder).mkdir()
+            hashes = {f"{folder}{i:03d}.png": f"md5_{folder}_{i}" for i in range(count)}
+            (Path(self._tmp.name) / folder / Settings.GALLERY_HASH_FILE).write_text(json.dumps(hashes))
+        set_status("real001.png", "delete")
+        set_status("real002.png", "delete")
+        set_status("delete001.png", "delete")
+        reset_bitmap_index()
+        reset_score_matrix()
+
+    def tearDown(self):
+        reset_bitmap_index()
+        reset_score_matrix()
+        Settings.DB_PATH = self._old_db
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def test_checkbox_count_incremental(self):
+        self.assertEqual(get_checkbox_count("delete"), {"count": 3})
+        set_status("real003.png", "delete")
+        set_status("real001.png", "delete", 0)
+        self.assertEqual(get_checkbox_count("delete"), {"count": 3})
+        delete_checkbox_status("real002.png")
+        self.assertEqual(get_checkbox_count("delete"), {"count": 2})
+
+    def test_folder_and_checkbox(self):
+        index = get_bitmap_index()
+        self.assertEqual(index.count(index.folder("real")), 100)
+        self.assertEqual(index.names_of(index.query("real", ["delete"])), ["real001.png", "real002.png"])
+        self.assertEqual(index.names_of(index.query("delete", ["delete"])), ["delete001.png"])
+
+    def test_move_and_rebuild(self):
+        index = get_bitmap_index()
+        index.folder("real")
+        index.folder("delete")
+        index.move_image("real001.png", "real", "delete")
+        self.assertEqual(index.count(index.folder("real")), 99)
+        self.assertEqual(index.count(index.query("delete", ["delete"])), 2)
+
+        bump_folder_generation("real")
+        self.assertEqual(index.count(index.folder("real")), 100)
+
+    def test_score_buckets(self):
+        save_nsfw_scores(Settings.DB_PATH, "real010.png", {"porn": 75}, score_type_map)
+        save_nsfw_scores(Settings.DB_PATH, "real011.png", {"porn": 30}, score_type_map)
+        save_nsfw_scores(Settings.DB_PATH, "delete001.png", {"porn": 90}, score_type_map)
+        index = get_bitmap_index()
+        self.assertEqual(index.names_of(index.query("real", score_ranges={"porn": (50, 101)})), ["real010.png"])
+        self.assertEqual(index.names_of(index.query(None, ["delete"], {"porn": (50, 101)})), ["delete001.png"])
+
+        save_nsfw_scores(Settings.DB_PATH, "real011.png", {"porn": 55}, score_type_map)
+        self.assertEqual(index.count(index.query("real", score_ranges={"porn": (50, 101)})), 2)
+
+    def test_reload_after_write_from_other_process(self):
+        index = get_bitmap_index()
+        set_status("real003.png", "delete")
+        self.assertIs(get_bitmap_index(), index)
+
+        # ein anderer Worker setzt eine Checkbox und schreibt einen Score
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.execute("INSERT INTO checkbox_status (image_name, checkbox, checked) VALUES (?, ?, 1)",
+                         ("real004.png", "delete"))
+        bump_shared_version(CHECKBOXES)
+        reloaded = get_bitmap_index()
+        self.assertIsNot(reloaded, index)
+        self.assertEqual(reloaded.count(reloaded.query("real", ["delete"])), 4)
+
+        self.assertEqual(reloaded.count(reloaded.query("real", score_ranges={"porn": (50, 101)})), 0)
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.execute("INSERT INTO image_quality_scores (image_name, score_type, score) VALUES (?, ?, ?)",
+                         ("real020.png", score_type_map["porn"], 80))
+        bump_shared_version(SCORES)
+        self.assertEqual(reloaded.names_of(reloaded.query("real", score_ranges={"porn": (50, 101)})),
+                         ["real020.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()
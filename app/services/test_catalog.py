@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..database import init_db
+from ..services.catalog import CatalogEntry
+from ..services.catalog import catalog_count
+from ..services.catalog import catalog_page
+from ..services.catalog import move_in_catalog
+from ..services.catalog import sync_catalog
+from ..services.catalog import sync_catalog_if_changed
+from ..services.folder_index import bump_folder_generation
+from ..services.catalog import upsert_catalog
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.DB_PATH = str(Path(self._tmp.name) / "gallery.db")
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        init_db(Settings.DB_PATH)
+
+    def tearDown(self):
+        Settings.DB_PATH = self._old_db
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def test_keyset_pages_match_sorted_order(self):
+        rng = random.Random(5)
+        entries = [CatalogEntry(f"img{i:04d}.png", f"md5_{i}", rng.choice(["real", "delete"]),
+                                float(rng.randint(0, 50)), 100) for i in range(500)]
+        upsert_catalog(entries)
+        expected = sorted((e for e in entries if e.folder == "real"), key=lambda e: (-e.capture_ts, e.name))
+
+        pages, after = [], None
+        while True:
+            page = catalog_page("real", after, 37)
+            if not page:
+                break
+            pages += page
+            after = page[-1].capture_ts, page[-1].name
+        self.assertEqual(pages, expected)
+        self.assertEqual(catalog_count("real"), len(expected))
+        self.assertEqual(catalog_page("real", None, 37, 74), expected[74:111])
+
+        # neues Bild vor dem Cursor verschiebt die folgenden Seiten nicht
+        after = expected[99].capture_ts, expected[99].name
+        upsert_catalog([CatalogEntry("neu.png", "md5_neu", "real", 1e9, 1)])
+        self.assertEqual(catalog_page("real", after, 5), expected[100:105])
+
+    def test_uses_index(self):
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT name FROM image_catalog WHERE folder = ? "
+                "AND (capture_ts < ? OR (capture_ts = ? AND name > ?)) ORDER BY capture_ts DESC, name LIMIT 10",
+                ("real", 1.0, 1.0, "a")))
+        self.assertIn("idx_image_catalog_folder_ts", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_sync_with_hash_file(self):
+        folder = Path(self._tmp.name) / "real"
+        folder.mkdir()
+        for i, name in enumerate(["a.png", "b.png", "c.png"]):
+            (folder / name).write_bytes(b"x" * (i + 1))
+            os.utime(folder / name, (1000 + i, 1000 + i))
+        (folder / Settings.GALLERY_HASH_FILE).write_text(json.dumps({"a.png": "1", "b.png": "2", "c.png": "3"}))
+        upsert_catalog([CatalogEntry("b.png", "2", "recheck", 5.0, 2), CatalogEntry("alt.png", "9", "real", 1.0, 1)])
+
+        self.assertEqual(sync_catalog("real"), (3, 1))
+        self.assertEqual(sync_catalog("real"), (0, 0))
+        page = catalog_page("real", None, 10)
+        self.assertEqual([e.name for e in page], ["c.png", "a.png", "b.png"])
+        self.assertEqual(page[0].size, 3)
+        self.assertEqual(page[2].capture_ts, 5.0)  # verschoben, Aufnahmedatum bleibt
+
+        move_in_catalog("C.png", "delete")
+        self.assertEqual(catalog_count("real"), 2)
+
+    def test_resync_on_index_change_with_same_count(self):
+        folder = Path(self._tmp.name) / "real"
+        folder.mkdir()
+        hash_file = folder / Settings.GALLERY_HASH_FILE
+        hash_file.write_text(json.dumps({"a.png": "1", "b.png": "2"}))
+        bump_folder_generation("real")
+        sync_catalog_if_changed("real")
+        self.assertEqual(sorted(e.name for e in catalog_page("real", None, 10)), ["a.png", "b.png"])
+
+        hash_file.write_text(json.dumps({"a.png": "1", "c.png": "3"}))  # gleiche Anzahl, anderes Bild
+        bump_folder_generation("real")
+        sync_catalog_if_changed("real")
+        self.assertEqual(sorted(e.name for e in catalog_page("real", None, 10)), ["a.png", "c.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()
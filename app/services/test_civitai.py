@@ -0,0 +1,80 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services import civitai
+from ..services.civitai import CivitaiResolver
+from ..services.civitai import get_cached_civitai_url
+from ..services.civitai import settle_civitai_url
+from ..services.civitai import store_civitai_url
+from ..services.civitai_stub import start_stub_server
+
+
+class TestCivitaiResolver(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        Settings.DB_PATH = str(Path(self._tmp.name) / "test.db")
+        civitai._MEMORY.clear()
+        self.server, base_url = start_stub_server({"12345"})
+        self.changed = []
+        self.resolver = CivitaiResolver(
+            base_url, max_concurrency=2, timeout=2.0,
+            on_changed=lambda name, image_id: self.changed.append((name, image_id))
+        )
+
+    def tearDown(self):
+        self.resolver.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        civitai._MEMORY.clear()
+        Settings.DB_PATH = self._old_db
+        self._tmp.cleanup()
+
+    def test_positive_and_negative(self):
+        self.resolver.submit("12345.png", "md5_a")
+        self.resolver.submit("99999.png", "md5_b")
+        self.assertTrue(self.resolver.wait_idle())
+
+        self.assertEqual(get_cached_civitai_url("12345.png"), (True, f"{self.resolver.base_url}/12345"))
+        self.assertEqual(get_cached_civitai_url("99999.png"), (True, None))
+        # nur gefundene Links invalidieren das Fragment
+        self.assertEqual(self.changed, [("12345.png", "md5_a")])
+
+    def test_persisted_across_memory(self):
+        store_civitai_url("1.png", "https://example/1", 60)
+        civitai._MEMORY.clear()
+        self.assertEqual(get_cached_civitai_url("1.png"), (True, "https://example/1"))
+
+    def test_expired(self):
+        store_civitai_url("1.png", "https://example/1", -1)
+        known, url = get_cached_civitai_url("1.png")
+        self.assertFalse(known)
+        self.assertEqual(url, "https://example/1")
+
+    def test_submit_deduplicates(self):
+        self.assertTrue(self.resolver.submit("12345.png"))
+        self.assertFalse(self.resolver.submit("12345.png"))
+        self.assertTrue(self.resolver.wait_idle())
+        time.sleep(0.01)
+        self.assertEqual(len(self.changed), 1)
+
+    def test_settle_invalidates_when_resolver_was_faster(self):
+        invalidated = []
+        old_invalidate = civitai._invalidate_fragment
+        civitai._invalidate_fragment = lambda name, image_id: invalidated.append((name, image_id))
+        try:
+            # Resolver hat den Link gespeichert, bevor das Fragment (ohne Link) abgelegt war
+            store_civitai_url("12345.png", "https://example/12345", 60)
+            settle_civitai_url("12345.png", "md5_a", None)
+            settle_civitai_url("12345.png", "md5_a", "https://example/12345")
+        finally:
+            civitai._invalidate_fragment = old_invalidate
+        self.assertEqual(invalidated, [("12345.png", "md5_a")])
+
+
+if __name__ == '__main__':
+    unittest.main()
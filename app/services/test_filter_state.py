@@ -0,0 +1,52 @@
+import unittest
+
+from starlette.requests import Request
+
+from ..services.filter_state import HISTORY_SIZE
+from ..services.filter_state import FilterState
+from ..services.filter_state import get_filter_state
+from ..services.filter_state import save_filter_state
+
+
+def _request(session=None) -> Request:
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": b""}
+    if session is not None:
+        scope["session"] = session
+    return Request(scope=scope)
+
+
+class TestFilterState(unittest.TestCase):
+
+    def test_history(self):
+        state = FilterState()
+        for i in range(HISTORY_SIZE + 5):
+            state.set_filter(f"nsfw > {i}")
+        state.set_filter("nsfw > 3")
+        self.assertEqual(state.filter_text, "nsfw > 3")
+        self.assertEqual(state.filter_history[:2], ["nsfw > 3", f"nsfw > {HISTORY_SIZE + 4}"])
+        self.assertEqual(len(state.filter_history), HISTORY_SIZE)
+        self.assertEqual(state.filter_history.count("nsfw > 3"), 1)
+
+        state.set_filter("")
+        self.assertIsNone(state.filter_text)
+        self.assertEqual(len(state.filter_history), HISTORY_SIZE)
+
+    def test_sessions_are_separate(self):
+        first, second = _request({}), _request({})
+        state = get_filter_state(first)
+        state.set_search("strand")
+        save_filter_state(first, state)
+
+        self.assertEqual(get_filter_state(first).search_text, "strand")
+        self.assertEqual(get_filter_state(first).search_history, ["strand"])
+        self.assertIsNone(get_filter_state(second).search_text)
+
+    def test_without_session(self):
+        state = get_filter_state(_request())
+        self.assertIsNone(state.filter_text)
+        self.assertEqual(state.search_history, [])
+        self.assertIsNone(FilterState.from_dict("kaputt").search_text)
+
+
+if __name__ == '__main__':
+    unittest.main()
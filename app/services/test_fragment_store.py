@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services.fragment_store import FragmentStore
+from ..services.fragment_store import fragment_variant
+from ..services.fragment_store import get_fragment_store
+from ..services.fragment_store import migrate_rendered_html_dir
+
+MD5_A = "a" * 32
+MD5_B = "b" * 32
+
+
+class TestFragmentStore(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_dir = Settings.RENDERED_HTML_DIR
+        Settings.RENDERED_HTML_DIR = self._tmp.name
+        self.store = FragmentStore(Path(self._tmp.name) / "test.db")
+
+    def tearDown(self):
+        Settings.RENDERED_HTML_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def test_put_get_many(self):
+        self.store.put(MD5_A, "1", "<a1>")
+        self.store.put(MD5_A, "2", "<a2>")
+        self.store.put(MD5_B, "1", "<b1>")
+        self.assertEqual(self.store.get(MD5_A, "2"), "<a2>")
+        self.assertIsNone(self.store.get(MD5_B, "2"))
+        self.assertEqual(
+            self.store.get_many([(MD5_A, "1"), (MD5_B, "1"), (MD5_B, "3")]),
+            {(MD5_A, "1"): "<a1>", (MD5_B, "1"): "<b1>"})
+
+    def test_delete_image(self):
+        self.store.put(MD5_A, "1", "<a1>")
+        self.store.put(MD5_A, "1_UserType.GUEST", "<a1g>")
+        self.store.put(MD5_B, "1", "<b1>")
+        self.assertEqual(self.store.delete_image(MD5_A), 2)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.total_bytes, 4)
+
+    def test_eviction(self):
+        store = FragmentStore(Path(self._tmp.name) / "small.db", max_bytes=1000)
+        for i in range(20):
+            store.put(f"{i:032d}", "1", "x" * 100)
+        self.assertLessEqual(store.total_bytes, 1000)
+        self.assertIsNone(store.get(f"{0:032d}", "1"))
+        self.assertIsNotNone(store.get(f"{19:032d}", "1"))
+
+    def test_migration(self):
+        old_dir = Path(self._tmp.name)
+        (old_dir / f"{MD5_A}_1.j2").write_text("<a1>", encoding="utf-8")
+        (old_dir / f"{Settings.COMFYUI}_{MD5_B}_1_UserType.GUEST.j2").write_text("<b1>", encoding="utf-8")
+        store = get_fragment_store()
+        store.put(MD5_A, "2_UserType.GUEST", "<a2g>")
+        store.put(MD5_A, fragment_variant("real"), "<a>")
+        store.put(MD5_B, fragment_variant(Settings.COMFYUI), "<b>")
+
+        self.assertEqual(migrate_rendered_html_dir(old_dir), 3)
+        self.assertEqual(list(old_dir.glob("*.j2")), [])
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get(MD5_B, fragment_variant(Settings.COMFYUI)), "<b>")
+
+
+if __name__ == '__main__':
+    unittest.main()
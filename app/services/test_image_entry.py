@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..config import UserType
+from ..services.image_entry import TEXT_MARKER
+from ..services.image_entry import compose_entry
+from ..services.image_entry import render_static_part
+from ..services.image_entry import text_part
+from ..services.text_cache import get_text_cache
+
+TEXT = "Aufgenommen: 2024-05-01\nZweite Zeile\n\nThe end\n\nClose"
+
+
+class TestImageEntry(unittest.TestCase):
+
+    def setUp(self):
+        self._old_user_type = Settings.get_user_type()
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_text_dir = Settings.TEXT_FILE_CACHE_DIR
+        self._old_index = Settings.TEXT_INDEX_PATH
+        self._old_secret = Settings.MEDIA_URL_SECRET
+        Settings.MEDIA_URL_SECRET = "test"
+        Settings.TEXT_FILE_CACHE_DIR = self._tmp.name
+        Settings.TEXT_INDEX_PATH = Path(self._tmp.name) / "text_index.db"
+        (Path(self._tmp.name) / "a.png.txt").write_text(TEXT, encoding="utf-8")
+        get_text_cache().clear()
+        self.static_html = render_static_part(
+            thumbnail_src="/thumb.png",
+            image_name="a.png",
+            civitai=None,
+            folder_name="real",
+            image_id="md5_a",
+            quality_scores={},
+            nsfw_scores={},
+            extra_thumbnails=[]
+        )
+
+    def tearDown(self):
+        Settings.set_user_type(self._old_user_type)
+        get_text_cache().clear()
+        Settings.TEXT_FILE_CACHE_DIR = self._old_text_dir
+        Settings.TEXT_INDEX_PATH = self._old_index
+        Settings.MEDIA_URL_SECRET = self._old_secret
+        self._tmp.cleanup()
+
+    def test_text_variants(self):
+        self.assertEqual(text_part("a.png", "1"), ("", False))
+        self.assertEqual(text_part("a.png", "2"), (TEXT, False))
+        self.assertEqual(text_part("a.png", "3"), ("Aufgenommen: 2024-05-01", False))
+        self.assertEqual(text_part("a.png", "4"), ("Aufgenommen: 2024-05-01\nZweite Zeile", False))
+        self.assertEqual(text_part("b.png", "2"), (Settings.KEIN_TEXT_GEFUNDEN, True))
+        self.assertEqual(text_part("b.png", "4"), (Settings.KEIN_TEXT_GEFUNDEN, True))
+
+    def test_full_text_after_cache_clear(self):
+        # Fragment-Treffer nach einem Neustart: der TextCache ist leer, der Text kommt aus der Datei
+        text_part("a.png", "2")
+        get_text_cache().clear()
+        self.assertEqual(text_part("a.png", "2"), (TEXT, False))
+        self.assertEqual(get_text_cache().get("a.png"), TEXT)
+
+    def test_summary_without_text_cache(self):
+        self.assertEqual(text_part("a.png", "3"), ("Aufgenommen: 2024-05-01", False))
+        self.assertEqual(text_part("a.png", "4"), ("Aufgenommen: 2024-05-01\nZweite Zeile", False))
+        self.assertEqual(len(get_text_cache()), 0)
+
+    def test_capture_falls_back_to_full_text(self):
+        text = "Strand bei Sonnenuntergang\n\nThe end"
+        (Path(self._tmp.name) / "c.png.txt").write_text(text, encoding="utf-8")
+        self.assertEqual(text_part("c.png", "3"), (text, False))
+        self.assertEqual(text_part("c.png", "4"), ("Strand bei Sonnenuntergang", False))
+
+    def test_compose_per_user_type(self):
+        self.assertIn(TEXT_MARKER, self.static_html)
+
+        Settings.set_user_type(UserType.ADMIN)
+        admin = compose_entry(self.static_html, "md5_a", "a.png", "<b>Text</b>")
+        Settings.set_user_type(UserType.GUEST)
+        guest = compose_entry(self.static_html, "md5_a", "a.png", "")
+
+        self.assertIn('name="md5_a_sex"', admin)
+        self.assertNotIn('name="md5_a_sex"', guest)
+        self.assertIn("move('top','a.png')", guest)
+        self.assertIn("<b>Text</b>", admin)
+        self.assertIn('data-original="/gallery/static/imagefiles/real/a.png?e=', guest)
+        self.assertNotIn(TEXT_MARKER, guest)
+
+
+if __name__ == '__main__':
+    unittest.main()
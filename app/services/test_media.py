@@ -0,0 +1,152 @@
+import asyncio
+import html
+import json
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import Depends
+from fastapi import FastAPI
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from ..config import Settings
+from ..dependencies import require_media_access
+from ..services.folder_index import bump_folder_generation
+from ..services.media import IMMUTABLE
+from ..services.media import MediaFileResponse
+from ..services.media import MediaSessionMiddleware
+from ..services.media import media_response
+from ..services.media import media_url_epoch
+from ..services.media import media_url_secret
+from ..services.media import resolve_image_file
+from ..services.media import sign_media_urls
+from ..services.media import signed_media_url
+from ..services.media import verify_media_signature
+
+
+class TestMedia(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.file = self.root / "md5a.png"
+        self.file.write_bytes(bytes(range(256)) * 4)
+
+        async def endpoint(request):
+            return media_response(request, self.file, IMMUTABLE, "md5a.png") or PlainTextResponse("", 404)
+
+        self.client = TestClient(Starlette(routes=[Route("/f", endpoint)]))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_headers_conditional_and_range(self):
+        response = self.client.get("/f")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"md5a.png"')
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE)
+
+        response = self.client.get("/f", headers={"If-None-Match": 'W/"x", "md5a.png"'})
+        self.assertEqual((response.status_code, response.content), (304, b""))
+
+        response = self.client.get("/f", headers={"Range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, bytes(range(10, 20)))
+
+    def test_pathsend_when_offered(self):
+        messages = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "headers": [], "extensions": {"http.response.pathsend": {}}}
+        asyncio.run(MediaFileResponse(self.file)(scope, receive, send))
+        self.assertEqual([m["type"] for m in messages], ["http.response.start", "http.response.pathsend"])
+        self.assertEqual(messages[1]["path"], str(self.file))
+
+    def test_resolve_moved_image(self):
+        old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.IMAGE_FILE_CACHE_DIR = str(self.root)
+        try:
+            for folder in ("real", "delete"):
+                (self.root / folder).mkdir()
+            (self.root / "delete" / "a.png").write_bytes(b"x")
+            (self.root / "delete" / Settings.GALLERY_HASH_FILE).write_text(json.dumps({"a.png": "1"}))
+            bump_folder_generation()
+            self.assertEqual(resolve_image_file(self.root, "real/a.png"), self.root / "delete" / "a.png")
+            self.assertIsNone(resolve_image_file(self.root, "real/fehlt.png"))
+        finally:
+            Settings.IMAGE_FILE_CACHE_DIR = old_dir
+            bump_folder_generation()
+
+
+class TestSignedMediaUrls(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_secret = Settings.MEDIA_URL_SECRET
+        self._old_secret_file = Settings.MEDIA_URL_SECRET_FILE
+        Settings.MEDIA_URL_SECRET = None
+        Settings.MEDIA_URL_SECRET_FILE = Path(self._tmp.name) / "media_url_secret"
+
+    def tearDown(self):
+        Settings.MEDIA_URL_SECRET = self._old_secret
+        Settings.MEDIA_URL_SECRET_FILE = self._old_secret_file
+        self._tmp.cleanup()
+
+    def test_secret_is_shared_through_file(self):
+        secret = media_url_secret()
+        self.assertEqual(Settings.MEDIA_URL_SECRET_FILE.read_text(), secret)
+        Settings.MEDIA_URL_SECRET = None  # zweiter Prozess
+        self.assertEqual(media_url_secret(), secret)
+        self.assertEqual(list(Path(self._tmp.name).iterdir()), [Settings.MEDIA_URL_SECRET_FILE])
+
+    def test_sign_and_verify(self):
+        page = ('<img src="/gallery/static/thumbnails/m.png" '
+                'srcset="/gallery/static/renditions/m_150.jpg 150w, /gallery/static/renditions/m_300.jpg 300w">')
+        signed = html.unescape(sign_media_urls(page))
+        self.assertIn('/thumbnails/m.png"', signed)
+        urls = re.findall(r"/gallery/static/renditions/(m_\d+\.jpg)\?e=(\d+)&s=(\w+)", signed)
+        self.assertEqual(len(urls), 2)
+        name, expires, signature = urls[0]
+        self.assertTrue(verify_media_signature(f"renditions/{name}", expires, signature))
+        self.assertFalse(verify_media_signature("renditions/m_300.jpg", expires, signature))
+        self.assertFalse(verify_media_signature(f"renditions/{name}", str(int(expires) + 1), signature))
+        self.assertFalse(verify_media_signature(f"renditions/{name}", "1", signature))
+
+    def test_signed_url_for_templates(self):
+        url = signed_media_url("imagefiles/real/a b.png")
+        self.assertTrue(url.startswith("/gallery/static/imagefiles/real/a%20b.png?e="))
+        expires, signature = re.search(r"\?e=(\d+)&s=(\w+)$", url).groups()
+        self.assertTrue(verify_media_signature("imagefiles/real/a b.png", expires, signature))
+
+    def test_epoch_is_stable_within_half_ttl(self):
+        step = Settings.MEDIA_URL_TTL // 2
+        self.assertEqual(media_url_epoch(10 * step), media_url_epoch(11 * step - 1))
+        self.assertGreaterEqual(media_url_epoch(11 * step - 1) - (11 * step - 1), step)
+
+    def test_signed_request_skips_session(self):
+        app = FastAPI()
+
+        @app.get("/static/imagefiles/{file_path:path}")
+        async def endpoint(file_path: str, user=Depends(require_media_access)):
+            return {"user": user}
+
+        app.add_middleware(MediaSessionMiddleware, secret_key="test")
+        client = TestClient(app, follow_redirects=False)
+        url = html.unescape(re.search(r'"/gallery(.*?)"', sign_media_urls('"/gallery/static/imagefiles/real/a.png"')).group(1))
+
+        self.assertEqual(client.get(url).json(), {"user": None})
+        self.assertEqual(client.get("/static/imagefiles/real/a.png").status_code, 307)
+        self.assertEqual(client.get(url.replace("a.png", "b.png")).status_code, 307)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services.folder_index import bump_folder_generation
+from ..services.folder_index import get_folder_index
+from ..services.name_index import get_trigram_index
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        folder = Path(self._tmp.name) / "real"
+        folder.mkdir()
+        rng = random.Random(3)
+        names = [f"{''.join(rng.choices('abcxyz_0123', k=rng.randint(1, 12)))}.png" for _ in range(2000)]
+        names += ["Strand_Sonnenuntergang.jpg", "straße_ä.png", "ab"]
+        self.hash_file = folder / Settings.GALLERY_HASH_FILE
+        self.hash_file.write_text(json.dumps({name: f"md5_{i}" for i, name in enumerate(names)}))
+
+    def tearDown(self):
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def test_substring_matches_scan(self):
+        index = get_folder_index("real")
+        trigrams = get_trigram_index(index)
+        for text in ["abc", "x_0", "a", "ab", ".png", "zz1", "STRAND", "raße", "nothing-here", "c.png"]:
+            expected = [ordinal for ordinal, name in enumerate(index.names) if text.lower() in name]
+            self.assertEqual(trigrams.substring(text), expected, text)
+
+    def test_fuzzy(self):
+        index = get_folder_index("real")
+        ordinals = get_trigram_index(index).fuzzy("strand_sonenuntergang")
+        self.assertIn(index.position("strand_sonnenuntergang.jpg"), ordinals)
+        self.assertEqual(get_trigram_index(index).fuzzy("qqqqqq"), [])
+
+    def test_empty_folder(self):
+        trigrams = get_trigram_index(get_folder_index("missing"))
+        self.assertEqual(trigrams.substring("abc"), [])
+        self.assertEqual(trigrams.fuzzy("abc"), [])
+
+    def test_rebuilt_on_generation(self):
+        trigrams = get_trigram_index(get_folder_index("real"))
+        self.assertIs(get_trigram_index(get_folder_index("real")), trigrams)
+        bump_folder_generation("real")
+        self.assertIsNot(get_trigram_index(get_folder_index("real")), trigrams)
+
+
+if __name__ == '__main__':
+    unittest.main()
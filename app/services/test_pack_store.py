@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from ..services.media import IMMUTABLE
+from ..services.media import pack_response
+from ..services.pack_store import PackStore
+from ..services.pack_store import pack_loose_files
+
+
+class TestPackStore(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.store = PackStore(self.root / "packs", 1000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_put_read_delete(self):
+        self.store.put_many([("a", b"A" * 400), ("a_0", b"face0"), ("a_1", b"face1"), ("b", b"B" * 700)])
+        self.assertEqual(self.store.segments(), [1, 2])  # b passt nicht mehr in Segment 1
+        self.assertEqual(self.store.read("b"), b"B" * 700)
+        self.assertEqual(self.store.keys_with_prefix("a_"), ["a_0", "a_1"])
+
+        self.store.put("a", b"neu")
+        self.assertEqual(self.store.read("a"), b"neu")
+        self.assertEqual(self.store.delete_image_ids(["a"]), 3)
+        self.assertIsNone(self.store.read("a_0"))
+        self.assertEqual(len(self.store), 1)
+
+    def test_compact_keeps_live_entries(self):
+        self.store.put_many([(f"k{i}", bytes([i]) * 300) for i in range(6)])
+        self.store.delete(["k0", "k1", "k2", "k4"])
+        disk_before = self.store.stats()["bytes"]
+
+        compacted, freed = self.store.compact()
+        self.assertGreater(compacted, 0)
+        self.assertEqual(freed, 4 * 300)
+        self.assertEqual(self.store.stats()["bytes"], disk_before - freed)
+        self.assertEqual((self.store.read("k3"), self.store.read("k5")), (bytes([3]) * 300, bytes([5]) * 300))
+        self.assertEqual(self.store.compact(), (0, 0))
+
+        reopened = PackStore(self.root / "packs", 1000)
+        reopened.put("k6", b"x")
+        self.assertEqual(reopened.read("k5"), bytes([5]) * 300)
+
+    def test_two_processes_share_one_root(self):
+        other = PackStore(self.root / "packs", 1000)  # eigener fd-Cache wie ein zweiter Worker
+        self.store.put("a", b"alt")
+        self.assertEqual(other.read("a"), b"alt")  # Segment 1 bei other geöffnet
+
+        self.store.clear()
+        self.store.put("b", b"neu")
+        self.assertNotIn(1, self.store.segments())
+        self.assertIsNone(other.read("a"))
+        self.assertEqual(other.read("b"), b"neu")
+
+        other.put("c", b"C" * 10)
+        self.store.put("d", b"D" * 10)
+        self.assertEqual([other.read(key) for key in "bcd"], [b"neu", b"C" * 10, b"D" * 10])
+        self.assertEqual(len({other.locate(key).offset for key in "bcd"}), 3)
+
+        self.store.compact(min_garbage=0.0)
+        self.assertEqual(other.read("c"), b"C" * 10)
+
+    def test_import_loose_files_and_serve(self):
+        loose = self.root / "thumbs"
+        loose.mkdir()
+        (loose / "md5a.png").write_bytes(b"jpeg-bytes")
+        self.assertEqual(pack_loose_files(self.store, loose, "*.png"), 1)
+        self.assertEqual(list(loose.iterdir()), [])
+
+        async def endpoint(request):
+            key = request.path_params["key"]
+            return pack_response(request, self.store, key, "image/jpeg", IMMUTABLE) or PlainTextResponse("", 404)
+
+        client = TestClient(Starlette(routes=[Route("/t/{key}", endpoint)]))
+        response = client.get("/t/md5a")
+        self.assertEqual((response.status_code, response.content), (200, b"jpeg-bytes"))
+        self.assertEqual(response.headers["content-length"], "10")
+        self.assertEqual(client.get("/t/md5a", headers={"If-None-Match": response.headers["etag"]}).status_code, 304)
+        self.assertEqual(client.get("/t/fehlt").status_code, 404)
+
+        response = client.get("/t/md5a", headers={"Range": "bytes=2-5"})
+        self.assertEqual((response.status_code, response.content), (206, b"eg-b"))
+        self.assertEqual(response.headers["content-range"], "bytes 2-5/10")
+        self.assertEqual(client.get("/t/md5a", headers={"Range": "bytes=-3"}).content, b"tes")
+        self.assertEqual(client.get("/t/md5a", headers={"Range": "bytes=10-"}).status_code, 416)
+        self.assertEqual(client.get("/t/md5a", headers={"Range": "bytes=0-1,4-5"}).status_code, 200)
+        self.assertEqual(client.get("/t/md5a", headers={"Range": "bytes=2-5", "If-Range": '"alt"'}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
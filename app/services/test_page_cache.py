@@ -0,0 +1,81 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services.folder_index import bump_folder_generation
+from ..services.folder_index import get_folder_index
+from ..services.page_cache import bump_content_generation
+from ..services.page_cache import etag_matches
+from ..services.page_cache import get_page
+from ..services.page_cache import page_etag
+from ..services.page_cache import store_page
+from ..services.page_cache import touch_image
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        folder = Path(self._tmp.name) / "real"
+        folder.mkdir()
+        hashes = {f"img{i:03d}.png": f"md5_{i:03d}" for i in range(10)}
+        (folder / Settings.GALLERY_HASH_FILE).write_text(json.dumps(hashes))
+        self.page = ["img000.png", "img001.png"]
+
+    def tearDown(self):
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def etag(self, *state):
+        return page_etag(get_folder_index("real"), self.page, *state)
+
+    def test_stable_without_changes(self):
+        self.assertEqual(self.etag("page=1"), self.etag("page=1"))
+        self.assertNotEqual(self.etag("page=1"), self.etag("page=2"))
+
+    def test_changes_bump_etag(self):
+        etag = self.etag()
+        touch_image("img005.png")
+        self.assertEqual(self.etag(), etag)
+        touch_image("MD5_001")
+        self.assertNotEqual(self.etag(), etag)
+
+        etag = self.etag()
+        bump_content_generation()
+        self.assertNotEqual(self.etag(), etag)
+
+        etag = self.etag()
+        bump_folder_generation("real")
+        self.assertNotEqual(self.etag(), etag)
+
+    def test_if_none_match(self):
+        etag = self.etag()
+        self.assertTrue(etag_matches(f'"x", {etag}', etag))
+        self.assertTrue(etag_matches(etag.removeprefix("W/"), etag))
+        self.assertFalse(etag_matches('"x"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+    def test_page_lru(self):
+        store_page("a", b"A")
+        self.assertEqual(get_page("a"), b"A")
+        for i in range(Settings.PAGE_CACHE_SIZE):
+            store_page(str(i), b"")
+        self.assertIsNone(get_page("a"))
+
+    def test_no_reuse_with_several_workers(self):
+        old_workers = Settings.WORKERS
+        Settings.WORKERS = 2
+        try:
+            self.assertNotEqual(self.etag(), self.etag())
+            store_page("w", b"W")
+            self.assertIsNone(get_page("w"))
+        finally:
+            Settings.WORKERS = old_workers
+
+
+if __name__ == '__main__':
+    unittest.main()
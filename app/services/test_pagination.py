@@ -0,0 +1,61 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services.folder_index import bump_folder_generation
+from ..services.folder_index import get_folder_index
+from ..services.pagination import get_gallery_view
+
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.IMAGE_FILE_CACHE_DIR = self._tmp.name
+        folder = Path(self._tmp.name) / "real"
+        folder.mkdir()
+        self.hash_file = folder / Settings.GALLERY_HASH_FILE
+        self.hashes = {f"img{i:03d}.png": f"md5_{i:03d}" for i in range(100)}
+        self.hash_file.write_text(json.dumps(self.hashes))
+
+    def tearDown(self):
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        self._tmp.cleanup()
+
+    def test_index_lookups(self):
+        index = get_folder_index("real")
+        self.assertEqual(len(index), 100)
+        self.assertEqual(index.position("IMG010.png"), 10)
+        self.assertEqual(index.image_id("img010.png"), "md5_010")
+        self.assertEqual(index.name_by_id("md5_042"), "img042.png")
+        self.assertIs(get_folder_index("real"), index)
+
+    def test_index_reload_on_generation(self):
+        index = get_folder_index("real")
+        bump_folder_generation("real")
+        self.assertIsNot(get_folder_index("real"), index)
+
+    def test_unfiltered_page(self):
+        view = get_gallery_view("real")
+        self.assertEqual(view.total, 100)
+        self.assertEqual(view.page_names(95, 10), [f"img{i:03d}.png" for i in range(95, 100)])
+        self.assertEqual(view.page_of("img050.png", 6), 9)
+
+    def test_filtered_page(self):
+        names = ["img090.png", "img003.png", "unknown.png", "img050.png"]
+        view = get_gallery_view("real", match_names=names)
+        self.assertEqual(view.total, 3)
+        self.assertEqual(view.page_names(0, 2), ["img003.png", "img050.png"])
+        self.assertEqual(view.rank("img090.png"), 2)
+        self.assertIsNone(view.rank("img004.png"))
+
+    def test_substring_and_names(self):
+        view = get_gallery_view("real", match_names=["img001.png"], substring="g09")
+        self.assertEqual(view.page_names(0, 20), ["img001.png"] + [f"img{i:03d}.png" for i in range(90, 100)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import tempfile
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+
+from PIL import Image
+
+from ..config import Settings
+from ..services.folder_index import bump_folder_generation
+from ..services.renditions import RenditionStore
+from ..services.renditions import parse_rendition_name
+from ..services.renditions import rendition_context
+from ..services.thumbnail import get_thumbnail_engine
+
+
+class TestRenditions(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        Settings.IMAGE_FILE_CACHE_DIR = str(self.root / "images")
+        folder = self.root / "images" / "real"
+        folder.mkdir(parents=True)
+        Image.new("RGB", (2000, 1000), (10, 120, 200)).save(folder / "a.jpg", format="JPEG")
+        (folder / Settings.GALLERY_HASH_FILE).write_text(json.dumps({"a.jpg": "md5a"}))
+        bump_folder_generation()
+
+    def tearDown(self):
+        get_thumbnail_engine().shutdown()
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        bump_folder_generation()
+        self._tmp.cleanup()
+
+    def test_names_and_srcset(self):
+        self.assertEqual(parse_rendition_name("md5a_600.jpg"), ("md5a", 600, "jpg"))
+        self.assertIsNone(parse_rendition_name("md5a_601.jpg"))
+        self.assertIsNone(parse_rendition_name("../x_600.jpg"))
+        context = rendition_context("md5a")
+        self.assertTrue(context["rendition_jpg"].endswith("/md5a_1600.jpg 1600w"))
+        self.assertEqual(context["rendition_jpg"].count("w, "), len(Settings.RENDITION_SIZES) - 1)
+
+    def test_lazy_generation_and_lru_cap(self):
+        store = RenditionStore(self.root / "renditions", 10 ** 9)
+        path = store.ensure("md5a", 600, "webp")
+        with Image.open(path) as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (600, 300)))
+        self.assertEqual(store.ensure("md5a", 600, "webp"), path)
+        self.assertIsNone(store.ensure("fehlt", 600, "jpg"))
+        self.assertEqual((store.stats()["hits"], store.stats()["entries"]), (1, 1))
+
+        store.ensure("md5a", 150, "jpg")
+        store.max_bytes = path.stat().st_size
+        store.ensure("md5a", 300, "jpg")  # verdrängt die älteren
+        self.assertFalse(path.exists())
+        self.assertEqual(store.stats()["entries"], 1)
+
+        reloaded = RenditionStore(self.root / "renditions", 10 ** 9)
+        self.assertIsNotNone(reloaded.lookup("md5a_300.jpg"))
+
+    def test_cancelled_render_is_only_logged(self):
+        future = Future()
+        future.cancel()
+        with self.assertLogs("app.services.renditions", level="WARNING"):
+            RenditionStore._log_failure("md5a_600.jpg", future)
+        store = RenditionStore(self.root / "renditions", 10 ** 9)
+        store.ensure("md5a", 300, "jpg")
+        self.assertEqual(store.stats()["entries"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..config import score_type_map
+from ..database import init_db
+from ..services.score_filter_cache import ScoreFilterCache
+from ..services.score_filter_cache import score_versions
+from ..utils.db_utils import save_nsfw_scores
+from ..utils.db_utils import save_quality_scores
+from ..utils.score_utils import delete_scores
+from ..utils.score_utils import delete_scores_by_type
+
+PORN = score_type_map["porn"]
+Q1 = score_type_map["q1"]
+
+
+class TestScoreFilterCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        Settings.DB_PATH = str(Path(self._tmp.name) / "test.db")
+        init_db(Settings.DB_PATH)
+
+    def tearDown(self):
+        Settings.DB_PATH = self._old_db
+        self._tmp.cleanup()
+
+    def test_versions_bumped_by_writes(self):
+        def versions():
+            return dict(score_versions([PORN, Q1]))
+
+        before = versions()
+        save_nsfw_scores(Settings.DB_PATH, "a.png", {"porn": 10}, score_type_map)
+        after = versions()
+        self.assertNotEqual(before[PORN], after[PORN])
+        self.assertEqual(before[Q1], after[Q1])
+
+        save_quality_scores(Settings.DB_PATH, "a.png", {"q1": 10}, score_type_map)
+        self.assertNotEqual(after[Q1], versions()[Q1])
+
+        before = versions()
+        delete_scores("a.png")
+        after = versions()
+        self.assertNotEqual(before[PORN], after[PORN])
+        self.assertNotEqual(before[Q1], after[Q1])
+
+        before = versions()
+        delete_scores_by_type(Q1)
+        after = versions()
+        self.assertEqual(before[PORN], after[PORN])
+        self.assertNotEqual(before[Q1], after[Q1])
+
+    def test_stale_entry_is_miss(self):
+        cache = ScoreFilterCache(8)
+        versions = score_versions([PORN])
+        cache.put("porn > 50", versions, ["a.png"])
+        self.assertEqual(cache.get("porn > 50", versions), ["a.png"])
+
+        save_nsfw_scores(Settings.DB_PATH, "b.png", {"porn": 90}, score_type_map)
+        self.assertIsNone(cache.get("porn > 50", score_versions([PORN])))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ScoreFilterCache(2)
+        cache.put("a", (), [])
+        cache.put("b", (), [])
+        cache.get("a", ())
+        cache.put("c", (), [])
+        self.assertIsNotNone(cache.get("a", ()))
+        self.assertIsNone(cache.get("b", ()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..config import score_type_map
+from ..database import init_db
+from ..services.score_matrix import get_score_matrix
+from ..services.score_matrix import reset_score_matrix
+from ..services.shared_versions import SCORES
+from ..services.shared_versions import bump_shared_version
+from ..utils.db_utils import save_nsfw_scores
+from ..utils.db_utils import save_quality_scores
+from ..utils.score_utils import delete_scores
+from ..utils.score_utils import delete_scores_by_type
+
+
+class TestScoreMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        Settings.DB_PATH = str(Path(self._tmp.name) / "test.db")
+        init_db(Settings.DB_PATH)
+        reset_score_matrix()
+        save_nsfw_scores(Settings.DB_PATH, "A.png", {"porn": 80, "hentai": 5}, score_type_map)
+        save_nsfw_scores(Settings.DB_PATH, "b.png", {"porn": 20, "hentai": 70}, score_type_map)
+        save_quality_scores(Settings.DB_PATH, "c.png", {"q1": 10, "q2": 90}, score_type_map)
+
+    def tearDown(self):
+        reset_score_matrix()
+        Settings.DB_PATH = self._old_db
+        self._tmp.cleanup()
+
+    def test_filter(self):
+        matrix = get_score_matrix()
+        self.assertEqual(matrix.filter("porn > 50"), ["a.png"])
+        self.assertEqual(sorted(matrix.filter("porn > 50 OR hentai > 50")), ["a.png", "b.png"])
+        self.assertEqual(matrix.filter("q2 > q1"), ["c.png"])
+        # Bilder ohne porn-Score treffen auch bei NOT nicht
+        self.assertEqual(matrix.filter("NOT porn > 50"), ["b.png"])
+
+    def test_incremental_updates(self):
+        matrix = get_score_matrix()
+        save_nsfw_scores(Settings.DB_PATH, "d.png", {"porn": 99}, score_type_map)
+        self.assertEqual(sorted(matrix.filter("porn > 50")), ["a.png", "d.png"])
+
+        delete_scores("a.png")
+        self.assertEqual(matrix.filter("porn > 50"), ["d.png"])
+
+        delete_scores_by_type(score_type_map["porn"])
+        self.assertEqual(matrix.filter("porn >= 0"), [])
+        self.assertEqual(matrix.filter("hentai > 50"), ["b.png"])
+
+    def test_reload_after_write_from_other_process(self):
+        matrix = get_score_matrix()
+        save_nsfw_scores(Settings.DB_PATH, "d.png", {"porn": 99}, score_type_map)
+        self.assertIs(get_score_matrix(), matrix)
+
+        # ein anderer Worker schreibt direkt in die Datenbank und erhöht den Zähler
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.execute("INSERT INTO image_quality_scores (image_name, score_type, score) VALUES (?, ?, ?)",
+                         ("e.png", score_type_map["porn"], 70))
+        bump_shared_version(SCORES)
+
+        reloaded = get_score_matrix()
+        self.assertIsNot(reloaded, matrix)
+        self.assertGreater(reloaded.version, matrix.version)
+        self.assertEqual(sorted(reloaded.filter("porn > 50")), ["a.png", "d.png", "e.png"])
+        self.assertIs(get_score_matrix(), reloaded)
+
+    def test_grows(self):
+        matrix = get_score_matrix()
+        for i in range(3000):
+            matrix.set_scores(f"x{i}.png", {score_type_map["q1"]: i % 100})
+        self.assertEqual(len(matrix.filter("q1 == 42")), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
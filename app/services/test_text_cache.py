@@ -0,0 +1,63 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..services.text_cache import TextCache
+from ..services.text_cache import text_key
+
+
+class TestTextCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_text_dir = Settings.TEXT_FILE_CACHE_DIR
+        Settings.TEXT_FILE_CACHE_DIR = self._tmp.name
+
+    def tearDown(self):
+        Settings.TEXT_FILE_CACHE_DIR = self._old_text_dir
+        self._tmp.cleanup()
+
+    def test_byte_budget(self):
+        text = "x" * 1000
+        cache = TextCache(max_bytes=3 * sys.getsizeof(text))
+        for i in range(5):
+            cache.put(f"{i}.png", text)
+        self.assertEqual(len(cache), 3)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertEqual(cache.evictions, 2)
+        self.assertIsNone(cache.get("0.png"))
+
+        cache.get("2.png")  # zuletzt benutzt → bleibt
+        cache.put("5.png", text)
+        self.assertIn("2.png", cache)
+        self.assertNotIn("3.png", cache)
+
+        cache.put("gross.png", "y" * 10 * len(text))
+        self.assertNotIn("gross.png", cache)
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_consistent_keys_and_invalidate(self):
+        self.assertEqual(text_key("/data/textfiles/Bild.PNG.txt"), "bild.png")
+        cache = TextCache(max_bytes=1024 ** 2)
+        cache.put("Bild.png", "alt")
+        self.assertEqual(cache.get("bild.png.txt"), "alt")
+        self.assertTrue(cache.invalidate("BILD.png.txt"))
+        self.assertFalse(cache.invalidate("bild.png"))
+        self.assertEqual(cache.bytes, 0)
+
+    def test_load_from_file(self):
+        (Path(self._tmp.name) / "a.png.txt").write_text("Ein Text", encoding="utf-8")
+        (Path(self._tmp.name) / "leer.png.txt").write_text("", encoding="utf-8")
+        for use_mmap in (False, True):
+            cache = TextCache(max_bytes=1024 ** 2, use_mmap=use_mmap)
+            self.assertEqual(cache.load("A.png"), "Ein Text")
+            self.assertEqual(cache.load("a.png"), "Ein Text")
+            self.assertEqual(cache.load("leer.png"), "")
+            self.assertIsNone(cache.load("fehlt.png"))
+            self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..services import page_cache
+from ..services.text_index import TextIndex
+from ..services.text_index import TextMeta
+from ..services.text_index import to_fts_query
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.text_dir = Path(self._tmp.name) / "textfiles"
+        self.text_dir.mkdir()
+        self.index = TextIndex(Path(self._tmp.name) / "text_index.db")
+        self._write("A.png.txt", "Aufgenommen: 01.01.2024\nKeine Verbesserung möglich, Hintergrund unscharf")
+        self._write("b.png.txt", "Aufgenommen: 02.01.2024\nSchöne Verbesserung der Farben")
+        self._write("c.jpg.txt", "Aufgenommen: None\nStrand bei Sonnenuntergang")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name: str, content: str) -> Path:
+        path = self.text_dir / name
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def test_sync_and_search(self):
+        self.assertEqual(self.index.sync(self.text_dir), (3, 0))
+        self.assertEqual(self.index.sync(self.text_dir), (0, 0))
+        self.assertEqual(self.index.search("keine Verbesserung"), ["a.png"])
+        self.assertEqual(sorted(self.index.search("verbesserung")), ["a.png", "b.png"])
+        self.assertEqual(self.index.search("sonnen*"), ["c.jpg"])
+        self.assertEqual(self.index.search("schone"), ["b.png"])  # Umlaute ohne Diakritika
+
+    def test_incremental_update(self):
+        self.index.sync(self.text_dir)
+        generation = self.index.generation
+        path = self._write("c.jpg.txt", "Aufgenommen: None\nBerge im Nebel")
+        self.index.update_file(path)
+        self.assertGreater(self.index.generation, generation)
+        self.assertEqual(self.index.search("strand"), [])
+        self.assertEqual(self.index.search("nebel"), ["c.jpg"])
+
+        os.remove(self.text_dir / "b.png.txt")
+        self.assertEqual(self.index.sync(self.text_dir), (0, 1))
+        self.assertEqual(self.index.search("farben"), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_text_changes_touch_images(self):
+        self.index.sync(self.text_dir)
+        stamp = page_cache._IMAGE_STAMPS.get("c.jpg", 0)
+        self.index.update_file(self._write("c.jpg.txt", "Aufgenommen: None\nBerge im Nebel"))
+        self.assertGreater(page_cache._IMAGE_STAMPS["c.jpg"], stamp)
+
+        stamp = page_cache._IMAGE_STAMPS["a.png"]
+        os.remove(self.text_dir / "A.png.txt")
+        self.index.sync(self.text_dir)
+        self.assertGreater(page_cache._IMAGE_STAMPS["a.png"], stamp)
+
+    def test_snippets_and_bad_queries(self):
+        self.index.sync(self.text_dir)
+        name, snippet, rank = self.index.search_with_snippets("hintergrund")[0]
+        self.assertEqual(name, "a.png")
+        self.assertIn("<b>Hintergrund</b>", snippet)
+        self.assertEqual(self.index.search('"'), [])
+        self.assertEqual(self.index.search("a:b (c"), [])
+
+    def test_meta(self):
+        self.index.sync(self.text_dir)
+        self._write("d.png.txt", "Error 2: quota\n\nThe model failed")
+        self.index.update_file(self.text_dir / "d.png.txt")
+        metas = self.index.metas(["A.png", "d.png", "fehlt.png"])
+        self.assertEqual(set(metas), {"a.png", "d.png"})
+        self.assertEqual(metas["a.png"].capture, "Aufgenommen: 01.01.2024")
+        self.assertFalse(metas["a.png"].has_error)
+        self.assertEqual(metas["d.png"], TextMeta(None, "Error 2: quota", 32, True))
+
+        os.remove(self.text_dir / "d.png.txt")
+        self.index.sync(self.text_dir)
+        self.assertIsNone(self.index.meta("d.png"))
+
+    def test_meta_filled_for_existing_index(self):
+        self.index.sync(self.text_dir)
+        with self.index._connect() as conn:
+            conn.execute("DROP TABLE text_meta")
+        index = TextIndex(self.index.path)
+        self.assertEqual(index.meta("c.jpg").summary, "Aufgenommen: None\nStrand bei Sonnenuntergang")
+
+    def test_to_fts_query(self):
+        self.assertEqual(to_fts_query("keine Verbesserung"), '"keine" "Verbesserung"')
+        self.assertEqual(to_fts_query("haus* OR garten"), '"haus"* OR "garten"')
+        self.assertEqual(to_fts_query('OR "a b"'), '"a b"')
+
+    def test_excluding_terms(self):
+        self.assertEqual(to_fts_query("verbesserung -keine"), '("verbesserung") NOT "keine"')
+        self.assertEqual(to_fts_query("NOT keine verbesserung"), '("verbesserung") NOT "keine"')
+        self.assertEqual(to_fts_query("-keine"), "")
+        self.index.sync(self.text_dir)
+        self.assertEqual(self.index.search("verbesserung -keine"), ["b.png"])
+        self.assertEqual(self.index.search("NOT keine verbesserung"), ["b.png"])
+        self.assertEqual(self.index.search("verbesserung NOT farb*"), ["a.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()
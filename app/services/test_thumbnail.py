@@ -0,0 +1,78 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from ..config import Settings
+from ..services.thumbnail import ThumbnailEngine
+from ..services.pack_store import get_thumbnail_pack
+from ..services.thumbnail import get_thumbnail_path
+from ..services.thumbnail import render_thumbnail
+from ..services.thumbnail import thumbnail_exists
+
+
+def _write_jpeg(path: Path, size=(800, 400), orientation=None) -> None:
+    img = Image.new("RGB", size, (200, 30, 30))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    img.save(path, format="JPEG", exif=exif.tobytes())
+
+
+class TestThumbnail(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self._old_thumbs = Settings.THUMBNAIL_CACHE_DIR_300
+        self._old_dir = Settings.IMAGE_FILE_CACHE_DIR
+        self._old_pack = Settings.THUMBNAIL_PACK_DIR
+        Settings.THUMBNAIL_CACHE_DIR_300 = self.root / "thumbs"
+        Settings.THUMBNAIL_PACK_DIR = self.root / "packs"
+        Settings.IMAGE_FILE_CACHE_DIR = str(self.root / "images")
+
+    def tearDown(self):
+        Settings.THUMBNAIL_CACHE_DIR_300 = self._old_thumbs
+        Settings.IMAGE_FILE_CACHE_DIR = self._old_dir
+        Settings.THUMBNAIL_PACK_DIR = self._old_pack
+        self._tmp.cleanup()
+
+    def test_render_with_draft_and_orientation(self):
+        _write_jpeg(self.root / "quer.jpg", (4000, 2000))
+        _write_jpeg(self.root / "gedreht.jpg", (4000, 2000), orientation=6)
+        render_thumbnail(str(self.root / "quer.jpg"), str(self.root / "t" / "quer.png"))
+        render_thumbnail(str(self.root / "gedreht.jpg"), str(self.root / "t" / "gedreht.png"))
+        self.assertEqual(Image.open(self.root / "t" / "quer.png").size, (300, 150))
+        self.assertEqual(Image.open(self.root / "t" / "gedreht.png").size, (150, 300))
+        self.assertEqual(sorted(p.name for p in (self.root / "t").iterdir()), ["gedreht.png", "quer.png"])
+
+    def test_engine_coalesces_and_fills_folder(self):
+        folder = self.root / "images" / "real"
+        folder.mkdir(parents=True)
+        for name in ("a.jpg", "b.jpg"):
+            _write_jpeg(folder / name)
+        (folder / Settings.GALLERY_HASH_FILE).write_text(
+            json.dumps({"a.jpg": "md5_a", "b.jpg": "md5_b", "fehlt.jpg": "md5_c"}))
+
+        engine = ThumbnailEngine(1)
+        try:
+            first = engine.submit(folder / "a.jpg", "md5_a")
+            self.assertIs(engine.submit(folder / "a.jpg", "md5_a"), first)
+            self.assertTrue(first.result(timeout=60))
+            self.assertTrue(thumbnail_exists("md5_a"))
+
+            self.assertEqual(engine.generate_missing("real"), (1, 0))
+            self.assertTrue(thumbnail_exists("md5_b"))
+            self.assertEqual(engine.generate_missing("real"), (0, 0))
+            # ins Pack übernommen, die Einzeldateien sind weg
+            self.assertEqual(sorted(get_thumbnail_pack().keys()), ["md5_a", "md5_b"])
+            self.assertFalse(get_thumbnail_path("md5_b").exists())
+            self.assertFalse(engine.ensure(folder / "fehlt.jpg", "md5_c"))
+        finally:
+            engine.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
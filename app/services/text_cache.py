@@ -0,0 +1,131 @@
+import mmap
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from ..config import Settings
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_LOCK = threading.Lock()
+_CACHE: Optional["TextCache"] = None
+
+
+def text_key(name: str) -> str:
+    """Einheitlicher Schlüssel: Bildname lowercase; '<bild>.txt' (Name der Textdatei) → '<bild>'."""
+    name = Path(name).name.lower()
+    return name[:-4] if name.endswith(".txt") else name
+
+
+def read_text_file(path: Path, use_mmap: bool = False) -> Optional[str]:
+    """Inhalt einer Textdatei oder None, wenn es sie nicht gibt; mit use_mmap über eine Speicherabbildung."""
+    try:
+        if not use_mmap:
+            return Path(path).read_text(encoding="utf-8", errors="replace")
+        with open(path, "rb") as f:
+            if not f.seek(0, 2):
+                return ""  # leere Dateien lassen sich nicht abbilden
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:].decode("utf-8", errors="replace")
+    except FileNotFoundError:
+        return None
+
+
+class TextCache:
+    """
+    LRU für Bildbeschreibungen (Bildname → Text), begrenzt auf max_bytes Speicher.
+
+    Fehlt ein Text, liest load() die Datei aus TEXT_FILE_CACHE_DIR nach; ein verdrängter
+    Eintrag ist also nur ein erneuter Dateizugriff und nie ein fehlender Text.
+    """
+
+    def __init__(self, max_bytes: int, use_mmap: bool = False):
+        self.max_bytes = max_bytes
+        self.use_mmap = use_mmap
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return text_key(name) in self._entries
+
+    def get(self, name: str) -> Optional[str]:
+        key = text_key(name)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, name: str, text: str) -> None:
+        key = text_key(name)
+        size = sys.getsizeof(text)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = text
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def load(self, name: str) -> Optional[str]:
+        """Text aus dem Cache, sonst aus der Textdatei (und dann gemerkt); None, wenn es keine gibt."""
+        text = self.get(name)
+        if text is None:
+            text = read_text_file(Path(Settings.TEXT_FILE_CACHE_DIR) / f"{text_key(name)}.txt", self.use_mmap)
+            if text is not None:
+                self.put(name, text)
+        return text
+
+    def invalidate(self, name: str) -> bool:
+        with self._lock:
+            return self._discard(text_key(name))
+
+    def _discard(self, key: str) -> bool:
+        text = self._entries.pop(key, None)
+        if text is None:
+            return False
+        self.bytes -= sys.getsizeof(text)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def get_text_cache() -> TextCache:
+    global _CACHE
+    if _CACHE is None:
+        with _LOCK:
+            if _CACHE is None:
+                _CACHE = TextCache(Settings.TEXT_CACHE_MAX_BYTES, Settings.TEXT_CACHE_MMAP)
+    return _CACHE
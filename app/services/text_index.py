@@ -0,0 +1,324 @@
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from ..config import Settings
+from ..services.page_cache import touch_image
+from ..services.text_cache import get_text_cache
+from ..utils.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+SNIPPET_TOKENS = 12
+_WORD_PATTERN = re.compile(r'"[^"]*"\*?|\S+')
+
+_LOCK = threading.Lock()
+_INDEXES: Dict[str, "TextIndex"] = {}
+
+
+def image_name_of(txt_path: Path) -> str:
+    """<bild>.png.txt → <bild>.png (lowercase, wie überall in der Galerie)"""
+    name = Path(txt_path).name.lower()
+    return name[:-4] if name.endswith(".txt") else name
+
+
+class TextMeta(NamedTuple):
+    """Vorberechnete Felder einer Textdatei für textflag 3/4 und die RECHECK-Erkennung."""
+    capture: Optional[str]  # Zeile "Aufgenommen: …", falls vorhanden
+    summary: str  # Text bis vor "\n\nThe" bzw. "\n\nClose"
+    length: int
+    has_error: bool  # enthält "Error 2" → Bild muss neu beschrieben werden
+
+
+def text_meta_of(content: str) -> TextMeta:
+    first_line = content.split("\n", 1)[0].rstrip("\r")
+    capture = first_line if first_line.startswith("Aufgenommen:") else None
+    ends = [i for i in (content.find("\n\nThe"), content.find("\n\nClose")) if i != -1]
+    summary = content[:min(ends)] if ends else content
+    return TextMeta(capture, summary, len(content), "Error 2" in content)
+
+
+def to_fts_query(text: str) -> str:
+    """
+    Suchtext → FTS5-Ausdruck. Wörter werden UND-verknüpft und als Phrase gequotet,
+    damit Sonderzeichen keine FTS-Syntax sind; 'wort*' sucht nach Präfix, OR bleibt Operator.
+    'NOT wort' und '-wort' schließen aus: '(<übrige Wörter>) NOT "wort"'. Ohne ein
+    einschließendes Wort gibt es keinen gültigen Ausdruck → leerer String.
+    """
+    terms, excluded = [], []
+    negate = False
+    for word in _WORD_PATTERN.findall(text.strip()):
+        if word in ("OR", "AND"):
+            terms.append(word)
+            continue
+        if word == "NOT":
+            negate = True
+            continue
+        if word.startswith("-") and len(word) > 1:
+            negate, word = True, word[1:]
+        prefix = word.endswith("*")
+        word = word.rstrip("*").strip('"').replace('"', '""')
+        if word:
+            (excluded if negate else terms).append(f'"{word}"' + ("*" if prefix else ""))
+        negate = False
+    cleaned = []
+    for term in terms:
+        if term in ("OR", "AND") and (not cleaned or cleaned[-1] in ("OR", "AND")):
+            continue
+        cleaned.append(term)
+    while cleaned and cleaned[-1] in ("OR", "AND"):
+        cleaned.pop()
+    if not cleaned:
+        if excluded:
+            logger.info(f"[to_fts_query] ⚠️ Suche '{text}' enthält nur Ausschlüsse – ignoriert")
+        return ""
+    query = " ".join(cleaned)
+    if excluded:
+        query = f"({query}) NOT " + " NOT ".join(excluded)
+    return query
+
+
+class TextIndex:
+    """
+    FTS5-Volltextindex über die Textdateien (TEXT_FILE_CACHE_DIR), Schlüssel ist der Bildname.
+
+    text_files merkt sich mtime/Größe jeder Datei, damit sync() nur geänderte Dateien neu liest,
+    text_meta die kleinen Felder für die Anzeige (TextMeta), damit der volle Text nicht im Speicher liegt.
+    generation steigt bei jeder Änderung (für Caches von Suchergebnissen), geänderte Bilder
+    werden per touch_image markiert, damit Galerie-Seiten mit ihrem Text neu ausgeliefert werden.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                         CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5
+                         (
+                             image_name UNINDEXED,
+                             content,
+                             tokenize = 'unicode61 remove_diacritics 2'
+                         )
+                         """)
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS text_files
+                         (
+                             image_name TEXT PRIMARY KEY,
+                             text_rowid INTEGER,
+                             mtime_ns   INTEGER,
+                             size       INTEGER
+                         ) WITHOUT ROWID
+                         """)
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS text_meta
+                         (
+                             image_name TEXT PRIMARY KEY,
+                             capture    TEXT,
+                             summary    TEXT,
+                             length     INTEGER,
+                             has_error  INTEGER
+                         ) WITHOUT ROWID
+                         """)
+            self._fill_missing_meta(conn)
+
+    def _fill_missing_meta(self, conn: sqlite3.Connection) -> None:
+        # Index aus der Zeit vor text_meta: Felder aus dem gespeicherten Inhalt nachtragen
+        rows = conn.execute("""
+                            SELECT f.image_name, t.content
+                            FROM text_files f
+                                     JOIN texts t ON t.rowid = f.text_rowid
+                            WHERE f.image_name NOT IN (SELECT image_name FROM text_meta)
+                            """).fetchall()
+        for image_name, content in rows:
+            self._put_meta(conn, image_name, content)
+        if rows:
+            logger.info(f"[text_index] 📝 text_meta für {len(rows)} Texte nachgetragen")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM text_files").fetchone()[0]
+
+    # --- Schreiben -------------------------------------------------------
+
+    def _delete(self, conn: sqlite3.Connection, image_name: str) -> None:
+        row = conn.execute("SELECT text_rowid FROM text_files WHERE image_name = ?", (image_name,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM texts WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM text_files WHERE image_name = ?", (image_name,))
+            conn.execute("DELETE FROM text_meta WHERE image_name = ?", (image_name,))
+
+    @staticmethod
+    def _put_meta(conn: sqlite3.Connection, image_name: str, content: str) -> None:
+        capture, summary, length, has_error = text_meta_of(content)
+        conn.execute("INSERT OR REPLACE INTO text_meta (image_name, capture, summary, length, has_error) "
+                     "VALUES (?, ?, ?, ?, ?)", (image_name, capture, summary, length, int(has_error)))
+
+    def _put(self, conn: sqlite3.Connection, image_name: str, content: str, mtime_ns: int, size: int) -> None:
+        self._delete(conn, image_name)
+        rowid = conn.execute("INSERT INTO texts (image_name, content) VALUES (?, ?)",
+                             (image_name, content)).lastrowid
+        conn.execute("INSERT INTO text_files (image_name, text_rowid, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                     (image_name, rowid, mtime_ns, size))
+        self._put_meta(conn, image_name, content)
+
+    def update_file(self, txt_path: Path) -> bool:
+        """Liest eine Textdatei (neu) ein; fehlt sie, wird sie aus dem Index entfernt."""
+        txt_path = Path(txt_path)
+        image_name = image_name_of(txt_path)
+        try:
+            stat = txt_path.stat()
+            content = txt_path.read_text(encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            self.remove(image_name)
+            return False
+        with self._lock, self._connect() as conn:
+            self._put(conn, image_name, content, stat.st_mtime_ns, stat.st_size)
+            self.generation += 1
+        touch_image(image_name)
+        return True
+
+    def remove(self, image_name: str) -> None:
+        with self._lock, self._connect() as conn:
+            self._delete(conn, image_name.lower())
+            self.generation += 1
+        touch_image(image_name)
+
+    def sync(self, text_dir: Path) -> Tuple[int, int]:
+        """
+        Gleicht den Index mit dem Verzeichnis ab: neue/geänderte Dateien einlesen,
+        verschwundene entfernen. Liefert (aktualisiert, entfernt).
+        """
+        text_dir = Path(text_dir)
+        files = {}
+        for txt_path in text_dir.glob("*.txt"):
+            try:
+                stat = txt_path.stat()
+            except OSError:
+                continue
+            files[image_name_of(txt_path)] = (txt_path, stat.st_mtime_ns, stat.st_size)
+
+        with self._connect() as conn:
+            known = {name: (mtime_ns, size) for name, mtime_ns, size in
+                     conn.execute("SELECT image_name, mtime_ns, size FROM text_files")}
+
+        changed = [(name, entry) for name, entry in files.items() if known.get(name) != entry[1:]]
+        removed = [name for name in known if name not in files]
+        if not changed and not removed:
+            return 0, 0
+
+        with self._lock, self._connect() as conn:
+            for name in removed:
+                self._delete(conn, name)
+            for name, (txt_path, mtime_ns, size) in changed:
+                try:
+                    content = txt_path.read_text(encoding="utf-8", errors="replace")
+                except OSError as e:
+                    logger.warning(f"[text_index] ⚠️ {txt_path} nicht lesbar: {e}")
+                    continue
+                self._put(conn, name, content, mtime_ns, size)
+            self.generation += 1
+        # Text steckt in der Seite → betroffene Seiten bekommen einen neuen ETag
+        touch_image(*removed, *(name for name, _ in changed))
+        logger.info(f"[text_index] 🔄 Sync {text_dir}: {len(changed)} aktualisiert, {len(removed)} entfernt")
+        return len(changed), len(removed)
+
+    # --- Metadaten -------------------------------------------------------
+
+    def meta(self, image_name: str) -> Optional[TextMeta]:
+        return self.metas([image_name]).get(image_name.lower())
+
+    def metas(self, image_names: Iterable[str]) -> Dict[str, TextMeta]:
+        """TextMeta mehrerer Bilder mit einer Abfrage; Bilder ohne Textdatei fehlen im Ergebnis."""
+        names = list(dict.fromkeys(name.lower() for name in image_names))
+        result = {}
+        with self._connect() as conn:
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT image_name, capture, summary, length, has_error FROM text_meta "
+                    f"WHERE image_name IN ({','.join('?' * len(chunk))})", chunk)
+                for image_name, capture, summary, length, has_error in rows:
+                    result[image_name] = TextMeta(capture, summary, length, bool(has_error))
+        return result
+
+    # --- Suchen ----------------------------------------------------------
+
+    def search(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Bildnamen nach BM25-Relevanz; ungültige Ausdrücke liefern eine leere Liste."""
+        return [name for name, _, _ in self._query(text, limit, snippets=False)]
+
+    def search_with_snippets(self, text: str, limit: Optional[int] = 50) -> List[Tuple[str, str, float]]:
+        """(Bildname, Ausschnitt mit <b>…</b> um Treffer, BM25-Rang)"""
+        return self._query(text, limit, snippets=True)
+
+    def _query(self, text: str, limit: Optional[int], snippets: bool) -> List[Tuple[str, str, float]]:
+        query = to_fts_query(text)
+        if not query:
+            return []
+        snippet = f"snippet(texts, 1, '<b>', '</b>', '…', {SNIPPET_TOKENS})" if snippets else "''"
+        sql = f"SELECT image_name, {snippet}, bm25(texts) FROM texts WHERE texts MATCH ? ORDER BY bm25(texts)"
+        params: list = [query]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        try:
+            with self._connect() as conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"[text_index] ⚠️ Ungültige Suche '{text}': {e}")
+            return []
+
+
+def get_text_index() -> TextIndex:
+    key = str(Settings.TEXT_INDEX_PATH)
+    index = _INDEXES.get(key)
+    if index is None:
+        with _LOCK:
+            index = _INDEXES.get(key)
+            if index is None:
+                index = TextIndex(Path(key))
+                _INDEXES[key] = index
+    return index
+
+
+def index_text_file(txt_path: Path) -> None:
+    """Hook nach dem Schreiben einer Textdatei; Fehler landen nur im Log."""
+    get_text_cache().invalidate(str(txt_path))
+    try:
+        get_text_index().update_file(txt_path)
+    except Exception as e:
+        logger.warning(f"[text_index] ⚠️ Index-Update für {txt_path} fehlgeschlagen: {e}")
+
+
+def get_text_meta(image_name: str) -> Optional[TextMeta]:
+    """
+    TextMeta eines Bildes. Fehlt der Eintrag (z.B. vor dem ersten Sync), wird die Textdatei
+    einmal eingelesen; None heißt: es gibt keine Textdatei.
+    """
+    index = get_text_index()
+    meta = index.meta(image_name)
+    txt_path = Path(Settings.TEXT_FILE_CACHE_DIR) / f"{image_name}.txt"
+    if meta is None and txt_path.is_file() and index.update_file(txt_path):
+        meta = index.meta(image_name)
+    return meta
+
+
+def sync_text_index() -> Tuple[int, int]:
+    try:
+        return get_text_index().sync(Path(Settings.TEXT_FILE_CACHE_DIR))
+    except Exception as e:
+        logger.error(f"[text_index] ❌ Sync fehlgeschlagen: {e}")
+        return 0, 0
@@ -1,26 +1,79 @@
+import multiprocessing
 import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 from PIL import Image
 from PIL import ImageOps
 
 from ..config import Settings  # Importiere die Settings-Klasse
+from ..services.pack_store import get_thumbnail_pack
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
+_LOCK = threading.Lock()
+_ENGINE: Optional["ThumbnailEngine"] = None
+
+
 def get_thumbnail_path(image_id) -> Path:
     return Path(Settings.THUMBNAIL_CACHE_DIR_300) / f"{image_id}.png"
 
 
-def generate_thumbnail(image_path: Path, thumbnail_path: Path, image_id: str) -> bool:
+_SAVE_OPTIONS = {
+    "WEBP": {"quality": 80, "method": 4},
+}
+
+
+def thumbnail_exists(image_id: str) -> bool:
+    """Thumbnail im Pack oder (noch nicht übernommen) als Einzeldatei."""
+    return image_id in get_thumbnail_pack() or get_thumbnail_path(image_id).exists()
+
+
+def _pack_thumbnail(image_id: str) -> None:
+    """Übernimmt ein frisch erzeugtes Thumbnail aus THUMBNAIL_CACHE_DIR_300 ins Pack."""
     try:
-        logger.info(f"[generate_thumbnail] 🖼️ Erzeuge Thumbnail für {image_id}")
-        img = Image.open(image_path)
+        get_thumbnail_pack().import_file(image_id, get_thumbnail_path(image_id))
+    except Exception as e:
+        logger.error(f"[thumbnail] ❌ Pack-Übernahme für {image_id} fehlgeschlagen: {e}")
+
+
+def render_thumbnail(image_path: str, thumbnail_path: str, size: int = 300, fmt: str = "JPEG") -> bool:
+    """
+    Erzeugt ein Thumbnail (oder eine Rendition im Format fmt); läuft in den Worker-Prozessen
+    der ThumbnailEngine.
+
+    JPEGs werden per draft() schon beim Dekodieren verkleinert (DCT-Skalierung 1/2…1/8),
+    andere Formate per reduce() ganzzahlig vorverkleinert, bevor LANCZOS die Endgröße rechnet.
+    Geschrieben wird über eine temporäre Datei, damit nie ein halbes Thumbnail ausgeliefert wird.
+    """
+    with Image.open(image_path) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", (size * 2, size * 2))
         img = ImageOps.exif_transpose(img)
-        img.thumbnail((300, 300), Image.Resampling.LANCZOS)
+        img.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
         os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
-        img.convert("RGB").save(thumbnail_path, format="JPEG")
+        tmp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+        img.convert("RGB").save(tmp_path, format=fmt, **_SAVE_OPTIONS.get(fmt, {}))
+    os.replace(tmp_path, thumbnail_path)
+    return True
+
+
+def generate_thumbnail(image_path: Path, thumbnail_path: Path, image_id: str) -> bool:
+    try:
+        logger.info(f"[generate_thumbnail] 🖼️ Erzeuge Thumbnail für {image_id}")
+        render_thumbnail(str(image_path), str(thumbnail_path), Settings.THUMBNAIL_SIZE)
         logger.info(f"[generate_thumbnail] ✅ Thumbnail gespeichert: {thumbnail_path}")
         return True
     except Exception as e:
@@ -28,15 +81,155 @@ def generate_thumbnail(image_path: Path, thumbnail_path: Path, image_id: str) ->
         return False
 
 
+def _done(ok: bool) -> Future:
+    future = Future()
+    future.set_result(ok)
+    return future
+
+
+def _then(future: Future, after: Callable[[], None]) -> Future:
+    """Future, das erst nach after() fertig wird (after nur bei Ergebnis True)."""
+    chained = Future()
+
+    def _done_callback(done: Future) -> None:
+        try:
+            ok = done.result()
+            if ok:
+                after()
+            chained.set_result(ok)
+        except Exception as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(_done_callback)
+    return chained
+
+
+class ThumbnailEngine:
+    """
+    Thumbnail-Erzeugung in einem Prozess-Pool (PIL dekodiert ohne GIL-Konkurrenz zum Webserver).
+
+    Gleichzeitige Anfragen für dieselbe image_id teilen sich einen Auftrag; vorhandene
+    Thumbnails werden nicht neu erzeugt.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: kein fork eines Prozesses mit laufenden Threads
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, image_path: Path, image_id: str) -> Future:
+        """
+        Future mit True/False; läuft für image_id schon ein Auftrag, wird dieser geliefert.
+        Das Ergebnis wird danach ins Thumbnail-Pack übernommen.
+        """
+        if image_id in get_thumbnail_pack():
+            return _done(True)
+        return self._submit(image_id, image_path, get_thumbnail_path(image_id), Settings.THUMBNAIL_SIZE, "JPEG",
+                            after=lambda: _pack_thumbnail(image_id))
+
+    def submit_render(self, image_path: Path, target_path: Path, size: int, fmt: str) -> Future:
+        """Wie submit, aber mit beliebigem Ziel, Größe und Format (Renditions); Schlüssel ist der Zielpfad."""
+        return self._submit(str(target_path), image_path, target_path, size, fmt)
+
+    def _submit(self, key: str, image_path: Path, target_path: Path, size: int, fmt: str,
+                after: Optional[Callable[[], None]] = None) -> Future:
+        """after läuft nach erfolgreichem Erzeugen, bevor das gelieferte Future fertig ist."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if target_path.exists():
+                return _done(True)
+            try:
+                future = self._get_pool().submit(render_thumbnail, str(image_path), str(target_path), size, fmt)
+            except BrokenProcessPool:
+                self._pool = None
+                future = self._get_pool().submit(render_thumbnail, str(image_path), str(target_path), size, fmt)
+            if after is not None:
+                future = _then(future, after)
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def ensure(self, image_path: Path, image_id: str) -> bool:
+        """Wartet, bis das Thumbnail existiert; Fehler landen im Log."""
+        try:
+            return self.submit(image_path, image_id).result()
+        except Exception as e:
+            logger.error(f"[thumbnail] ❌ Fehler beim Erzeugen von Thumbnail {image_id}: {e}")
+            return False
+
+    def submit_missing(self, folder_name: str) -> List[Future]:
+        """Aufträge für alle Bilder einer Kategorie ohne Thumbnail."""
+        from ..services.folder_index import get_folder_index
+        index = get_folder_index(folder_name)
+        folder_path = Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_name
+        packed = set(get_thumbnail_pack().keys())
+        return [self.submit(folder_path / name, image_id)
+                for name, image_id in zip(index.names, index.image_ids)
+                if image_id not in packed and not get_thumbnail_path(image_id).exists()
+                and (folder_path / name).exists()]
+
+    def generate_missing(self, folder_name: str) -> Tuple[int, int]:
+        """Erzeugt alle fehlenden Thumbnails einer Kategorie; liefert (erzeugt, fehlgeschlagen)."""
+        futures = self.submit_missing(folder_name)
+        wait(futures)
+        failed = sum(1 for future in futures if future.exception() is not None or not future.result())
+        return len(futures) - failed, failed
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def get_thumbnail_engine() -> ThumbnailEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        with _LOCK:
+            if _ENGINE is None:
+                _ENGINE = ThumbnailEngine(Settings.THUMBNAIL_WORKERS)
+    return _ENGINE
+
+
 def thumbnail(count, folder_name, image_id, image_name):
     from ..services.image_processing import download_and_save_image
     local_thumbnail_path = download_and_save_image(folder_name, image_name, image_id)
 
-    if local_thumbnail_path and os.path.exists(local_thumbnail_path):
+    if local_thumbnail_path and thumbnail_exists(image_id):
         if count != 1:
             thumbnail_src = f"/gallery/static/thumbnails/{image_id}.png"
         else:
-            thumbnail_src = f"/gallery/static/imagefiles/{folder_name}/{image_name}"
+            from ..services.renditions import largest_rendition_url
+            thumbnail_src = largest_rendition_url(image_id)
     else:
         thumbnail_src = "https://via.placeholder.com/150?text=Kein+Bild"
     return thumbnail_src
+
+
+def p4():
+    """Fehlende Thumbnails einer Kategorie vorwärmen: python -m app.services.thumbnail <kategorie>"""
+    folder_name = sys.argv[1] if len(sys.argv) > 1 else "real"
+    start = time.time()
+    created, failed = get_thumbnail_engine().generate_missing(folder_name)
+    elapsed = max(time.time() - start, 1e-6)
+    logger.info(f"[thumbnail] ✅ {folder_name}: {created} erzeugt, {failed} Fehler, "
+                f"{created / elapsed:.1f} Bilder/s")
+    get_thumbnail_engine().shutdown()
+
+
+if __name__ == "__main__":
+    p4()
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import os
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -14,8 +15,13 @@ from PIL import Image
 from .config import Settings
 from .config_gdrive import SettingsGdrive
 from .config_gdrive import calculate_md5
+from .services.catalog import CatalogEntry
+from .services.catalog import upsert_catalog
+from .services.folder_index import find_folder_of_image
+from .services.folder_index import find_folder_of_image_id
+from .services.folder_index import get_folder_index
+from .services.text_index import index_text_file
 from .utils.logger_config import setup_logger
-from .utils.progress import update_progress_text
 from .utils.progress_detail import calc_detail_progress
 from .utils.progress_detail import start_detail_progress
 from .utils.progress_detail import stop_detail_progress
@@ -30,25 +36,8 @@ class ImageCacheError(Exception):
 
 
 def newpaircache(folder_name):
-    pair_cache = {}
-    folder_path = Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_name
-    if folder_path.exists():
-        gallery_hash_file = folder_path / Settings.GALLERY_HASH_FILE
-
-        try:
-            if gallery_hash_file.exists():
-                with open(gallery_hash_file, 'r') as f:
-                    local_hashes = json.load(f)
-                    # Erstelle pair_cache Einträge aus local_hashes
-                    for filename, md5_hash in local_hashes.items():
-                        pair_cache[filename] = {
-                            "image_id": md5_hash,  # Der Dateiname ist die ID
-                            "folder": folder_name
-                        }
-
-        except Exception as e:
-            asyncio.run(update_progress_text(f"❌ Fehler beim Lesen/Schreiben der Cache-Dateien: {e}"))
-    return pair_cache
+    """Pair-Cache einer Kategorie (aus dem In-Memory-Index, ohne JSON neu zu parsen)."""
+    return get_folder_index(folder_name).pair_cache()
 
 
 def fillcache_local(pair_cache_path_local: str, image_file_cache_dir: str):
@@ -70,23 +59,16 @@ def fillcache_local(pair_cache_path_local: str, image_file_cache_dir: str):
 
 
 def find_image_id_by_name(image_name: str) -> Optional[str]:
-    """Return the image_id for a given image name, updating cache per-category."""
+    """Return the image_id for a given image name, looked up in the folder indexes."""
     logger.info(f"🔎 Suche ID für Bild: {image_name}")
     image_name = image_name.lower()
     try:
-        for kategorie in Settings.kategorien():
-            key = kategorie["key"]
-            logger.info(f"✅ Cache-Aktualisierung: {key}")
-            pair_cache = newpaircache(key)
-            Settings.CACHE["pair_cache"].update(pair_cache)
-
-            # Lookup
-            pair = pair_cache.get(image_name)
-            if pair and isinstance(pair, dict):
-                image_id = pair["image_id"]
-                if image_id:
-                    logger.info(f"✅ Nach Cache-Aktualisierung gefunden: {image_id}")
-                    return image_id
+        index = find_folder_of_image(image_name)
+        if index:
+            image_id = index.image_id(image_name)
+            if image_id:
+                logger.info(f"✅ Gefunden in {index.folder_name}: {image_id}")
+                return image_id
 
     except Exception as e:
         logger.error(f"❌ Fehler beim Lesen des Hash: {e}")
@@ -98,19 +80,14 @@ def find_image_id_by_name(image_name: str) -> Optional[str]:
 def find_image_name_by_id(image_id: str) -> Optional[str]:
     image_id = dict2md5(image_id)
 
-    """Return the image name for a given image_id, updating cache per-category."""
+    """Return the image name for a given image_id, looked up in the folder indexes."""
     logger.info(f"🔎 Suche Bildname für ID: {image_id}")
     try:
-        for kategorie in Settings.kategorien():
-            key = kategorie["key"]
-            logger.info(f"✅ Cache-Aktualisierung: {key}")
-            pair_cache = newpaircache(key)
-            Settings.CACHE["pair_cache"].update(pair_cache)
-
-            for image_name, pair in pair_cache.items():
-                if isinstance(pair, dict) and pair["image_id"] == image_id:
-                    logger.info(f"✅ Nach Cache-Aktualisierung gefunden: {image_name}")
-                    return image_name
+        index = find_folder_of_image_id(image_id)
+        if index:
+            image_name = index.name_by_id(image_id)
+            logger.info(f"✅ Gefunden in {index.folder_name}: {image_name}")
+            return image_name
     except Exception as e:
         logger.error(f"❌ Fehler beim Lesen des Hash: {e}")
 
@@ -256,6 +233,7 @@ def update_date_in_txt_file(txt_file_path: Path, german_date: str) -> None:
                 lines.insert(0, neue_zeile)
 
             txt_file_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+            index_text_file(txt_file_path)
 
     except Exception as e:
         logger.error(f"Fehler beim Aktualisieren der Datei {txt_file_path}: {e}")
@@ -271,6 +249,7 @@ async def readimages(folder_path: str, pair_cache: Dict[str, Any]) -> None:
     """
     folder = Path(folder_path)
     bilder_daten: List[Dict[str, Any]] = []
+    catalog: List[CatalogEntry] = []
 
     # Zuerst die Gesamtzahl der Dateien ermitteln
     total_files = sum(1 for file_path in folder.iterdir()
@@ -312,6 +291,8 @@ async def readimages(folder_path: str, pair_cache: Dict[str, Any]) -> None:
             update_date_in_txt_file(txt_file_path, german_date)
 
             # Bilddaten sammeln
+            catalog.append(CatalogEntry(image_name, md5_hash, file_path.parent.name,
+                                        aufnahmedatum.timestamp(), file_path.stat().st_size))
             bilder_daten.append({
                 'name': image_name,
                 'data': {
@@ -336,6 +317,12 @@ async def readimages(folder_path: str, pair_cache: Dict[str, Any]) -> None:
     for bild in bilder_daten:
         pair_cache[bild['name']] = bild['data']
 
+    # Katalog mit exaktem Aufnahmedatum; die Galerie blättert darüber ohne Sortierung
+    try:
+        upsert_catalog(catalog)
+    except sqlite3.Error as e:
+        logger.warning(f"[readimages] ⚠️ Katalog nicht aktualisiert: {e}")
+
     await stop_detail_progress(status)
 
 
@@ -0,0 +1,38 @@
+import gzip
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotlicffi as brotli
+except ImportError:  # brotli ist optional, dann nur gzip
+    brotli = None
+
+MIN_SIZE = 512
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    encodings = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def compressed_response(request: Request, body: bytes, media_type: str, headers: dict | None = None,
+                        status_code: int = 200) -> Response:
+    """Antwort mit brotli oder gzip, je nach Accept-Encoding des Clients."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    if len(body) >= MIN_SIZE:
+        encodings = accepted_encodings(request)
+        if brotli is not None and "br" in encodings:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in encodings:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
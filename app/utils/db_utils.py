@@ -1,12 +1,25 @@
 import sqlite3
 
 from ..config import Settings
+from ..services.page_cache import bump_content_generation
+from ..services.page_cache import touch_image
+from ..services.score_filter_cache import bump_score_version
 from ..tools import dict2md5
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def _scores_saved(image_name: str, scores: dict[str, int], mapping):
+    # lokaler Import: score_matrix -> score_parser -> db_utils
+    from ..services.score_matrix import loaded_score_matrix
+    type_scores = {mapping[label]: value for label, value in scores.items() if mapping.get(label)}
+    bump_score_version(*type_scores)
+    matrix = loaded_score_matrix()
+    if matrix is not None:
+        matrix.set_scores(image_name, type_scores)
+
+
 def save_folder_status_to_db(db_path: str, image_id: str, folder_key: str):
     logger.info(f"[save_folder_status_to_db] Start – db_path={db_path}, image_id={image_id}, folder_key={folder_key}")
     try:
@@ -51,6 +64,8 @@ def save_quality_scores(db_path: str, image_name: str, quality_scores: dict[str,
                     INSERT OR REPLACE INTO image_quality_scores (image_name, score_type, score)
                     VALUES (?, ?, ?)
                 """, (image_name, type_id, value))
+    _scores_saved(image_name, quality_scores, mapping)
+    touch_image(image_name)
 
 
 def load_nsfw_from_db(db_path: str, image_name: str):
@@ -74,6 +89,8 @@ def save_nsfw_scores(db_path: str, image_name: str, nsfw_scores: dict[str, int],
                     INSERT OR REPLACE INTO image_quality_scores (image_name, score_type, score)
                     VALUES (?, ?, ?)
                 """, (image_name, type_id, value))
+    _scores_saved(image_name, nsfw_scores, mapping)
+    touch_image(image_name)
 
 
 def load_all_nsfw_scores(db_path: str):
@@ -97,6 +114,16 @@ def load_quality_from_db(db_path: str, image_name: str):
                             """, (image_name,)).fetchall()
 
 
+def _clear_bitmap_checkboxes(image_name):
+    # lokaler Import: bitmap_index -> score_matrix -> score_parser -> db_utils
+    from ..services.bitmap_index import checkboxes_written
+    from ..services.bitmap_index import loaded_bitmap_index
+    checkboxes_written()
+    index = loaded_bitmap_index()
+    if index is not None:
+        index.clear_checkboxes(image_name)
+
+
 def delete_checkbox_status(image_name: str):
     logger.info(f"[delete_checkbox_status] Start – image_name={image_name}")
     with sqlite3.connect(Settings.DB_PATH) as conn:
@@ -106,6 +133,8 @@ def delete_checkbox_status(image_name: str):
                        FROM checkbox_status
                        WHERE LOWER(image_name) = LOWER(?)
                        """, (image_name,))
+    _clear_bitmap_checkboxes(image_name)
+    touch_image(image_name)
 
 
 def delete_all_checkbox_status():
@@ -118,6 +147,8 @@ def delete_all_checkbox_status():
         cursor.execute("DELETE FROM checkbox_status")
         deleted_count = cursor.rowcount
         logger.info(f"[delete_all_checkbox_status] ✅ {deleted_count} Einträge gelöscht")
+    _clear_bitmap_checkboxes(None)
+    bump_content_generation()
 
 
 def delete_all_external_tasks():
@@ -182,3 +213,101 @@ def load_comfyui_count(db_path, image_id: str) -> int:
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Laden des comfyui_count für {image_id}: {e}")
         return 0
+
+
+SQLITE_MAX_PARAMS = 900
+
+
+def _chunks(values: list, size: int = SQLITE_MAX_PARAMS):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def load_page_data(db_path: str, images: list[tuple[str, str]]) -> dict[str, dict]:
+    """
+    Lädt Scores, Checkbox-Status und comfyui_count für alle Bilder einer Seite
+    über eine Verbindung mit wenigen IN (...)-Abfragen.
+
+    Args:
+        db_path: Pfad zur SQLite-Datenbank
+        images: Liste von (image_name, image_id)
+
+    Returns:
+        image_name -> {"quality_rows", "nsfw_rows", "face_rows", "status", "comfyui_count"}
+        Die *_rows haben dasselbe Format wie load_quality_from_db & Co.
+        Bei einem DB-Fehler wird ein leeres Dict geliefert (Einzelabfragen als Fallback).
+    """
+    logger.info(f"[load_page_data] Start – db_path={db_path}, Bilder={len(images)}")
+    result = {
+        image_name: {
+            "quality_rows": [],
+            "nsfw_rows": [],
+            "face_rows": [],
+            "status": {},
+            "comfyui_count": 0
+        }
+        for image_name, _ in images
+    }
+    if not images:
+        return result
+
+    by_name = {image_name.lower(): image_name for image_name, _ in images}
+    by_id = {}
+    for image_name, image_id in images:
+        if image_id:
+            by_id.setdefault(dict2md5(image_id).lower(), []).append(image_name)
+
+    try:
+        with sqlite3.connect(db_path) as conn:
+            keys = list(set(by_name) | set(by_id))
+            for chunk in _chunks(keys):
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(f"""
+                    SELECT LOWER(image_name), score_type, score
+                    FROM image_quality_scores
+                    WHERE LOWER(image_name) IN ({placeholders})
+                """, chunk).fetchall()
+                for key, score_type, score in rows:
+                    if key in by_name:
+                        entry = result[by_name[key]]
+                        if 1 <= score_type <= 2:
+                            entry["quality_rows"].append((score_type, score))
+                        elif 10 <= score_type <= 15:
+                            entry["nsfw_rows"].append((score_type, score))
+                    if score_type == 5:
+                        for image_name in by_id.get(key, []):
+                            result[image_name]["face_rows"].append((score_type, score))
+
+            names = list(result)
+            for chunk in _chunks(names):
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(f"""
+                    SELECT image_name, checkbox, checked
+                    FROM checkbox_status
+                    WHERE image_name IN ({placeholders})
+                """, chunk).fetchall()
+                for image_name, checkbox, checked in rows:
+                    result[image_name]["status"][checkbox] = bool(checked)
+
+            ids = [dict2md5(image_id) for _, image_id in images if image_id]
+            for chunk in _chunks(ids):
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(f"""
+                    SELECT image_name, value
+                    FROM text_status
+                    WHERE field = 'comfyui_count'
+                      AND image_name IN ({placeholders})
+                """, chunk).fetchall()
+                for image_id, value in rows:
+                    try:
+                        count = int(value) if value is not None else 0
+                    except ValueError:
+                        logger.warning(f"Wert für comfyui_count bei {image_id} ist kein Integer: {value!r}.")
+                        count = 0
+                    for image_name in by_id.get(image_id.lower(), []):
+                        result[image_name]["comfyui_count"] = count
+    except sqlite3.Error as e:
+        logger.error(f"[load_page_data] ❌ Fehler beim Laden der Seitendaten: {e}")
+        return {}
+
+    return result
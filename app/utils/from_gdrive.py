@@ -3,6 +3,7 @@ import os
 from ..config_gdrive import SettingsGdrive
 from ..config_gdrive import folder_id_by_name
 from ..routes.auth import load_drive_service_token
+from ..services.text_index import index_text_file
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -197,6 +198,7 @@ def find_and_download_missing_text_files(service, textfiles_folder_id: str) -> N
                     target_path = cache_dir / file_name
                     with open(target_path, "wb") as f:
                         f.write(fh.getvalue())
+                    index_text_file(target_path)
 
                     download_stats["neu"] += 1
                     tqdm.write(f"✅ Heruntergeladen: {target_path}")
@@ -9,6 +9,7 @@ from ..config_gdrive import calculate_md5
 from ..config_gdrive import folder_id_by_name
 from ..config_gdrive import sanitize_filename
 from ..routes.auth import load_drive_service
+from ..services.text_index import sync_text_index
 
 
 def move_file_to_folder(service, file_id, old_parents, new_parent):
@@ -117,6 +118,8 @@ def sync_txt_files(service, from_folder_name, to_folder_name):
     existing_hashes = {f['md5Checksum'] for f in to_files if 'md5Checksum' in f}
 
     downloaded = perform_local_sync(service, from_files, Settings.TEXT_FILE_CACHE_DIR, existing_hashes)
+    if downloaded:
+        sync_text_index()
     moved, deleted = perform_gdrive_sync(service, from_files, to_files, existing_hashes, to_folder_id, from_folder_id)
 
     print("Zusammenfassung:")
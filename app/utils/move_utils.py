@@ -9,7 +9,12 @@ from typing import Optional
 from ..config import Settings
 from ..config_gdrive import calculate_md5
 from ..routes.hashes import update_local_hash
-from ..tools import newpaircache
+from ..services.bitmap_index import get_bitmap_index
+from ..services.bitmap_index import checkboxes_written
+from ..services.bitmap_index import loaded_bitmap_index
+from ..services.catalog import move_in_catalog
+from ..services.folder_index import bump_folder_generation
+from ..services.folder_index import find_folder_of_image
 from ..tools import readimages
 from ..utils.logger_config import setup_logger
 
@@ -45,6 +50,10 @@ async def move_single_image(image_name: str, current_folder: str, new_folder: st
                     (image_name, new_folder)
                 )
                 conn.commit()
+                checkboxes_written()
+                index = loaded_bitmap_index()
+                if index is not None:
+                    index.set_checkbox(image_name, new_folder, False)
                 return True
             else:
                 logger.warning(f"⚠️ move_file_db fehlgeschlagen für {image_name}")
@@ -82,16 +91,8 @@ def get_checkbox_count(checkbox: str):
     if checkbox not in Settings.checkbox_categories():
         logger.warning("⚠️ Ungültige Checkbox-Kategorie")
         return {"count": 0}
-    with sqlite3.connect(Settings.DB_PATH) as conn:
-        count = conn.execute(
-            """
-            SELECT COUNT(*)
-            FROM checkbox_status
-            WHERE checked = 1
-              AND checkbox = ?
-            """,
-            (checkbox,),
-        ).fetchone()[0]
+    index = get_bitmap_index()
+    count = index.count(index.checkbox(checkbox))
     logger.info(f"🔢 Anzahl markierter Bilder in '{checkbox}': {count}")
     return {"count": count}
 
@@ -124,15 +125,9 @@ async def move_file_db(
 def _get_image_id(image_name: str) -> Optional[int]:
     """Liest den Image-ID-Wert aus den konfigurierten Kategorien aus dem Cache."""
     try:
-        for kategorie in Settings.kategorien():
-            key = kategorie["key"]
-            logger.info(f"✅ Cache-Aktualisierung: {key}")
-            pair_cache = newpaircache(key)
-            Settings.CACHE["pair_cache"].update(pair_cache)
-
-            pair = pair_cache.get(image_name)
-            if isinstance(pair, dict) and pair.get("image_id"):
-                return pair["image_id"]
+        index = find_folder_of_image(image_name)
+        if index:
+            return index.image_id(image_name)
     except Exception as e:
         logger.error(f"❌ Fehler beim Lesen des Hash: {e}")
     return None
@@ -204,6 +199,12 @@ async def _move_file_and_update_hash(
         new_dir.mkdir(parents=True, exist_ok=True)
         shutil.move(str(old_file), str(new_dir / image_name))
         await update_local_hash(new_dir, image_name, file_md5, True)
+        bump_folder_generation(old_folder_id)
+        bump_folder_generation(new_folder_id)
+        index = loaded_bitmap_index()
+        if index is not None:
+            index.move_image(image_name, old_folder_id, new_folder_id)
+        move_in_catalog(image_name, new_folder_id)
         logger.info(f"[move_file_db] ✅ Datei und Hashes aktualisiert für: {image_name}")
         return True
     except Exception as e:
@@ -237,4 +238,5 @@ async def fill_pair_cache_folder(folder_name: str, image_file_cache_dir, pair_ca
     except Exception as e:
         logger.error(f"[fill_pair_cache] Fehler beim Speichern von pair_cache.json: {e}")
 
+    bump_folder_generation(folder_name)
     logger.info(f"[fill_pair_cache] Cache für {folder_name} aktualisiert.")
@@ -1,46 +1,204 @@
 import re
+from functools import lru_cache
+
+import numpy as np
 
 from ..config import score_type_map
 from ..utils.db_utils import load_scores_from_db
 
+# Grammatik (Schlüsselwörter ohne Beachtung der Groß-/Kleinschreibung):
+#   ausdruck   := oder
+#   oder       := und (("OR" | "|") und)*
+#   und        := nicht (("AND" | "&" | ";") nicht)*
+#   nicht      := ("NOT" | "!") nicht | "(" ausdruck ")" | vergleich
+#   vergleich  := operand ("==" | "!=" | "<=" | ">=" | "<" | ">") operand
+#   operand    := score-name | ganzzahl
+# Beispiel: (porn > 50 OR hentai > 50) AND NOT q1 < q2
+
+_TOKEN_PATTERN = re.compile(r"\s*(?:(==|!=|<=|>=|<|>)|(\(|\)|&|;|\||!)|(-?\d+)|([a-zA-Z_][a-zA-Z_0-9]*))")
+_KEYWORDS = {"and": "&", "or": "|", "not": "!"}
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+}
+
+
+def _tokenize(expr: str) -> list[tuple[str, object]]:
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        match = _TOKEN_PATTERN.match(expr, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Ungültiger Ausdruck: {expr[pos:].strip()}")
+        op, symbol, number, name = match.groups()
+        if op:
+            tokens.append(("op", op))
+        elif symbol:
+            tokens.append(("sym", "&" if symbol == ";" else symbol))
+        elif number:
+            tokens.append(("num", int(number)))
+        elif name.lower() in _KEYWORDS:
+            tokens.append(("sym", _KEYWORDS[name.lower()]))
+        else:
+            tokens.append(("key", name.lower()))
+        pos = match.end()
+    return tokens
+
+
+class ScoreExpression:
+    """
+    Einmal kompilierter Score-Ausdruck.
+
+    evaluate() prüft ein values-Dict (ein Bild), mask() wertet den Ausdruck
+    vektorisiert über Spalten-Arrays aus (alle Bilder auf einmal).
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.keys: set[str] = set()
+        self._tokens = _tokenize(expr)
+        self._pos = 0
+        if not self._tokens:
+            raise ValueError("Leerer Ausdruck")
+        self.tree = self._parse_or()
+        if self._pos != len(self._tokens):
+            raise ValueError(f"Ungültiger Ausdruck: unerwartetes '{self._tokens[self._pos][1]}'")
+
+    # --- Parser ---------------------------------------------------------
+
+    def _peek(self):
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self._pos += 1
+        return token
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek() == ("sym", "|"):
+            self._take()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek() == ("sym", "&"):
+            self._take()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._peek() == ("sym", "!"):
+            self._take()
+            return ("not", self._parse_not())
+        if self._peek() == ("sym", "("):
+            self._take()
+            node = self._parse_or()
+            if self._take() != ("sym", ")"):
+                raise ValueError(f"Ungültiger Ausdruck: fehlende ')' in {self.expr}")
+            return node
+        return self._parse_comparison()
+
+    def _parse_operand(self):
+        kind, value = self._take()
+        if kind == "num":
+            return ("num", value)
+        if kind == "key":
+            if value not in score_type_map:
+                raise ValueError(
+                    f"Unbekannter Score-Schlüssel: {value} (erlaubt: {', '.join(sorted(score_type_map))})")
+            self.keys.add(value)
+            return ("key", value)
+        raise ValueError(f"Ungültiger Ausdruck: Operand erwartet, gefunden '{value}'")
+
+    def _parse_comparison(self):
+        left = self._parse_operand()
+        kind, op = self._take()
+        if kind != "op":
+            raise ValueError(f"Ungültiger Ausdruck: Vergleich erwartet, gefunden '{op}'")
+        right = self._parse_operand()
+        return ("cmp", op, left, right)
+
+    # --- Auswertung ------------------------------------------------------
+
+    def evaluate(self, values: dict) -> bool:
+        def operand(node):
+            if node[0] == "num":
+                return node[1]
+            value = values.get(node[1])
+            if value is None:
+                raise KeyError(f"{node[1]} fehlt in Werten")
+            return value
+
+        def walk(node):
+            match node[0]:
+                case "or":
+                    return walk(node[1]) or walk(node[2])
+                case "and":
+                    return walk(node[1]) and walk(node[2])
+                case "not":
+                    return not walk(node[1])
+                case _:
+                    return _OPS[node[1]](operand(node[2]), operand(node[3]))
+
+        return bool(walk(self.tree))
+
+    def mask(self, columns: dict[str, np.ndarray], count: int, missing: int) -> np.ndarray:
+        """
+        Args:
+            columns: score-name -> Werte aller Bilder (count Zeilen)
+            missing: Wert in columns für einen fehlenden Score
+
+        Ein Vergleich mit einem fehlenden Score ist weder wahr noch falsch (wie NULL in SQL):
+        'porn > 50 OR q1 > 50' trifft ein Bild mit porn = 80 auch ohne q1, NOT macht aus
+        einem fehlenden Score aber keinen Treffer.
+        """
+
+        def operand(node):
+            return node[1] if node[0] == "num" else columns[node[1]]
+
+        def walk(node):
+            # (wahr, falsch) je Bild; beides False heißt unbekannt
+            match node[0]:
+                case "or":
+                    (t1, f1), (t2, f2) = walk(node[1]), walk(node[2])
+                    return t1 | t2, f1 & f2
+                case "and":
+                    (t1, f1), (t2, f2) = walk(node[1]), walk(node[2])
+                    return t1 & t2, f1 | f2
+                case "not":
+                    t, f = walk(node[1])
+                    return f, t
+                case _:
+                    result = np.broadcast_to(_OPS[node[1]](operand(node[2]), operand(node[3])), (count,))
+                    known = np.ones(count, dtype=bool)
+                    for side in node[2:]:
+                        if side[0] == "key":
+                            known &= columns[side[1]] != missing
+                    return result & known, ~result & known
+
+        return walk(self.tree)[0]
+
+
+@lru_cache(maxsize=128)
+def compile_score_expression(expr: str) -> ScoreExpression:
+    """Kompiliert einen Ausdruck (gecacht); wirft ValueError bei ungültiger Syntax oder unbekanntem Score."""
+    return ScoreExpression(expr)
+
 
 def parse_score_expression(expr, values):
     """
     Prüft einen Ausdruck wie 'porn > 50 AND nsfw_score <= 70' gegen ein values-Dict.
+    Erlaubt sind außerdem OR, NOT, Klammern und Vergleiche zweier Scores ('q1 > q2').
     """
-    allowed_keys = set(score_type_map.keys())
-    condition_pattern = r"([a-zA-Z_0-9]+)\s*(==|!=|<=|>=|<|>)\s*(\d+)"
-    tokens = re.split(r"\s*(?:&|;|AND)\s*", expr, flags=re.IGNORECASE)
-
-    ops = {
-        "==": lambda a, b: a == b,
-        "!=": lambda a, b: a != b,
-        "<=": lambda a, b: a <= b,
-        ">=": lambda a, b: a >= b,
-        "<": lambda a, b: a < b,
-        ">": lambda a, b: a > b,
-    }
-
-    for token in tokens:
-        token = token.strip()
-        match = re.fullmatch(condition_pattern, token)
-        if not match:
-            raise ValueError(f"Ungültiger Ausdruck: {token}")
-
-        key, op, threshold_str = match.groups()
-        threshold = int(threshold_str)
-
-        if key not in allowed_keys:
-            raise ValueError(f"Unbekannter Score-Schlüssel: {key} (erlaubt: {', '.join(sorted(allowed_keys))})")
-
-        value = values.get(key)
-        if value is None:
-            raise KeyError(f"{key} fehlt in Werten")
-
-        if not ops[op](value, threshold):
-            return False
-
-    return True
+    return compile_score_expression(expr).evaluate(values)
 
 
 def check_image_scores(db_path, image_name, condition_expr):
@@ -1,6 +1,10 @@
 import sqlite3
 
 from ..config import Settings
+from ..services.page_cache import bump_content_generation
+from ..services.page_cache import touch_image
+from ..services.score_filter_cache import bump_score_version
+from ..services.score_matrix import loaded_score_matrix
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -16,6 +20,11 @@ def delete_scores(image_name: str):
                        FROM image_quality_scores
                        WHERE LOWER(image_name) = LOWER(?)
                        """, (image_name,))
+    bump_score_version()
+    matrix = loaded_score_matrix()
+    if matrix is not None:
+        matrix.delete_image(image_name)
+    touch_image(image_name)
 
 
 def delete_scores_by_type(score_type: int):
@@ -28,3 +37,8 @@ def delete_scores_by_type(score_type: int):
                        FROM image_quality_scores
                        WHERE score_type = ?
                        """, (score_type,))
+    bump_score_version(score_type)
+    matrix = loaded_score_matrix()
+    if matrix is not None:
+        matrix.delete_type(score_type)
+    bump_content_generation()
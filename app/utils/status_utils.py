@@ -1,12 +1,24 @@
 import sqlite3
 
 from ..config import Settings
+from ..services.bitmap_index import checkboxes_written
+from ..services.bitmap_index import loaded_bitmap_index
+from ..services.page_cache import touch_image
 from ..tools import find_image_name_by_id
+from ..utils.db_utils import SQLITE_MAX_PARAMS
 from ..utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def _update_bitmap_index(image_name: str, checked: dict[str, int]):
+    checkboxes_written()
+    index = loaded_bitmap_index()
+    if index is not None and image_name:
+        for key, value in checked.items():
+            index.set_checkbox(image_name, key, bool(value))
+
+
 def set_status(image_name: str, key: str, checked: int = 1):
     logger.info(f"[set_status] 📝 Setze Status für {image_name}, Checkbox: {key}, Wert: {checked}")
     if key is None:
@@ -23,6 +35,8 @@ def set_status(image_name: str, key: str, checked: int = 1):
                 (image_name, key, checked)
             )
             conn.commit()
+        _update_bitmap_index(image_name, {key: checked})
+        touch_image(image_name)
         logger.info(f"[set_status] ✅ Status gesetzt für {image_name} ({key}={checked})")
     except sqlite3.Error as e:
         logger.error(f"[set_status] ❌ Fehler beim Setzen des Status für {image_name}: {e}")
@@ -48,11 +62,62 @@ def load_status(image_name: str):
     return status
 
 
+def load_status_bulk(images: list[tuple[str, str]]) -> dict[str, dict]:
+    """
+    Checkbox-Status und comfyui_count für viele Bilder mit einer Abfrage.
+
+    Args:
+        images: Liste von (image_name, image_id)
+
+    Returns:
+        image_id -> {"status": {checkbox: bool}, "comfyui_count": int}
+    """
+    logger.info(f"[load_status_bulk] 📥 Lade Status für {len(images)} Bilder")
+    result = {image_id: {"status": {}, "comfyui_count": 0} for _, image_id in images}
+    by_name = {}
+    for image_name, image_id in images:
+        by_name.setdefault(image_name, []).append(image_id)
+
+    names = list(by_name)
+    ids = list(result)
+    # Jede Hälfte der UNION braucht eigene Platzhalter → Limit halbieren
+    step = SQLITE_MAX_PARAMS // 2
+    try:
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            for i in range(0, max(len(names), len(ids)), step):
+                name_chunk = names[i:i + step]
+                id_chunk = ids[i:i + step]
+                rows = conn.execute(f"""
+                    SELECT 0, image_name, checkbox, checked
+                    FROM checkbox_status
+                    WHERE image_name IN ({",".join("?" for _ in name_chunk)})
+                    UNION ALL
+                    SELECT 1, image_name, field, value
+                    FROM text_status
+                    WHERE field = 'comfyui_count'
+                      AND image_name IN ({",".join("?" for _ in id_chunk)})
+                """, name_chunk + id_chunk).fetchall()
+                for kind, key, field, value in rows:
+                    if kind == 0:
+                        for image_id in by_name.get(key, []):
+                            result[image_id]["status"][field] = bool(value)
+                    elif key in result:
+                        try:
+                            result[key]["comfyui_count"] = int(value) if value is not None else 0
+                        except ValueError:
+                            logger.warning(f"Wert für comfyui_count bei {key} ist kein Integer: {value!r}.")
+    except sqlite3.Error as e:
+        logger.error(f"[load_status_bulk] ❌ Fehler beim Laden des Status: {e}")
+        raise
+    return result
+
+
 def save_status(image_id: str, data: dict):
     logger.info(f"[save_status] 💾 Speichere Status für ID: {image_id}, Daten: {data}")
     image_name = find_image_name_by_id(image_id)
     logger.info(f"[save_status] Speichern des Status für {image_name}. Eingabedaten: {data}")
 
+    saved = {}
     try:
         with sqlite3.connect(Settings.DB_PATH) as conn:
             for key, value in data.items():
@@ -62,8 +127,11 @@ def save_status(image_id: str, data: dict):
                         INSERT OR REPLACE INTO checkbox_status (image_name, checkbox, checked)
                         VALUES (?, ?, ?)
                     """, (image_name, key, checked))
+                    saved[key] = checked
                     logger.info(f"[save_status] ✅ Checkbox '{key}' für {image_name} gespeichert. Wert: {checked}")
             conn.commit()
+        _update_bitmap_index(image_name, saved)
+        touch_image(image_name, image_id)
     except sqlite3.Error as e:
         logger.error(f"[save_status] ❌ Fehler beim Speichern des Status für {image_name}: {e}")
         raise
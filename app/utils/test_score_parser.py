@@ -1,8 +1,12 @@
 import unittest
 from unittest.mock import patch
 
+import numpy as np
+
 from ..config import score_type_map
+from ..services.score_matrix import MISSING
 from ..utils.score_parser import check_image_scores
+from ..utils.score_parser import compile_score_expression
 from ..utils.score_parser import parse_score_expression
 
 dummy_scores = {key: 0 for key in score_type_map.keys()}
@@ -109,6 +113,51 @@ class TestScoreParser(unittest.TestCase):
         with self.assertRaises(ValueError):
             parse_score_expression(expr, dummy_scores)
 
+    def test_or_not_parentheses(self):
+        values = {'porn': 60, 'hentai': 10, 'q1': 20, 'q2': 40}
+        self.assertTrue(parse_score_expression("porn > 50 OR hentai > 50", values))
+        self.assertFalse(parse_score_expression("NOT porn > 50", values))
+        self.assertTrue(parse_score_expression("(porn > 50 | hentai > 50) & !q1 > q2", values))
+        self.assertFalse(parse_score_expression("porn > 50 AND (hentai > 50 OR q1 > 30)", values))
+
+    def test_compare_two_scores(self):
+        self.assertTrue(parse_score_expression("q2 > q1", {'q1': 20, 'q2': 40}))
+        self.assertFalse(parse_score_expression("q1 >= q2", {'q1': 20, 'q2': 40}))
+
+    def test_unbalanced_parentheses(self):
+        with self.assertRaises(ValueError):
+            parse_score_expression("(porn > 50", dummy_scores)
+        with self.assertRaises(ValueError):
+            parse_score_expression("porn > 50)", dummy_scores)
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            compile_score_expression("foo > 3")
+
+    def test_mask_matches_evaluate(self):
+        rng = np.random.default_rng(7)
+        porn = rng.integers(0, 100, 500)
+        q1 = rng.integers(0, 100, 500)
+        expr = "(porn > 50 OR q1 < 20) AND NOT porn == q1"
+        mask = compile_score_expression(expr).mask({'porn': porn, 'q1': q1}, 500, MISSING)
+        expected = [parse_score_expression(expr, {'porn': int(porn[i]), 'q1': int(q1[i])}) for i in range(500)]
+        self.assertEqual(mask.tolist(), expected)
+
+    def test_mask_or_with_missing_scores(self):
+        rng = np.random.default_rng(11)
+        porn_present = rng.random(500) > 0.3
+        q1_present = rng.random(500) > 0.5
+        porn = np.where(porn_present, rng.integers(0, 100, 500), MISSING)
+        q1 = np.where(q1_present, rng.integers(0, 100, 500), MISSING)
+        compiled = compile_score_expression("porn > 50 OR q1 > 50")
+        mask = compiled.mask({'porn': porn, 'q1': q1}, 500, MISSING)
+        self.assertEqual(mask.tolist(), ((porn_present & (porn > 50)) | (q1_present & (q1 > 50))).tolist())
+        self.assertTrue(mask[porn_present & ~q1_present & (porn > 50)].all())
+        for i in np.flatnonzero(porn_present & (porn > 50)):
+            self.assertTrue(compiled.evaluate({'porn': int(porn[i])}))  # evaluate bricht vor q1 ab
+
+        not_mask = compile_score_expression("NOT q1 > 50").mask({'q1': q1}, 500, MISSING)
+        self.assertEqual(not_mask.tolist(), (q1_present & (q1 <= 50)).tolist())
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,51 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..config import Settings
+from ..database import init_db
+from ..services import page_cache
+from ..utils.status_utils import load_status
+from ..utils.status_utils import load_status_bulk
+from ..utils.status_utils import set_status
+
+
+class TestStatusBulk(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db = Settings.DB_PATH
+        Settings.DB_PATH = str(Path(self._tmp.name) / "test.db")
+        init_db(Settings.DB_PATH)
+
+    def tearDown(self):
+        Settings.DB_PATH = self._old_db
+        self._tmp.cleanup()
+
+    def test_bulk_matches_single(self):
+        set_status("a.png", "top")
+        set_status("a.png", "bad", 0)
+        set_status("c.png", "delete")
+        with sqlite3.connect(Settings.DB_PATH) as conn:
+            conn.execute("INSERT INTO text_status VALUES ('md5_b', 'comfyui_count', '7')")
+
+        result = load_status_bulk([("a.png", "md5_a"), ("b.png", "md5_b"), ("c.png", "md5_c")])
+        self.assertEqual(result["md5_a"], {"status": load_status("a.png"), "comfyui_count": 0})
+        self.assertEqual(result["md5_b"], {"status": {}, "comfyui_count": 7})
+        self.assertEqual(result["md5_c"]["status"], {"delete": True})
+
+    def test_set_status_touches_image(self):
+        # /api/images liefert den Status hinter einem ETag → jede Änderung braucht einen neuen
+        stamp = page_cache._IMAGE_STAMPS.get("a.png", 0)
+        set_status("a.png", "top")
+        self.assertGreater(page_cache._IMAGE_STAMPS["a.png"], stamp)
+
+    def test_bulk_many(self):
+        images = [(f"img{i}.png", f"md5_{i}") for i in range(1200)]
+        set_status("img1100.png", "top")
+        self.assertEqual(load_status_bulk(images)["md5_1100"]["status"], {"top": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
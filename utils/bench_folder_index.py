@@ -0,0 +1,83 @@
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.config import Settings
+from app.services.folder_index import bump_folder_generation
+from app.services.folder_index import get_folder_index
+
+FOLDER = "real"
+IMAGES = 30000
+PAGE_COUNT = 33
+PAGES = 20
+
+
+def old_newpaircache(folder_name):
+    """Bisherige Implementierung: Hash-Datei bei jedem Aufruf neu parsen."""
+    pair_cache = {}
+    gallery_hash_file = Path(Settings.IMAGE_FILE_CACHE_DIR) / folder_name / Settings.GALLERY_HASH_FILE
+    with open(gallery_hash_file, 'r') as f:
+        for filename, md5_hash in json.load(f).items():
+            pair_cache[filename] = {"image_id": md5_hash, "folder": folder_name}
+    return pair_cache
+
+
+def write_hash_file(base_dir: Path) -> list[str]:
+    folder = base_dir / FOLDER
+    folder.mkdir(parents=True)
+    hashes = {f"{uuid.uuid4().hex[:12]}.png": uuid.uuid4().hex for _ in range(IMAGES)}
+    with (folder / Settings.GALLERY_HASH_FILE).open("w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2)
+    return list(hashes)
+
+
+def bench_old(names: list[str]) -> float:
+    start = time.perf_counter()
+    for page in range(PAGES):
+        # show_images_gallery + prepare_image_data je Bild
+        pair_cache = old_newpaircache(FOLDER)
+        for image_name in names[page * PAGE_COUNT:(page + 1) * PAGE_COUNT]:
+            _ = old_newpaircache(FOLDER)[image_name]["image_id"]
+        _ = len(pair_cache)
+    return time.perf_counter() - start
+
+
+def bench_index(names: list[str]) -> float:
+    start = time.perf_counter()
+    for page in range(PAGES):
+        index = get_folder_index(FOLDER)
+        for image_name in names[page * PAGE_COUNT:(page + 1) * PAGE_COUNT]:
+            _ = get_folder_index(FOLDER).image_id(image_name)
+        _ = len(index)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        Settings.IMAGE_FILE_CACHE_DIR = tmp
+        names = write_hash_file(Path(tmp))
+
+        old = bench_old(names)
+
+        start = time.perf_counter()
+        get_folder_index(FOLDER)
+        cold = time.perf_counter() - start
+        warm = bench_index(names)
+
+        bump_folder_generation(FOLDER)
+        start = time.perf_counter()
+        get_folder_index(FOLDER)
+        reload = time.perf_counter() - start
+
+    print(f"📊 {IMAGES} Bilder, {PAGES} Seiten à {PAGE_COUNT} Bilder")
+    print(f"JSON neu lesen:       {old * 1000 / PAGES:9.2f} ms/Seite")
+    print(f"Index (warm):         {warm * 1000 / PAGES:9.2f} ms/Seite")
+    print(f"Index laden (kalt):   {cold * 1000:9.2f} ms einmalig")
+    print(f"Index nach Generation:{reload * 1000:9.2f} ms einmalig")
+    print(f"Faktor:               {old / max(warm, 1e-9):9.0f}x")
+
+
+if __name__ == "__main__":
+    main()